@@ -1,5 +1,6 @@
 import asyncio
 import shutil
+import sqlite3
 from contextlib import suppress
 from os import chdir, getcwd, listdir, path
 from types import SimpleNamespace
@@ -18,8 +19,9 @@ from textual.containers import (
 from textual.content import Content
 from textual.css.errors import StyleValueError
 from textual.css.query import NoMatches
-from textual.screen import Screen
+from textual.screen import ModalScreen, Screen
 from textual.widgets import Input
+from textual.worker import get_current_worker
 
 from rovr.action_buttons import (
     CopyButton,
@@ -32,6 +34,7 @@ from rovr.action_buttons import (
     UnzipButton,
     ZipButton,
 )
+from rovr.classes import FileIndex
 from rovr.core import (
     FileList,
     PinnedSidebar,
@@ -40,6 +43,8 @@ from rovr.core import (
 from rovr.core.file_list import FileListRightClickOptionList
 from rovr.footer import Clipboard, MetadataContainer, ProcessContainer
 from rovr.functions import icons
+from rovr.functions import pins as pin_utils
+from rovr.functions.grep import shutdown_pool
 from rovr.functions.path import decompress, ensure_existing_directory, normalise
 from rovr.functions.themes import get_custom_themes
 from rovr.header import HeaderArea
@@ -50,7 +55,14 @@ from rovr.navigation_widgets import (
     PathInput,
     UpButton,
 )
-from rovr.screens import DummyScreen, YesOrNo, ZDToDirectory
+from rovr.screens import (
+    DummyScreen,
+    FindFiles,
+    FindInFiles,
+    GoToFile,
+    YesOrNo,
+    ZDToDirectory,
+)
 from rovr.screens.way_too_small import TerminalTooSmall
 from rovr.search_container import SearchInput
 from rovr.variables.constants import MaxPossible, config
@@ -96,6 +108,17 @@ class Application(App, inherit_bindings=False):
         self.app_blurred: bool = False
         self.startup_path: str = startup_path
         self.has_pushed_screen: bool = False
+        self.file_index: FileIndex | None = None
+        if config["search"]["index"]["enabled"]:
+            roots = list(config["search"]["index"]["roots"])
+            if config["search"]["index"]["include_pins"]:
+                roots.extend(pin["path"] for pin in pin_utils.load_pins()["pins"])
+            try:
+                self.file_index = FileIndex(
+                    path.join(VAR_TO_DIR["CONFIG"], "file_index.db"), roots
+                )
+            except sqlite3.Error as exc:
+                print(f"Could not open the file index: {exc}")
 
     def compose(self) -> ComposeResult:
         print("Starting Rovr...")
@@ -190,6 +213,11 @@ class Application(App, inherit_bindings=False):
         self.query_one("#file_list").focus()
         # start mini watcher
         self.watch_for_changes_and_update()
+        # rebuild the file index if it is out of date
+        if self.file_index is not None and self.file_index.needs_reindex(
+            config["search"]["index"]["reindex_hours"] * 3600
+        ):
+            self.reindex_files()
         # disable scrollbars
         self.show_horizontal_scrollbar = False
         self.show_vertical_scrollbar = False
@@ -205,9 +233,14 @@ class Application(App, inherit_bindings=False):
             super().action_focus_previous()
 
     async def on_key(self, event: events.Key) -> None:
+        # let the background reindex wait while the user is busy
+        if self.file_index is not None:
+            self.file_index.defer()
         # Not really sure why this can happen, but I will still handle this
         if self.focused is None or not self.focused.id:
             return
+        # a dialog is open, so don't stack another one on top of it
+        in_dialog = isinstance(self.screen, ModalScreen)
         # Make sure that key binds don't break
         match event.key:
             # placeholder, not yet existing
@@ -312,6 +345,7 @@ class Application(App, inherit_bindings=False):
             case key if (
                 config["plugins"]["zoxide"]["enabled"]
                 and event.key in config["plugins"]["zoxide"]["keybinds"]
+                and not in_dialog
             ):
                 if shutil.which("zoxide") is None:
                     self.notify(
@@ -330,6 +364,27 @@ class Application(App, inherit_bindings=False):
                         )
 
                 self.push_screen(ZDToDirectory(), on_response)
+            # recursive find
+            case key if key in config["keybinds"]["find_files"] and not in_dialog:
+                self.push_screen(FindFiles(getcwd()), self.go_to_found)
+            # recursive content search
+            case key if key in config["keybinds"]["find_in_files"] and not in_dialog:
+
+                def on_grep_response(response: tuple[str, int] | None) -> None:
+                    """Handle the response from the FindInFiles dialog."""
+                    if response:
+                        found = path.join(getcwd(), response[0])
+                        self.query_one(PreviewContainer).show_line(found, response[1])
+                        self.cd(path.dirname(found), focus_on=path.basename(found))
+
+                self.push_screen(FindInFiles(getcwd()), on_grep_response)
+            # indexed search
+            case key if (
+                key in config["keybinds"]["go_to_file"]
+                and self.file_index is not None
+                and not in_dialog
+            ):
+                self.push_screen(GoToFile(self.file_index), self.go_to_found)
             # zen mode
             case key if (
                 config["plugins"]["zen_mode"]["enabled"]
@@ -340,6 +395,9 @@ class Application(App, inherit_bindings=False):
                 else:
                     self.add_class("zen")
 
+    def on_unmount(self) -> None:
+        shutdown_pool()
+
     def on_app_blur(self, event: events.AppBlur) -> None:
         self.app_blurred = True
 
@@ -390,6 +448,16 @@ class Application(App, inherit_bindings=False):
         if callback:
             self.call_later(callback)
 
+    def go_to_found(self, found: str | None) -> None:
+        """Go to a file or folder picked in the FindFiles or GoToFile dialog.
+
+        Args:
+            found (str | None): The path, relative to the current directory.
+        """
+        if found:
+            found = path.join(getcwd(), found)
+            self.cd(path.dirname(found), focus_on=path.basename(found))
+
     @work
     async def watch_for_changes_and_update(self) -> None:
         self._cwd = getcwd()
@@ -406,8 +474,30 @@ class Application(App, inherit_bindings=False):
                 self._items = listdir(self._cwd)
             elif self._items != new_cwd_items:
                 self.cd(self._cwd)
+                self.refresh_file_index([
+                    path.join(self._cwd, item)
+                    for item in set(self._items) ^ set(new_cwd_items)
+                ])
                 self._items = new_cwd_items
 
+    @work(thread=True, group="file_index")
+    def reindex_files(self) -> None:
+        """Rebuild the file index in the background"""
+        worker = get_current_worker()
+        self.file_index.reindex(
+            config["search"]["ignore"], is_cancelled=lambda: worker.is_cancelled
+        )
+
+    @work(thread=True, group="file_index")
+    def refresh_file_index(self, locations: list[str]) -> None:
+        """Update the file index for paths that were created, changed or removed.
+
+        Args:
+            locations (list[str]): The absolute paths that changed.
+        """
+        if self.file_index is not None and locations:
+            self.file_index.refresh(locations, config["search"]["ignore"])
+
     @work
     async def on_resize(self, event: events.Resize) -> None:
         if (
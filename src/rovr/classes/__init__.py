@@ -1,6 +1,20 @@
 from .archive import Archive
+from .bat_runner import BatRunner
+from .cached_image import (
+    CachedHalfcellImage,
+    CachedImage,
+    CachedSixelImage,
+    CachedTGPImage,
+    CachedUnicodeImage,
+)
 from .exceptions import FolderNotFileError
+from .file_index import FileIndex
+from .fuzzy_filter import FuzzyFilter, RankedMatches
+from .mapped_document import MappedDocument
+from .preview_cache import PreviewCache
+from .seekable_stream import SeekableStream
 from .session_manager import SessionManager
+from .structured_query import StructuredQuery
 from .textual_options import (
     ClipboardSelection,
     FileListSelectionWidget,
@@ -17,8 +31,21 @@ from .theme import RovrThemeClass
 __all__ = [
     "RovrThemeClass",
     "Archive",
+    "BatRunner",
+    "CachedImage",
+    "CachedTGPImage",
+    "CachedSixelImage",
+    "CachedHalfcellImage",
+    "CachedUnicodeImage",
     "FolderNotFileError",
+    "FileIndex",
+    "FuzzyFilter",
+    "RankedMatches",
+    "MappedDocument",
+    "PreviewCache",
+    "SeekableStream",
     "SessionManager",
+    "StructuredQuery",
     "ClipboardSelection",
     "FileListSelectionWidget",
     "PinnedSidebarOption",
@@ -5,10 +5,12 @@ import tarfile
 import zipfile
 from pathlib import Path
 from types import TracebackType
-from typing import IO, List, Literal, Optional, Union
+from typing import IO, Dict, Iterator, List, Literal, Optional, Union
 
 import rarfile
 
+from .seekable_stream import Checkpoint, SeekableStream
+
 
 class Archive:
     """Unified handler for ZIP, TAR and RAR files with context manager support."""
@@ -18,6 +20,9 @@ class Archive:
         filename: Union[str, Path],
         mode: str = "r",
         compression_level: Optional[int] = None,
+        member_offsets: Optional[Dict[str, int]] = None,
+        checkpoints: Optional[List[Checkpoint]] = None,
+        find_restarts: bool = False,
     ) -> None:
         """Initialize the archive handler.
 
@@ -26,6 +31,13 @@ class Archive:
             mode: File access mode ('r' for read, 'w' for write, 'a' for append)
             compression_level: Compression level (ZIP: 0-9, TAR gzip: 0-9, TAR bzip2: 1-9)
                              If None, uses default compression
+            member_offsets: Where the header of each TAR member starts, by name,
+                            so that a member opened by name is found without
+                            reading every member before it
+            checkpoints: Points of a compressed TAR file that decompressing can
+                         start from, that were saved by an earlier read of it
+            find_restarts: Whether to look for such points of a gzip TAR file
+                           while reading it, which makes reading it slower
 
         Raises:
             ValueError: If mode is not supported or compression_level is out of range
@@ -38,6 +50,10 @@ class Archive:
         ] = None
         self._is_zip: Optional[bool] = None
         self._is_rar: Optional[bool] = None
+        self.member_offsets = member_offsets
+        self.checkpoints = checkpoints
+        self.find_restarts = find_restarts
+        self._stream: Optional[SeekableStream] = None
 
     def __enter__(self) -> "Archive":
         """Context manager entry - opens the archive.
@@ -70,6 +86,9 @@ class Archive:
         """Context manager exit - closes the archive."""
         if self._archive:
             self._archive.close()
+        if self._stream:
+            # tarfile leaves a file object it was given open
+            self._stream.close()
 
     def _detect_and_open(self) -> None:
         """Detect file type and open appropriate handler.
@@ -116,7 +135,21 @@ class Archive:
             self._is_zip = False
             self._is_rar = False
             if self.mode == "r":
-                self._archive = tarfile.open(self.filename, "r:*")  # noqa: SIM115
+                # gzip and xz through a stream that seeks from checkpoints,
+                # so that a member far in is read without all before it
+                self._stream = SeekableStream.open(
+                    self.filename, self.checkpoints, self.find_restarts
+                )
+                if self._stream is None:
+                    self._archive = tarfile.open(self.filename, "r:*")  # noqa: SIM115
+                else:
+                    try:
+                        self._archive = tarfile.open(  # noqa: SIM115
+                            fileobj=self._stream, mode="r:"
+                        )
+                    except BaseException:
+                        self._stream.close()
+                        raise
             else:
                 tar_mode = self._get_tar_write_mode()
                 if self.compression_level is not None:
@@ -185,6 +218,41 @@ class Archive:
             # Uncompressed tar - compression level ignored
             return tarfile.open(self.filename, tar_mode)
 
+    def _tar_member(self, name: str) -> Union[str, tarfile.TarInfo]:
+        """Find a TAR member by name, through its offset if it is known.
+
+        Args:
+            name: Name of the member
+
+        Returns:
+            The TarInfo read at its offset, or the name to look it up by if the
+            offset is unknown or out of date
+        """
+        name = name.replace("\\", "/")
+        offset = (self.member_offsets or {}).get(name)
+        if offset is None:
+            offset = (self.member_offsets or {}).get(name.rstrip("/") + "/")
+        if offset is None:
+            return name
+        assert isinstance(self._archive, tarfile.TarFile)
+        try:
+            self._archive.fileobj.seek(offset)
+            tarinfo = self._archive.tarinfo.fromtarfile(self._archive)
+        except (tarfile.TarError, EOFError, OSError):
+            return name
+        if tarinfo.name.rstrip("/") != name.rstrip("/"):
+            return name
+        return tarinfo
+
+    def saveable_checkpoints(self) -> List[Checkpoint]:
+        """Return the points of a compressed TAR file that decompressing can
+        start from, and that can be saved for the next time it is opened.
+
+        Returns:
+            List of checkpoints, empty for any other archive
+        """
+        return self._stream.saveable() if self._stream else []
+
     def infolist(
         self,
     ) -> List[Union[zipfile.ZipInfo, tarfile.TarInfo, rarfile.RarInfo]]:
@@ -204,6 +272,29 @@ class Archive:
         else:
             return self._archive.getmembers()
 
+    def iter_members(
+        self,
+    ) -> Iterator[Union[zipfile.ZipInfo, tarfile.TarInfo, rarfile.RarInfo]]:
+        """Iterate over archive members, reading a TAR file only as far as needed.
+
+        ZIP and RAR files list their members up front, but a (compressed) TAR
+        file has to be read up to a member to find it, so stopping early
+        saves reading the rest.
+
+        Yields:
+            ZipInfo, TarInfo or RarInfo objects
+
+        Raises:
+            RuntimeError: If archive is not opened
+        """
+        if not self._archive:
+            raise RuntimeError("Archive not opened")
+
+        if self._is_zip or self._is_rar:
+            yield from self._archive.infolist()
+        else:
+            yield from self._archive
+
     def namelist(self) -> List[str]:
         """Return list of member names.
 
@@ -251,6 +342,8 @@ class Archive:
             self._archive.extract(member, path)
             return str(Path(path or ".") / member_filename)
 
+        if not self._is_zip and isinstance(member, str):
+            member = self._tar_member(member)
         return self._archive.extract(member, path)
 
     def open(
@@ -284,4 +377,6 @@ class Archive:
             return self._archive.open(member, mode)
         else:
             # For tar files, use extractfile
+            if isinstance(member, str):
+                member = self._tar_member(member)
             return self._archive.extractfile(member)
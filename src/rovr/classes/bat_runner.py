@@ -0,0 +1,101 @@
+import subprocess
+import threading
+import time
+from typing import Callable
+
+
+class BatRunner:
+    """Runs bat, with a cap on how many run at once and how long each may take.
+
+    `run` blocks, so it is called from a worker or through `asyncio.to_thread`.
+    While it waits for a free slot or for bat to finish, it keeps checking
+    whether the result is still wanted, and kills bat as soon as it isn't.
+    """
+
+    MAX_PROCESSES = 2
+    # how often, in seconds, a waiting run checks whether it was cancelled
+    POLL_INTERVAL = 0.02
+
+    def __init__(
+        self, executable: str, show_line_numbers: bool, timeout: float
+    ) -> None:
+        """Initialise the runner.
+
+        Args:
+            executable: The bat executable.
+            show_line_numbers: Whether bat shows line numbers.
+            timeout: How long, in seconds, bat may take before it is killed.
+        """
+        self.executable = executable
+        self.show_line_numbers = show_line_numbers
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(self.MAX_PROCESSES)
+
+    def command(
+        self,
+        file_path: str,
+        highlight_line: int | None = None,
+        line_range: tuple[int, int] | None = None,
+    ) -> list[str]:
+        """Get the command that renders a file.
+
+        Args:
+            file_path: The file.
+            highlight_line: The 1-based line to highlight, if any.
+            line_range: The 1-based first and last line to render, if not all.
+
+        Returns:
+            list[str]: The command.
+        """
+        command = [
+            self.executable,
+            "--force-colorization",
+            "--paging=never",
+            "--style=numbers" if self.show_line_numbers else "--style=plain",
+        ]
+        if highlight_line is not None:
+            command.append(f"--highlight-line={highlight_line}")
+        if line_range is not None:
+            command.append(f"--line-range={line_range[0]}:{line_range[1]}")
+        command.append(file_path)
+        return command
+
+    def run(
+        self, command: list[str], is_cancelled: Callable[[], bool] = lambda: False
+    ) -> tuple[int, bytes, bytes] | None:
+        """Run bat, once a slot is free. Starting it may raise `OSError`.
+
+        Args:
+            command: The command, from `command`.
+            is_cancelled: Checked while waiting, to give up and kill bat.
+
+        Returns:
+            tuple[int, bytes, bytes] | None: The return code, output and error
+                output, or None if it was cancelled.
+
+        Raises:
+            TimeoutError: If bat took longer than the timeout, and was killed.
+        """
+        while not self._slots.acquire(timeout=self.POLL_INTERVAL):
+            if is_cancelled():
+                return None
+        try:
+            deadline = time.monotonic() + self.timeout
+            with subprocess.Popen(
+                command, stdout=subprocess.PIPE, stderr=subprocess.PIPE
+            ) as process:
+                while True:
+                    try:
+                        stdout, stderr = process.communicate(timeout=self.POLL_INTERVAL)
+                        return process.returncode, stdout, stderr
+                    except subprocess.TimeoutExpired:
+                        if is_cancelled():
+                            process.kill()
+                            return None
+                        if time.monotonic() > deadline:
+                            process.kill()
+                            raise TimeoutError(
+                                f"bat took longer than {self.timeout}s, so it was stopped"
+                            ) from None
+        finally:
+            self._slots.release()
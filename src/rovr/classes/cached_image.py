@@ -0,0 +1,220 @@
+from typing import Hashable
+
+import textual_image.widget as timg
+from rich.console import Console, ConsoleOptions, RenderResult
+from textual.app import ComposeResult
+from textual.app import RenderResult as WidgetRenderResult
+from textual.geometry import Region
+from textual.strip import Strip
+from textual.widget import Widget
+from textual_image._terminal import get_cell_size
+from textual_image.renderable import Image as AutoRenderable
+from textual_image.renderable.halfcell import Image as HalfcellRenderable
+from textual_image.renderable.sixel import Image as SixelRenderable
+from textual_image.renderable.tgp import Image as TGPRenderable
+from textual_image.renderable.tgp import _send_tgp_message
+from textual_image.renderable.unicode import Image as UnicodeRenderable
+from textual_image.widget.sixel import _CachedSixels, _ImageSixelImpl
+
+from .preview_cache import PreviewCache
+
+PAYLOAD_BUDGET = 32 * 1024 * 1024
+"""How much memory the encoded images may take up, in bytes."""
+TGP_CHUNK_SIZE = 4096
+"""How many bytes of an image are sent to the terminal in one message."""
+
+# the sixel widget only takes its cached sixels like this from textual-image
+# 0.14 on, so older versions draw sixels without the shared payloads
+_SIXEL_CACHE_KNOWN = "background" in _CachedSixels._fields and hasattr(
+    _ImageSixelImpl, "_get_background_rgba"
+)
+
+# shared by every image widget, so that a widget that is made again for an
+# image that was shown before still finds its payloads
+_payloads = PreviewCache(PAYLOAD_BUDGET)
+
+
+class _CachedSegments:
+    """Renderable mixin that keeps what it yields for an image at a size.
+
+    The halfcell and unicode renderables yield the same segments every time
+    for the same image, cell size and space, so they are only worked out once.
+    """
+
+    payload_key: Hashable | None = None
+
+    def __rich_console__(
+        self, console: Console, options: ConsoleOptions
+    ) -> RenderResult:
+        if self.payload_key is None:
+            yield from super().__rich_console__(console, options)
+            return
+        key = (
+            self.payload_key,
+            type(self).__name__,
+            options.max_width,
+            options.max_height,
+            get_cell_size(),
+        )
+        segments = _payloads.get(key)
+        if segments is None:
+            segments = list(super().__rich_console__(console, options))
+            _payloads.put(
+                key,
+                segments,
+                sum(len(segment.text) for segment in segments) + 64 * len(segments),
+            )
+        yield from segments
+
+
+class _HalfcellRenderable(_CachedSegments, HalfcellRenderable):
+    pass
+
+
+class _UnicodeRenderable(_CachedSegments, UnicodeRenderable):
+    pass
+
+
+class _TGPRenderable(TGPRenderable):
+    """TGP renderable that keeps the encoded image it sends to the terminal.
+
+    The terminal forgets the image whenever the widget is drawn again, so it
+    is always sent again, but it is only scaled and encoded once.
+    """
+
+    payload_key: Hashable | None = None
+
+    def _send_image_to_terminal(self, width: int, height: int) -> None:
+        if self.payload_key is None:
+            super()._send_image_to_terminal(width, height)
+            return
+        key = (self.payload_key, "tgp", width, height)
+        payload = _payloads.get(key)
+        if payload is None:
+            payload = self._image_data.scaled(width, height).to_base64()
+            _payloads.put(key, payload, len(payload))
+        self.terminal_image_id = next(TGPRenderable._image_id_counter)
+        for start in range(0, len(payload), TGP_CHUNK_SIZE):
+            _send_tgp_message(
+                i=self.terminal_image_id,
+                m=1 if start + TGP_CHUNK_SIZE < len(payload) else 0,
+                f=100,
+                payload=payload[start : start + TGP_CHUNK_SIZE],
+                q=2,
+            )
+
+
+class _PayloadKey:
+    """Widget mixin that hands its payload key to every renderable it makes."""
+
+    payload_key: Hashable | None = None
+    """What identifies the version of the image, or None to never cache it."""
+
+    def render(self) -> WidgetRenderResult:
+        renderable = super().render()
+        if isinstance(renderable, (_CachedSegments, _TGPRenderable)):
+            renderable.payload_key = self.payload_key
+        return renderable
+
+
+class CachedTGPImage(_PayloadKey, timg.TGPImage, Renderable=_TGPRenderable):
+    """An image shown through the terminal graphics protocol, encoded once."""
+
+
+class CachedHalfcellImage(
+    _PayloadKey, timg.HalfcellImage, Renderable=_HalfcellRenderable
+):
+    """An image drawn with coloured half cells, worked out once."""
+
+
+class CachedUnicodeImage(_PayloadKey, timg.UnicodeImage, Renderable=_UnicodeRenderable):
+    """An image drawn with unicode characters, worked out once."""
+
+
+class _SixelImpl(_ImageSixelImpl):
+    """Sixel drawing widget that looks in the shared payloads first.
+
+    The sixel widget only remembers the last sixels it drew, and forgets them
+    when it is given another image. A hit is handed to it as its last sixels,
+    so it draws them without decoding or encoding anything.
+    """
+
+    def render_lines(self, crop: Region) -> list[Strip]:
+        payload_key = getattr(self.parent, "payload_key", None)
+        if payload_key is None or not self.image:
+            return super().render_lines(crop)
+        details = (
+            crop,
+            self.content_size,
+            get_cell_size(),
+            self._sixel_options,
+            self._get_background_rgba(),
+        )
+        key = (payload_key, "sixel", *details)
+        sixel_data = _payloads.get(key)
+        if sixel_data is not None:
+            self._cached_sixels = _CachedSixels(self.image, *details, sixel_data)
+        lines = super().render_lines(crop)
+        if (
+            sixel_data is None
+            and self._cached_sixels is not None
+            and self._cached_sixels.is_hit(self.image, *details)
+        ):
+            _payloads.put(
+                key, self._cached_sixels.sixel_data, len(self._cached_sixels.sixel_data)
+            )
+        return lines
+
+
+class CachedSixelImage(timg.SixelImage, Renderable=timg.SixelImage._Renderable):
+    """An image shown as sixels, encoded once for every crop of it."""
+
+    payload_key: Hashable | None = None
+    """What identifies the version of the image, or None to never cache it."""
+
+    def compose(self) -> ComposeResult:
+        if not _SIXEL_CACHE_KNOWN:
+            yield from super().compose()
+            return
+        yield _SixelImpl(self.image, self._sixel_options)
+
+
+# pick the same way as textual-image, which draws sixels through a widget
+if AutoRenderable is SixelRenderable:
+    CachedImage = CachedSixelImage
+elif AutoRenderable is TGPRenderable:
+    CachedImage = CachedTGPImage
+elif AutoRenderable is HalfcellRenderable:
+    CachedImage = CachedHalfcellImage
+else:
+    CachedImage = CachedUnicodeImage
+
+CACHED_IMAGES: dict[str, type[Widget]] = {
+    "Auto": CachedImage,
+    # what the config turns "Auto" into
+    "": CachedImage,
+    "TGP": CachedTGPImage,
+    "Sixel": CachedSixelImage,
+    "Halfcell": CachedHalfcellImage,
+    "Unicode": CachedUnicodeImage,
+}
+"""The image widget to use for each `settings.image_protocol`."""
+
+
+def cell_pixels(image_protocol: str) -> tuple[int, int]:
+    """Get how many pixels of an image a terminal cell shows.
+
+    Args:
+        image_protocol (str): The `settings.image_protocol`.
+
+    Returns:
+        tuple[int, int]: The width and height of a cell, in pixels of the image.
+    """
+    widget = CACHED_IMAGES.get(image_protocol, CachedImage)
+    if widget is CachedHalfcellImage:
+        return 1, 2
+    if widget is CachedUnicodeImage:
+        return 1, 1
+    # asked of the terminal once, and remembered
+    cell_size = get_cell_size()
+    return cell_size.width, cell_size.height
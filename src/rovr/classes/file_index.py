@@ -0,0 +1,359 @@
+import heapq
+import sqlite3
+import threading
+import time
+from os import path
+from typing import Callable, Iterable
+
+from rovr.classes.fuzzy_filter import fuzzy_score
+from rovr.functions.path import normalise
+from rovr.functions.walker import walk_parallel
+
+SCHEMA_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    name TEXT NOT NULL COLLATE NOCASE,
+    is_dir INTEGER NOT NULL,
+    generation INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS files_name ON files(name);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+TRIGRAM_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS files_trigram USING fts5(
+    name, content='files', content_rowid='id', tokenize='trigram'
+);
+CREATE TRIGGER IF NOT EXISTS files_insert AFTER INSERT ON files BEGIN
+    INSERT INTO files_trigram(rowid, name) VALUES (new.id, new.name);
+END;
+CREATE TRIGGER IF NOT EXISTS files_delete AFTER DELETE ON files BEGIN
+    INSERT INTO files_trigram(files_trigram, rowid, name)
+    VALUES ('delete', old.id, old.name);
+END;
+"""
+
+
+class FileIndex:
+    """Persistent index of the file and folder names under a set of roots.
+
+    The index lives in a SQLite database. Names are looked up through an FTS5
+    trigram table when the SQLite build supports it, and a case-insensitive
+    index on the name otherwise, so a lookup never has to walk the disk.
+    """
+
+    BATCH_SIZE: int = 500
+    """How many rows are written per transaction while reindexing."""
+
+    def __init__(self, database_path: str, roots: Iterable[str]) -> None:
+        """Open (or create) the index.
+
+        Args:
+            database_path: Where the SQLite database is stored.
+            roots: The folders to index. Folders inside another root are dropped.
+        """
+        self.roots: list[str] = []
+        for root in sorted(
+            {normalise(path.expanduser(root)) for root in roots}, key=len
+        ):
+            if not self.is_indexed(root):
+                self.roots.append(root)
+        self.reindexing = False
+        self._busy_until = 0.0
+        # one connection, shared between the ui and the reindex worker
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(
+            database_path, check_same_thread=False, isolation_level=None
+        )
+        with self._lock:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("PRAGMA synchronous=NORMAL")
+            if (
+                self._connection.execute("PRAGMA user_version").fetchone()[0]
+                != SCHEMA_VERSION
+            ):
+                self._connection.executescript(
+                    "DROP TABLE IF EXISTS files_trigram;"
+                    "DROP TABLE IF EXISTS files;"
+                    "DROP TABLE IF EXISTS meta;"
+                    f"PRAGMA user_version={SCHEMA_VERSION};"
+                )
+            self._connection.executescript(SCHEMA)
+            try:
+                self._connection.executescript(TRIGRAM_SCHEMA)
+                self.has_trigram = True
+            except sqlite3.OperationalError:
+                # no fts5, or a sqlite older than 3.34 without the trigram tokenizer
+                self.has_trigram = False
+
+    def is_indexed(self, location: str) -> bool:
+        """Check whether a path is inside one of the roots.
+
+        Args:
+            location: The normalised absolute path.
+
+        Returns:
+            bool: Whether it belongs in the index.
+        """
+        return any(
+            location == root or location.startswith(root.rstrip("/") + "/")
+            for root in self.roots
+        )
+
+    def _get_meta(self, key: str, default: str) -> str:
+        row = self._connection.execute(
+            "SELECT value FROM meta WHERE key = ?", (key,)
+        ).fetchone()
+        return default if row is None else row[0]
+
+    def _set_meta(self, key: str, value: str) -> None:
+        self._connection.execute(
+            "INSERT INTO meta(key, value) VALUES (?, ?)"
+            " ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+            (key, value),
+        )
+
+    def _write(self, rows: list[tuple[str, bool]], generation: int) -> None:
+        with self._lock:
+            self._connection.execute("BEGIN")
+            try:
+                self._connection.executemany(
+                    "INSERT INTO files(path, name, is_dir, generation)"
+                    " VALUES (?, ?, ?, ?)"
+                    " ON CONFLICT(path) DO UPDATE SET"
+                    " is_dir = excluded.is_dir, generation = excluded.generation",
+                    [
+                        (location, path.basename(location), is_dir, generation)
+                        for location, is_dir in rows
+                    ],
+                )
+                self._connection.execute("COMMIT")
+            except BaseException:
+                # or the connection is left inside the transaction, and every
+                # later write fails on its BEGIN
+                self._connection.execute("ROLLBACK")
+                raise
+
+    def _delete_tree(self, location: str, before_generation: int | None = None) -> None:
+        # everything under `location/` sorts between `location/` and `location0`
+        prefix = location.rstrip("/")
+        query = "DELETE FROM files WHERE (path = ? OR (path >= ? AND path < ?))"
+        params: list = [location, prefix + "/", prefix + "0"]
+        if before_generation is not None:
+            query += " AND generation < ?"
+            params.append(before_generation)
+        with self._lock:
+            self._connection.execute(query, params)
+
+    def defer(self) -> None:
+        """Pause reindexing for a moment, because the user is doing something"""
+        self._busy_until = time.monotonic() + 0.5
+
+    def _wait_until_idle(self, is_cancelled: Callable[[], bool]) -> None:
+        while time.monotonic() < self._busy_until and not is_cancelled():
+            time.sleep(0.1)
+
+    def _index_tree(
+        self,
+        root: str,
+        generation: int,
+        ignore: list[str],
+        is_cancelled: Callable[[], bool],
+        max_workers: int,
+    ) -> None:
+        rows: list[tuple[str, bool]] = [(root, path.isdir(root))]
+        for batch in walk_parallel(
+            root, ignore, max_workers=max_workers, is_cancelled=is_cancelled
+        ):
+            if is_cancelled():
+                # the walk may hand over a few more folders before it stops
+                return
+            rows.extend(
+                (normalise(path.join(root, item)), item.endswith("/")) for item in batch
+            )
+            if len(rows) >= self.BATCH_SIZE:
+                self._wait_until_idle(is_cancelled)
+                self._write(rows, generation)
+                rows = []
+        if rows and not is_cancelled():
+            self._write(rows, generation)
+
+    def needs_reindex(self, max_age: float) -> bool:
+        """Check whether the last full reindex is too old, or never finished.
+
+        Args:
+            max_age: The maximum age of the index, in seconds.
+
+        Returns:
+            bool: Whether a full reindex should run.
+        """
+        with self._lock:
+            indexed_roots = self._get_meta("roots", "")
+            last_reindex = float(self._get_meta("last_reindex", "0"))
+        return (
+            indexed_roots != "\n".join(self.roots)
+            or time.time() - last_reindex > max_age
+        )
+
+    def reindex(
+        self,
+        ignore: list[str],
+        is_cancelled: Callable[[], bool] = lambda: False,
+        max_workers: int = 2,
+    ) -> None:
+        """Walk every root again, and drop whatever was not found.
+
+        Writes are made in small transactions, and wait while `defer` was
+        called recently, so that lookups and the ui stay responsive.
+
+        Args:
+            ignore: Glob patterns of names to skip entirely.
+            is_cancelled: Checked between batches, to stop early.
+            max_workers: How many directories are listed at the same time.
+        """
+        self.reindexing = True
+        try:
+            with self._lock:
+                generation = int(self._get_meta("generation", "0")) + 1
+                self._set_meta("generation", str(generation))
+            for root in self.roots:
+                self._index_tree(root, generation, ignore, is_cancelled, max_workers)
+                if is_cancelled():
+                    return
+                self._delete_tree(root, before_generation=generation)
+            with self._lock:
+                # roots that are no longer configured
+                self._connection.execute(
+                    "DELETE FROM files WHERE generation < ?", (generation,)
+                )
+                self._set_meta("roots", "\n".join(self.roots))
+                self._set_meta("last_reindex", str(time.time()))
+        finally:
+            self.reindexing = False
+
+    def refresh(self, locations: Iterable[str], ignore: list[str]) -> None:
+        """Update the index for paths that were created, changed or removed.
+
+        Args:
+            locations: Absolute paths. Folders are indexed recursively.
+            ignore: Glob patterns of names to skip entirely.
+        """
+        with self._lock:
+            generation = int(self._get_meta("generation", "0"))
+        for location in locations:
+            location = normalise(location)
+            if not self.is_indexed(location):
+                continue
+            self._delete_tree(location)
+            if path.lexists(location):
+                self._index_tree(location, generation, ignore, lambda: False, 2)
+
+    def search(self, query: str, limit: int) -> list[str]:
+        """Find the indexed paths whose name contains every word of a query.
+
+        Words of three or more characters match anywhere in the name, and
+        shorter words match the start of the name. The candidates are read
+        shortest path first, a batch at a time, and scored into a heap of the
+        best ones. A longer path can only score less, so the reading stops
+        once no path that is left could make it into the heap.
+
+        Args:
+            query: The words to look for.
+            limit: The maximum number of paths to return.
+
+        Returns:
+            list[str]: The best matching paths, best first. Folders end with a `/`.
+        """
+        terms = query.casefold().split()
+        if not terms:
+            return []
+        clauses, params = [], []
+        for term in terms:
+            if len(term) >= 3 and self.has_trigram:
+                clauses.append(
+                    "id IN (SELECT rowid FROM files_trigram WHERE files_trigram MATCH ?)"
+                )
+                params.append('"' + term.replace('"', '""') + '"')
+            else:
+                escaped = (
+                    term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+                )
+                clauses.append("name LIKE ? ESCAPE '\\'")
+                params.append(f"{escaped}%" if len(term) < 3 else f"%{escaped}%")
+        if limit <= 0:
+            return []
+        # the most a term can add to the score of a path, before its length
+        # is taken off, from how `fuzzy_score` scores a match
+        best_bonus = sum(max(220 + 4 * len(term), 22 * len(term)) for term in terms)
+        # (score, how early it was read, path), the worst first
+        best: list[tuple[int, int, str]] = []
+        last = (-1, -1)
+        read = 0
+        while True:
+            with self._lock:
+                rows = self._connection.execute(
+                    "SELECT length(path), id, path, is_dir FROM files"
+                    f" WHERE {' AND '.join(clauses)} AND (length(path), id) > (?, ?)"
+                    " ORDER BY length(path), id LIMIT ?",
+                    [*params, *last, self.BATCH_SIZE],
+                ).fetchall()
+            for length, _, location, is_dir in rows:
+                if len(best) == limit and best_bonus - len(terms) * length < best[0][0]:
+                    # every path from here on is at least this long
+                    return [result for _, _, result in sorted(best, reverse=True)]
+                result = location + "/" if is_dir else location
+                key = result.casefold()
+                read -= 1
+                entry = (sum(fuzzy_score(term, key) for term in terms), read, result)
+                if len(best) < limit:
+                    heapq.heappush(best, entry)
+                else:
+                    heapq.heappushpop(best, entry)
+            if len(rows) < self.BATCH_SIZE:
+                return [result for _, _, result in sorted(best, reverse=True)]
+            last = rows[-1][:2]
+
+    def filter(
+        self,
+        keep: Callable[[str], bool],
+        limit: int,
+        is_cancelled: Callable[[], bool] = lambda: False,
+    ) -> list[str]:
+        """Find the indexed paths that pass a check, for a query without words.
+
+        The paths are read a batch at a time, so lookups and the reindex
+        worker can use the index in between.
+
+        Args:
+            keep: Checks a path, folders ending with a `/`.
+            limit: The maximum number of paths to return.
+            is_cancelled: Checked between batches, to stop early.
+
+        Returns:
+            list[str]: The first paths that passed, in the order they were
+                indexed. Folders end with a `/`.
+        """
+        results: list[str] = []
+        last_id = -1
+        while len(results) < limit and not is_cancelled():
+            with self._lock:
+                rows = self._connection.execute(
+                    "SELECT id, path, is_dir FROM files WHERE id > ? ORDER BY id LIMIT ?",
+                    (last_id, self.BATCH_SIZE),
+                ).fetchall()
+            if not rows:
+                break
+            last_id = rows[-1][0]
+            for _, location, is_dir in rows:
+                result = location + "/" if is_dir else location
+                if keep(result):
+                    results.append(result)
+                    if len(results) >= limit:
+                        break
+        return results
@@ -0,0 +1,234 @@
+import heapq
+from typing import Callable, Iterable, Sequence
+
+WORD_SEPARATORS = frozenset("/\\_-. ")
+
+
+class FuzzyFilter:
+    """Fuzzy filter over a growing list of labels.
+
+    The labels are case-folded once, when they are added. When a query
+    extends the previously applied query, only the previous matches (and any
+    labels added since) are checked again, because anything that did not
+    match before cannot match a longer query either.
+    """
+
+    def __init__(self, labels: Iterable[str | None]) -> None:
+        """Initialise the filter.
+
+        Args:
+            labels: The labels to filter. `None` is always kept (for headers,
+                and other disabled options).
+        """
+        self.keys: list[str | None] = [
+            None if label is None else label.casefold() for label in labels
+        ]
+        # (query, matches, how many labels it was checked against), kept as
+        # one tuple so that a filter running in a thread never sees half of it
+        self.applied: tuple[str, Sequence[int], int] = ("", [], 0)
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def extend(self, labels: Iterable[str | None]) -> None:
+        """Add more labels to the end of the filter.
+
+        Args:
+            labels: The labels to add.
+        """
+        self.keys.extend(
+            None if label is None else label.casefold() for label in labels
+        )
+
+    def filter(
+        self,
+        query: str,
+        is_cancelled: Callable[[], bool] = lambda: False,
+        batch_size: int = 2000,
+        stop: int | None = None,
+    ) -> list[int] | None:
+        """Get the indexes of the labels that match a query.
+
+        This does not remember the query, call `remember` with the result
+        once it is actually used.
+
+        Args:
+            query: The fuzzy query.
+            is_cancelled: Checked between batches, to give up on a stale query.
+            batch_size: How many labels to check between cancellation checks.
+            stop: Only check labels before this index, defaults to all of them.
+
+        Returns:
+            The matching indexes in their original order, or None if cancelled.
+        """
+        query = query.casefold()
+        if stop is None:
+            stop = len(self.keys)
+        previous_query, previous_matches, checked = self.applied
+        if previous_query and query.startswith(previous_query):
+            candidates = previous_matches
+            if checked < stop:
+                candidates = [*candidates, *range(checked, stop)]
+        else:
+            candidates = range(stop)
+        keys = self.keys
+        matches = []
+        for start in range(0, len(candidates), batch_size):
+            if is_cancelled():
+                return None
+            for index in candidates[start : start + batch_size]:
+                key = keys[index]
+                if key is None or is_subsequence(query, key):
+                    matches.append(index)
+        return matches
+
+    def remember(
+        self, query: str, matches: Sequence[int], checked: int | None = None
+    ) -> None:
+        """Remember an applied query, so that the next one can narrow from it.
+
+        Args:
+            query: The query that was applied.
+            matches: The indexes that matched it.
+            checked: How many labels the query was checked against, if it was
+                given a `stop` while labels were still being added.
+        """
+        self.applied = (
+            query.casefold(),
+            matches,
+            len(self.keys) if checked is None else checked,
+        )
+
+    def reset(self) -> None:
+        """Forget the last query."""
+        self.applied = ("", [], 0)
+
+
+def is_subsequence(query: str, key: str) -> bool:
+    """Check whether every character of the query appears in order in the key.
+
+    Args:
+        query: The case-folded query.
+        key: The case-folded label.
+
+    Returns:
+        bool: Whether the key matches.
+    """
+    position = 0
+    find = key.find
+    for character in query:
+        position = find(character, position) + 1
+        if not position:
+            return False
+    return True
+
+
+def fuzzy_score(query: str, key: str) -> int:
+    """Score how well a path matches a query, higher is better.
+
+    Matches inside the last path component, at the start of a word and in
+    consecutive runs are preferred, and shorter paths win ties.
+
+    Args:
+        query: The case-folded query.
+        key: The case-folded path, which must already match the query.
+
+    Returns:
+        int: The score.
+    """
+    basename_start = key.rstrip("/").rfind("/") + 1
+    score = -len(key)
+    substring = key.rfind(query)
+    if substring != -1:
+        score += 100 + 4 * len(query)
+        if substring >= basename_start:
+            score += 100
+        if substring == 0 or key[substring - 1] in WORD_SEPARATORS:
+            score += 20
+        return score
+    position = 0
+    previous = -2
+    find = key.find
+    for character in query:
+        position = find(character, position)
+        if position == previous + 1:
+            score += 8
+        if position == 0 or key[position - 1] in WORD_SEPARATORS:
+            score += 10
+        if position >= basename_start:
+            score += 4
+        previous = position
+        position += 1
+    return score
+
+
+def match_positions(query: str, key: str) -> list[int]:
+    """Find the characters of a key that a query matched, the same way
+    `fuzzy_score` does.
+
+    Args:
+        query: The case-folded query.
+        key: The case-folded label, which must already match the query.
+
+    Returns:
+        list[int]: The index of every matched character, in order.
+    """
+    substring = key.rfind(query)
+    if substring != -1:
+        return list(range(substring, substring + len(query)))
+    positions = []
+    position = 0
+    find = key.find
+    for character in query:
+        position = find(character, position)
+        positions.append(position)
+        position += 1
+    return positions
+
+
+class RankedMatches:
+    """The matches of a query, handed out best first, a page at a time.
+
+    Every match is scored once, and kept in a heap, so only the pages that
+    are actually shown ever get sorted. Ties keep their original order, and
+    labels without a key (headers) come first.
+    """
+
+    def __init__(
+        self, query: str, keys: Sequence[str | None], matches: Iterable[int]
+    ) -> None:
+        """Score the matches.
+
+        Args:
+            query: The query that was matched.
+            keys: The case-folded labels, from `FuzzyFilter.keys`.
+            matches: The indexes of the labels that matched.
+        """
+        query = query.casefold()
+        self._heap: list[tuple[float, int]] = [
+            (
+                float("-inf")
+                if keys[index] is None
+                else -fuzzy_score(query, keys[index]),
+                index,
+            )
+            for index in matches
+        ]
+        heapq.heapify(self._heap)
+        self.total = len(self._heap)
+
+    def __len__(self) -> int:
+        # how many matches were not taken yet
+        return len(self._heap)
+
+    def take(self, count: int) -> list[int]:
+        """Take the next best matches.
+
+        Args:
+            count: How many matches to take.
+
+        Returns:
+            list[int]: Up to `count` indexes, best first.
+        """
+        heap = self._heap
+        return [heapq.heappop(heap)[1] for _ in range(min(count, len(heap)))]
@@ -0,0 +1,156 @@
+import mmap
+import os
+import threading
+from array import array
+from bisect import bisect_left
+from typing import Callable
+
+from rovr.functions.grep import count_lines
+
+BLOCK_SIZE = 64 * 1024
+"""How many bytes each entry of the line index covers."""
+LINE_LIMIT = 4096
+"""How many bytes of a line are decoded, the rest is never shown."""
+INDEX_STEP = 16 * BLOCK_SIZE
+"""How many bytes `index_more` counts the lines of at a time."""
+
+
+class MappedDocument:
+    """A read-only text file that is read a few lines at a time.
+
+    Instead of an offset for every line, the index holds how many lines start
+    before every `BLOCK_SIZE` bytes, counted through mmap. A line is found by
+    looking up its block and counting line breaks inside it, so the index
+    stays tiny however large the file is. Lines are read from disk when they
+    are asked for, without keeping the file open, so it can still be renamed
+    or deleted while it is shown.
+
+    The index is built a step at a time, so the start of the file can be
+    shown while the rest is still counted. Until it is `complete`, the lines
+    after the last counted block aren't known yet.
+    """
+
+    def __init__(self, file_path: str, encoding: str = "utf-8") -> None:
+        """Open a document. Call `index_more` before reading lines.
+
+        Args:
+            file_path: The file.
+            encoding: Its encoding, with a single byte line break.
+        """
+        self.file_path = file_path
+        self.encoding = encoding
+        self.size = 0
+        self.mtime_ns = 0
+        self.line_count = 1
+        # whether every block of the file was counted
+        self.complete = False
+        # line breaks before the start of each block
+        self._breaks_before = array("Q", [0])
+        self._indexed_size = 0
+        self._lock = threading.Lock()
+
+    def index_more(
+        self, is_cancelled: Callable[[], bool] = lambda: False, limit: int = INDEX_STEP
+    ) -> bool:
+        """Count the lines of the next blocks of the file. A file that can't be
+        read raises `OSError`.
+
+        Args:
+            is_cancelled: Checked between blocks, to stop early.
+            limit: How many bytes to count the lines of, at most.
+
+        Returns:
+            bool: Whether the whole file is indexed now.
+
+        Raises:
+            OSError: If the file changed since the first step.
+        """
+        with self._lock:
+            if self.complete:
+                return True
+            with open(self.file_path, "rb") as file:
+                file_stat = os.fstat(file.fileno())
+                if not self._indexed_size:
+                    self.size = file_stat.st_size
+                    self.mtime_ns = file_stat.st_mtime_ns
+                elif (file_stat.st_size, file_stat.st_mtime_ns) != (
+                    self.size,
+                    self.mtime_ns,
+                ):
+                    raise OSError(f"{self.file_path} changed while it was indexed")
+                size = self.size
+                if size == 0:
+                    self.line_count, self.complete = 1, True
+                    return True
+                stop = min(size, self._indexed_size + limit)
+                with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                    breaks = self._breaks_before[-1]
+                    for start in range(self._indexed_size, stop, BLOCK_SIZE):
+                        if is_cancelled():
+                            break
+                        breaks += count_lines(
+                            buffer, start, min(start + BLOCK_SIZE, size)
+                        )
+                        self._breaks_before.append(breaks)
+                        self._indexed_size = min(start + BLOCK_SIZE, size)
+                    ends_with_break = buffer[size - 1] == ord("\n")
+            if self._indexed_size < size:
+                # the line that the counted blocks end in is shown as it is
+                self.line_count = breaks + 1
+                return False
+            # a last line without a line break still counts
+            self.line_count = breaks if ends_with_break else breaks + 1
+            self.complete = True
+            return True
+
+    @property
+    def index_size(self) -> int:
+        """Roughly how much memory the index takes up, once it is complete."""
+        return (self.size // BLOCK_SIZE + 2) * self._breaks_before.itemsize
+
+    def get_lines(self, first_line: int, count: int) -> list[str]:
+        """Read some lines.
+
+        Args:
+            first_line: The 0-based line to start at.
+            count: How many lines to read, fewer are returned at the end.
+
+        Returns:
+            list[str]: The lines, without line breaks, and cut off after
+                `LINE_LIMIT` bytes.
+        """
+        count = min(count, self.line_count - first_line)
+        if count <= 0 or self.size == 0:
+            return [""] if first_line == 0 and count > 0 else []
+        # the block that the line break ending the line before is in
+        block = max(0, bisect_left(self._breaks_before, first_line) - 1)
+        lines = []
+        try:
+            with open(self.file_path, "rb") as file:
+                file.seek(block * BLOCK_SIZE)
+                data = file.read(BLOCK_SIZE)
+                position = 0
+                # skip to the start of the first line
+                for _ in range(first_line - self._breaks_before[block]):
+                    position = data.index(b"\n", position) + 1
+                while len(lines) < count:
+                    end = data.find(b"\n", position)
+                    stop = len(data) if end == -1 else end
+                    line = data[position : min(stop, position + LINE_LIMIT)]
+                    while end == -1:
+                        # the line goes on past what was read, but only the
+                        # start of it is kept
+                        data = file.read(BLOCK_SIZE)
+                        if not data:
+                            break
+                        end = data.find(b"\n")
+                        stop = len(data) if end == -1 else end
+                        line += data[: max(0, min(stop, LINE_LIMIT - len(line)))]
+                    lines.append(
+                        line.decode(self.encoding, errors="replace").rstrip("\r")
+                    )
+                    position = end + 1
+        except (OSError, ValueError):
+            # the file changed or went away since it was indexed
+            pass
+        return lines
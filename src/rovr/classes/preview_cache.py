@@ -0,0 +1,115 @@
+import os
+import sys
+import threading
+from collections import OrderedDict
+from typing import Hashable
+
+from PIL import Image
+from rich.text import Text
+
+
+def estimate_size(value: object) -> int:
+    """Roughly estimate how much memory a preview result takes up.
+
+    Args:
+        value: A string, a list of strings, a rich `Text` or a Pillow image,
+            or a tuple of those.
+
+    Returns:
+        int: The estimated size, in bytes.
+    """
+    if isinstance(value, Image.Image):
+        return value.width * value.height * len(value.getbands())
+    if isinstance(value, Text):
+        return sys.getsizeof(value.plain) + 64 * len(value.spans)
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(estimate_size(item) for item in value)
+    return sys.getsizeof(value)
+
+
+class PreviewCache:
+    """LRU cache of preview results, with a total memory budget.
+
+    Keys start with the path, modification time and size of the file, so a
+    file that changed is never served from the cache, followed by whatever
+    else the result depends on, like the size of the preview and its mode.
+    The cache is shared between the ui and preview workers.
+    """
+
+    def __init__(self, budget: int) -> None:
+        """Initialise the cache.
+
+        Args:
+            budget: The most memory that the results may take up, in bytes.
+        """
+        self.budget = budget
+        self.used = 0
+        self._entries: OrderedDict[Hashable, tuple[object, int]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(file_path: str, *details: Hashable) -> tuple | None:
+        """Make the key of a preview result of the current version of a file.
+
+        Args:
+            file_path: The file.
+            *details: Anything else the result depends on.
+
+        Returns:
+            tuple | None: The key, or None if the file can't be stat'ed, which
+                `get` and `put` treat as never cached.
+        """
+        try:
+            file_stat = os.stat(file_path)
+        except OSError:
+            return None
+        return (file_path, file_stat.st_mtime_ns, file_stat.st_size, *details)
+
+    def get(self, key: Hashable | None) -> object:
+        """Get a result, marking it as recently used.
+
+        Args:
+            key: The key of the result.
+
+        Returns:
+            The result, or None if it isn't cached.
+        """
+        if key is None:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def put(self, key: Hashable | None, value: object, size: int | None = None) -> None:
+        """Cache a result, evicting the least recently used ones to fit it.
+
+        Results larger than the whole budget are not cached.
+
+        Args:
+            key: The key of the result.
+            value: The result.
+            size: Its size in bytes, estimated if not given.
+        """
+        if key is None:
+            return
+        if size is None:
+            size = estimate_size(value)
+        if size > self.budget:
+            return
+        with self._lock:
+            if (previous := self._entries.pop(key, None)) is not None:
+                self.used -= previous[1]
+            self._entries[key] = (value, size)
+            self.used += size
+            while self.used > self.budget:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.used -= evicted_size
+
+    def clear(self) -> None:
+        """Drop every result."""
+        with self._lock:
+            self._entries.clear()
+            self.used = 0
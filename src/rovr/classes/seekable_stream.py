@@ -0,0 +1,586 @@
+import io
+import lzma
+import os
+import threading
+import zlib
+from bisect import bisect_right
+from collections import OrderedDict
+from typing import NamedTuple
+
+GZIP_MAGIC = b"\x1f\x8b"
+XZ_MAGIC = b"\xfd7zXZ\x00"
+CHUNK_SIZE = 64 * 1024
+"""How many compressed bytes are read, and uncompressed bytes made, at a time."""
+CHECKPOINT_SPACING = 4 * 1024 * 1024
+"""How many uncompressed bytes apart the first checkpoints of a gzip file are."""
+MAX_CHECKPOINTS = 128
+"""How many checkpoints a gzip file may have, every other one is dropped past it."""
+MAX_FILES = 4
+"""How many files the checkpoints are kept of, the least recently opened are dropped."""
+WINDOW_SIZE = 32 * 1024
+"""How far back deflate may refer, so how much output a restart point keeps."""
+RESTART_SEARCH = 256 * 1024
+"""How many compressed bytes are searched for the start of a deflate block."""
+RESTART_VERIFY = 1024
+"""How many compressed bytes decoded from a restart point have to match."""
+RESTART_STEP = 16
+"""How many compressed bytes are given at a time while searching for a block."""
+
+
+class Checkpoint(NamedTuple):
+    """A point of a compressed file that decompressing can start again from."""
+
+    # how many uncompressed bytes come before it
+    position: int
+    # how many compressed bytes come before it
+    compressed_position: int
+    # compressed bytes that were read, but not yet given to the decompressor
+    tail: bytes
+    # the state of the decompressor there, or None to start a new one
+    decompressor: "zlib._Decompress | None"
+    # for gzip, the bit of the compressed byte that a deflate block starts
+    # at, or None if it is read from the start of a gzip member
+    shift: int | None = None
+    # for gzip, the output before a deflate block, for a new decompressor
+    # to start at it with. Unlike a decompressor, it can be saved
+    window: bytes = b""
+
+
+class _Checkpoints:
+    """The checkpoints of one version of a file, shared by every stream of it."""
+
+    def __init__(self, spacing: int) -> None:
+        self.spacing = spacing
+        self.points: list[Checkpoint] = []
+        self.positions: list[int] = []
+        # the total uncompressed size, once it is known
+        self.size: int | None = None
+        # for xz, where the blocks end and the index begins
+        self.end: int | None = None
+        self.lock = threading.Lock()
+
+    def add(self, checkpoint: Checkpoint) -> None:
+        with self.lock:
+            index = bisect_right(self.positions, checkpoint.position)
+            if index and self.positions[index - 1] == checkpoint.position:
+                return
+            self.points.insert(index, checkpoint)
+            self.positions.insert(index, checkpoint.position)
+            if len(self.points) > MAX_CHECKPOINTS:
+                # thin them out, rather than stop adding any
+                self.points = self.points[::2]
+                self.positions = self.positions[::2]
+                self.spacing *= 2
+
+    def before(self, position: int) -> Checkpoint | None:
+        with self.lock:
+            index = bisect_right(self.positions, position)
+            return self.points[index - 1] if index else None
+
+    def saveable(self) -> list[Checkpoint]:
+        with self.lock:
+            return [point for point in self.points if point.decompressor is None]
+
+
+_registry: OrderedDict[tuple, _Checkpoints] = OrderedDict()
+_registry_lock = threading.Lock()
+
+
+def _read_varint(data: bytes, offset: int) -> tuple[int, int]:
+    value, shift = 0, 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return value, offset
+        shift += 7
+
+
+def _xz_blocks(file: io.BufferedReader, size: int) -> _Checkpoints | None:
+    """Read where the blocks of a single stream xz file start, from its index.
+
+    Returns:
+        _Checkpoints | None: A checkpoint at the start of every block, or None
+            if the file isn't a single xz stream whose index can be read.
+    """
+    if size < 24:
+        return None
+    file.seek(size - 12)
+    footer = file.read(12)
+    if footer[10:] != b"YZ":
+        # stream padding or a broken file, so fall back to reading it through
+        return None
+    index_size = (int.from_bytes(footer[4:8], "little") + 1) * 4
+    index_start = size - 12 - index_size
+    if index_start < 12:
+        return None
+    file.seek(index_start)
+    index = file.read(index_size)
+    try:
+        if index[0] != 0:
+            return None
+        count, offset = _read_varint(index, 1)
+        checkpoints = _Checkpoints(0)
+        compressed_position, position = 12, 0
+        for _ in range(count):
+            unpadded_size, offset = _read_varint(index, offset)
+            uncompressed_size, offset = _read_varint(index, offset)
+            checkpoints.add(Checkpoint(position, compressed_position, b"", None))
+            compressed_position += (unpadded_size + 3) // 4 * 4
+            position += uncompressed_size
+    except IndexError:
+        return None
+    if compressed_position != index_start:
+        # more than one stream, which this index doesn't cover
+        return None
+    checkpoints.size = position
+    checkpoints.end = index_start
+    return checkpoints
+
+
+def _block_prefix(byte: int, shift: int) -> bytes:
+    """Make what to give a raw deflate decompressor to start at a bit of a
+    byte, so that the bytes after it can be given as they are.
+
+    The bits before it are replaced with empty blocks, which are 10 bits
+    each, so only an even bit can be started at.
+
+    Returns:
+        bytes: The empty blocks and the rest of the byte.
+    """
+    blocks = shift // 2
+    empty = sum(2 << (10 * index) for index in range(blocks))
+    return (empty | (byte >> shift << shift) << (8 * blocks)).to_bytes(
+        blocks + 1, "little"
+    )
+
+
+def _is_block_header(data: bytes, index: int, shift: int) -> bool:
+    """Check whether a deflate block that isn't the last could start at a bit.
+
+    Only what is quick to check is checked, decoding from it checks the rest.
+
+    Returns:
+        bool: Whether it could.
+    """
+    bits = int.from_bytes(data[index : index + 12], "little") >> shift
+    if bits & 1:
+        return False
+    block_type = (bits >> 1) & 3
+    if block_type == 0:
+        # stored, its length and the complement of it come at the next byte
+        start = index + (shift + 10) // 8
+        length = data[start : start + 4]
+        return (
+            len(length) == 4
+            and length[0] ^ length[2] == 0xFF
+            and length[1] ^ length[3] == 0xFF
+        )
+    if block_type != 2 or (bits >> 3) & 31 > 29 or (bits >> 8) & 31 > 29:
+        return False
+    # the lengths of the code for the code lengths have to make a whole code
+    total = 0
+    for offset in range(17, 17 + 3 * (((bits >> 13) & 15) + 4), 3):
+        if length := (bits >> offset) & 7:
+            total += 128 >> length
+    return total == 128
+
+
+def _stored_headers(data: bytes) -> dict[int, list[int]]:
+    """Find the bytes that the header of a stored deflate block could be in.
+
+    Returns:
+        dict[int, list[int]]: The bytes before the length of a stored block
+            and the complement of it, and the bytes before those, by the
+            `RESTART_STEP` they are in.
+    """
+    value = int.from_bytes(data, "little")
+    # every byte against the one two bytes later
+    complements = (value ^ (value >> 16)).to_bytes(len(data), "little")
+    found: dict[int, list[int]] = {}
+    index = complements.find(b"\xff\xff")
+    while index != -1:
+        for byte in (index - 2, index - 1):
+            if byte >= 0:
+                found.setdefault(byte // RESTART_STEP, []).append(byte)
+        index = complements.find(b"\xff\xff", index + 1)
+    return found
+
+
+def _find_restart(
+    file: io.BufferedReader,
+    start: int,
+    decompressor: "zlib._Decompress",
+    history: bytes,
+    position: int,
+) -> Checkpoint | None:
+    """Find where the next deflate block of a gzip file starts, to save as a
+    point to start decompressing from, like zran does.
+
+    zlib doesn't tell where its blocks start, but gives no output while it
+    reads the header of one. So a copy of the decompressor is given a few
+    bytes at a time, and wherever the output stalls, or a stored block's
+    length is, every even bit that a header could start at is decoded from
+    with the output before it, until the output matches.
+
+    Args:
+        file: The gzip file.
+        start: The first compressed byte that the decompressor wasn't given.
+        decompressor: The decompressor, which is left as it is.
+        history: The last `WINDOW_SIZE` bytes of output, or all of it.
+        position: How many bytes of output there were.
+
+    Returns:
+        Checkpoint | None: The start of the block, or None if there was none
+            in the next `RESTART_SEARCH` bytes.
+    """
+    probe = decompressor.copy()
+    file.seek(start)
+    data = file.read(RESTART_SEARCH + RESTART_VERIFY)
+    stored = _stored_headers(data)
+    output = bytearray(history)
+    # how much output there was before each step, counted from the start of
+    # the history, and how much of that was let go of
+    produced = [len(history)]
+    dropped = 0
+
+    def stalls(step: int) -> bool:
+        # whether the output stops at a step, and not already before it
+        return produced[step + 1] == produced[step] and (
+            step == 0 or produced[step] != produced[step - 1]
+        )
+
+    for given in range(RESTART_STEP, len(data) + RESTART_STEP, RESTART_STEP):
+        try:
+            output += probe.decompress(data[given - RESTART_STEP : given])
+        except zlib.error:
+            return None
+        produced.append(len(output) + dropped)
+        if probe.eof:
+            return None
+        # the step to look in, far enough back to decode a while from it
+        step = len(produced) - 3 - RESTART_VERIFY // RESTART_STEP
+        if step < 0:
+            continue
+        # the output before this step's window isn't needed anymore
+        unneeded = produced[step] - WINDOW_SIZE - dropped
+        if unneeded > RESTART_SEARCH:
+            del output[:unneeded]
+            dropped += unneeded
+        if stalls(step) or stalls(step + 1):
+            candidates = range(step * RESTART_STEP, (step + 1) * RESTART_STEP)
+        elif step in stored:
+            candidates = stored[step]
+        else:
+            continue
+        for candidate in candidates:
+            for shift in range(0, 8, 2):
+                if not _is_block_header(data, candidate, shift):
+                    continue
+                chunk = (
+                    _block_prefix(data[candidate], shift) + data[candidate + 1 : given]
+                )
+                # the block starts after whatever the step before it finished
+                for end in range(produced[step], produced[step + 1] + 1):
+                    window = bytes(
+                        output[max(0, end - WINDOW_SIZE) - dropped : end - dropped]
+                    )
+                    trial = zlib.decompressobj(-zlib.MAX_WBITS, zdict=window)
+                    try:
+                        decoded = trial.decompress(chunk)
+                    except zlib.error:
+                        break
+                    if (
+                        len(decoded) >= RESTART_VERIFY // 2
+                        and output[end - dropped : end - dropped + len(decoded)]
+                        == decoded
+                    ):
+                        return Checkpoint(
+                            position - len(history) + end,
+                            start + candidate,
+                            b"",
+                            None,
+                            shift,
+                            window,
+                        )
+    return None
+
+
+class SeekableStream(io.RawIOBase):
+    """Read-only view of the uncompressed contents of a gzip or xz file, that
+    seeks without decompressing from the start every time.
+
+    Seeking goes to the closest checkpoint before the target and decompresses
+    from there. The blocks of an xz file are checkpoints already, listed in
+    its own index. Gzip has no such thing, so the state of the decompressor
+    is copied every few MB while reading, and kept for the rest of the
+    session. Those copies can't be saved, so a stream can also look for where
+    deflate blocks start, with the output before them, which `saveable` gives
+    to be saved and handed to the next stream of the file.
+    """
+
+    def __init__(
+        self,
+        file_path: str,
+        saved: list[Checkpoint] | None = None,
+        find_restarts: bool = False,
+    ) -> None:
+        """Open a compressed file. Use `open` to check what kind it is first.
+
+        Args:
+            file_path: A gzip or xz file.
+            saved: Checkpoints of the file that were saved by an earlier stream.
+            find_restarts: Whether to look for checkpoints that can be saved
+                while reading a gzip file, which makes reading it slower.
+        """
+        super().__init__()
+        self._file = open(file_path, "rb")  # noqa: SIM115
+        file_stat = os.fstat(self._file.fileno())
+        self._is_xz = self._file.read(6) == XZ_MAGIC
+        key = (os.path.abspath(file_path), file_stat.st_mtime_ns, file_stat.st_size)
+        with _registry_lock:
+            checkpoints = _registry.get(key)
+            if checkpoints is None:
+                checkpoints = (
+                    _xz_blocks(self._file, file_stat.st_size) if self._is_xz else None
+                ) or _Checkpoints(0 if self._is_xz else CHECKPOINT_SPACING)
+                _registry[key] = checkpoints
+                while len(_registry) > MAX_FILES:
+                    _registry.popitem(last=False)
+            _registry.move_to_end(key)
+        for checkpoint in saved or []:
+            checkpoints.add(checkpoint)
+        self._checkpoints = checkpoints
+        self._end = (
+            checkpoints.end if checkpoints.end is not None else file_stat.st_size
+        )
+        self._stream_header = b""
+        if self._is_xz:
+            self._file.seek(0)
+            self._stream_header = self._file.read(12)
+        self._find_restarts = find_restarts and not self._is_xz
+        # the end of what was decompressed, to find restart points with
+        self._history = b""
+        self._next_restart = checkpoints.spacing
+        self._restore(None)
+
+    @classmethod
+    def open(
+        cls,
+        file_path: str,
+        saved: list[Checkpoint] | None = None,
+        find_restarts: bool = False,
+    ) -> "SeekableStream | None":
+        """Open a compressed file, if it is a gzip or xz file.
+
+        Args:
+            file_path: The file.
+            saved: Checkpoints of the file that were saved by an earlier stream.
+            find_restarts: Whether to look for checkpoints that can be saved.
+
+        Returns:
+            SeekableStream | None: The stream, or None for any other file.
+        """
+        with open(file_path, "rb") as file:
+            magic = file.read(6)
+        if magic.startswith(GZIP_MAGIC) or magic == XZ_MAGIC:
+            return cls(file_path, saved, find_restarts)
+        return None
+
+    def saveable(self) -> list[Checkpoint]:
+        """Get the checkpoints of the file that can be saved, to hand to the
+        next stream of it.
+
+        Returns:
+            list[Checkpoint]: The checkpoints that need no decompressor.
+        """
+        return self._checkpoints.saveable()
+
+    def _new_decompressor(self) -> "zlib._Decompress | lzma.LZMADecompressor":
+        if self._is_xz:
+            return lzma.LZMADecompressor(format=lzma.FORMAT_XZ)
+        return zlib.decompressobj(wbits=zlib.MAX_WBITS | 16)
+
+    def _restore(self, checkpoint: Checkpoint | None) -> None:
+        """Start decompressing again, from a checkpoint or from the start."""
+        if checkpoint is None:
+            checkpoint = Checkpoint(0, 0, b"", None)
+        if checkpoint.decompressor is not None:
+            self._decompressor = checkpoint.decompressor.copy()
+        else:
+            self._decompressor = self._new_decompressor()
+        self._compressed_position = checkpoint.compressed_position
+        self._tail = checkpoint.tail
+        if checkpoint.decompressor is None and checkpoint.shift is not None:
+            # a deflate block, without the gzip header before it
+            self._decompressor = zlib.decompressobj(
+                -zlib.MAX_WBITS, zdict=checkpoint.window
+            )
+            self._file.seek(checkpoint.compressed_position)
+            self._tail = _block_prefix(self._file.read(1)[0], checkpoint.shift)
+            self._compressed_position += 1
+        self._shift = checkpoint.shift
+        if self._is_xz and checkpoint.compressed_position:
+            # a block can only be decoded as part of a stream
+            self._decompressor.decompress(self._stream_header)
+        # how much was decompressed, and what of it wasn't read yet
+        self._produced = checkpoint.position
+        self._buffer = b""
+        self._buffer_offset = 0
+        self._history = checkpoint.window
+
+    def _fill(self) -> bool:
+        """
+        Decompress the next piece of the file into the buffer.
+
+        Returns:
+            bool: False at the end of the file.
+
+        Raises:
+            OSError: If the compressed data is corrupt.
+        """
+        checkpoints = self._checkpoints
+        while True:
+            if checkpoints.size is not None and self._produced >= checkpoints.size:
+                return False
+            if not self._is_xz:
+                last = checkpoints.before(self._produced)
+                if (
+                    self._produced
+                    >= (last.position if last else 0) + checkpoints.spacing
+                ):
+                    checkpoints.add(
+                        Checkpoint(
+                            self._produced,
+                            self._compressed_position,
+                            self._tail,
+                            self._decompressor.copy(),
+                            self._shift,
+                        )
+                    )
+                if (
+                    self._find_restarts
+                    and self._shift is None
+                    and self._produced >= self._next_restart
+                    and not self._decompressor.eof
+                ):
+                    self._next_restart = self._produced + checkpoints.spacing
+                    restart = _find_restart(
+                        self._file,
+                        self._compressed_position - len(self._tail),
+                        self._decompressor,
+                        self._history,
+                        self._produced,
+                    )
+                    if restart is not None:
+                        checkpoints.add(restart)
+            if self._is_xz and not self._decompressor.needs_input:
+                data = b""
+            elif self._tail:
+                data, self._tail = self._tail, b""
+            else:
+                if self._compressed_position >= self._end:
+                    return False
+                self._file.seek(self._compressed_position)
+                data = self._file.read(
+                    min(CHUNK_SIZE, self._end - self._compressed_position)
+                )
+                if not data:
+                    return False
+                self._compressed_position += len(data)
+            if not self._is_xz and self._decompressor.eof:
+                # another gzip member, unless it is padding
+                if not data.startswith(GZIP_MAGIC):
+                    return False
+                self._decompressor = self._new_decompressor()
+            try:
+                output = self._decompressor.decompress(data, CHUNK_SIZE)
+            except (zlib.error, lzma.LZMAError) as exc:
+                # like gzip does, so callers only need to catch one kind
+                raise OSError(f"Invalid compressed data: {exc}") from exc
+            if self._is_xz:
+                if self._decompressor.eof:
+                    self._checkpoints.size = self._produced + len(output)
+            elif self._shift is not None and self._decompressor.eof:
+                # started from a restart point, so the gzip trailer is left
+                self._compressed_position -= len(self._decompressor.unused_data)
+                self._compressed_position += 8
+                self._tail = b""
+                self._shift = None
+            else:
+                self._tail = (
+                    self._decompressor.unused_data
+                    if self._decompressor.eof
+                    else self._decompressor.unconsumed_tail
+                )
+            if output:
+                self._produced += len(output)
+                self._buffer, self._buffer_offset = output, 0
+                if self._find_restarts:
+                    self._history = (self._history + output)[-WINDOW_SIZE:]
+                return True
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._produced - (len(self._buffer) - self._buffer_offset)
+
+    def readinto(self, buffer: bytearray | memoryview) -> int:
+        if self._buffer_offset >= len(self._buffer) and not self._fill():
+            return 0
+        count = min(len(buffer), len(self._buffer) - self._buffer_offset)
+        buffer[:count] = self._buffer[self._buffer_offset : self._buffer_offset + count]
+        self._buffer_offset += count
+        return count
+
+    def read(self, size: int | None = -1) -> bytes:
+        # tarfile takes a short read for the end of the data, so fill it up
+        chunks = []
+        remaining = -1 if size is None else size
+        while remaining:
+            if self._buffer_offset >= len(self._buffer) and not self._fill():
+                break
+            end = len(self._buffer)
+            if remaining > 0:
+                end = min(end, self._buffer_offset + remaining)
+                remaining -= end - self._buffer_offset
+            chunks.append(self._buffer[self._buffer_offset : end])
+            self._buffer_offset = end
+        return b"".join(chunks)
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            offset += self.tell()
+        elif whence == io.SEEK_END:
+            while self._fill():
+                pass
+            offset += self._produced
+        offset = max(0, offset)
+        position = self.tell()
+        checkpoint = self._checkpoints.before(offset)
+        if offset < position or (
+            checkpoint is not None
+            and checkpoint.position > position
+            # skipping ahead would skip searching what is in between
+            and not self._find_restarts
+        ):
+            self._restore(checkpoint)
+            position = self._produced
+        # skip what is in between
+        while position < offset:
+            available = len(self._buffer) - self._buffer_offset
+            if not available and not self._fill():
+                break
+            step = min(offset - position, len(self._buffer) - self._buffer_offset)
+            self._buffer_offset += step
+            position += step
+        return self.tell()
+
+    def close(self) -> None:
+        self._file.close()
+        super().close()
@@ -16,6 +16,9 @@ class SessionManager:
         selectedItems (list[str]): A dictionary mapping directory paths to the
             list of selected items in that directory.
         search (str): The current search string.
+        treeMode (bool): Whether tree mode is enabled for the file list.
+        expandedFolders (set[str]): The paths of folders that are expanded
+            while in tree mode.
     """
 
     def __init__(self) -> None:
@@ -25,3 +28,5 @@ class SessionManager:
         self.selectMode: bool = False
         self.selectedItems: list[str] = []
         self.search: str = ""
+        self.treeMode: bool = False
+        self.expandedFolders: set[str] = set()
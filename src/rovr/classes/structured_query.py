@@ -0,0 +1,137 @@
+import operator
+import os
+import re
+import time
+from typing import Callable
+
+SIZE_UNITS = {"": 1, "k": 1024, "m": 1024**2, "g": 1024**3, "t": 1024**4}
+AGE_UNITS = {
+    "s": 1,
+    "m": 60,
+    "h": 60 * 60,
+    "d": 60 * 60 * 24,
+    "w": 60 * 60 * 24 * 7,
+    "y": 60 * 60 * 24 * 365,
+}
+TYPES = {
+    "d": True,
+    "dir": True,
+    "directory": True,
+    "folder": True,
+    "f": False,
+    "file": False,
+}
+COMPARISONS = {
+    ">=": operator.ge,
+    "<=": operator.le,
+    ">": operator.gt,
+    "<": operator.lt,
+    "=": operator.eq,
+}
+
+TOKEN = re.compile(r"(size|mtime|type|ext):(\S+)", re.IGNORECASE)
+COMPARISON = re.compile(r"(>=|<=|>|<|=)?(\d+(?:\.\d+)?)([a-z]*)", re.IGNORECASE)
+
+# (name, is_dir, get_stat) -> whether the entry is kept
+Predicate = Callable[[str, bool, Callable[[], os.stat_result]], bool]
+
+
+class StructuredQuery:
+    """A search query, split into fuzzy text and `key:value` filters.
+
+    The filters are compiled into predicates once, when the query is parsed:
+
+    - `size:>100M` keeps files larger than 100 MiB. Units are `k`, `m`, `g`
+      and `t`, and no comparison means at least that size.
+    - `mtime:<7d` keeps entries modified less than 7 days ago. Units are `s`,
+      `m`, `h`, `d`, `w` and `y`, and no comparison means within that time.
+    - `type:dir` or `type:file` keeps only folders or only files.
+    - `ext:log,txt` keeps files with any of the given extensions.
+
+    Anything else, including a filter with a value that can't be parsed, is
+    left in the fuzzy text.
+    """
+
+    def __init__(self, query: str) -> None:
+        """Parse a query.
+
+        Args:
+            query: The query, as typed.
+        """
+        self.predicates: list[Predicate] = []
+        self.needs_stat = False
+        words = []
+        for word in query.split(" "):
+            match = TOKEN.fullmatch(word)
+            predicate = (
+                None
+                if match is None
+                else self._compile(match.group(1).lower(), match.group(2))
+            )
+            if predicate is None:
+                words.append(word)
+            else:
+                self.predicates.append(predicate)
+        self.text = " ".join(words).strip()
+
+    def _compile(self, key: str, value: str) -> Predicate | None:
+        if key == "type":
+            if (want_dir := TYPES.get(value.lower())) is None:
+                return None
+            return lambda name, is_dir, get_stat: is_dir == want_dir
+        if key == "ext":
+            extensions = frozenset(
+                extension.lstrip(".").casefold()
+                for extension in value.split(",")
+                if extension
+            )
+            if not extensions:
+                return None
+            return lambda name, is_dir, get_stat: (
+                not is_dir
+                and "." in name
+                and name.rpartition(".")[2].casefold() in extensions
+            )
+        match = COMPARISON.fullmatch(value)
+        if match is None:
+            return None
+        comparison, number, unit = match.groups()
+        unit = unit.lower()
+        if key == "size":
+            unit = unit.removesuffix("ib").removesuffix("b")
+            if unit not in SIZE_UNITS:
+                return None
+            limit = float(number) * SIZE_UNITS[unit]
+            compare = COMPARISONS[comparison or ">="]
+            self.needs_stat = True
+            return lambda name, is_dir, get_stat: (
+                not is_dir and compare(get_stat().st_size, limit)
+            )
+        # mtime, compared as an age so that `<` means more recent
+        if unit not in AGE_UNITS:
+            return None
+        limit = float(number) * AGE_UNITS[unit]
+        compare = COMPARISONS[comparison or "<="]
+        now = time.time()
+        self.needs_stat = True
+        return lambda name, is_dir, get_stat: compare(now - get_stat().st_mtime, limit)
+
+    def matches(
+        self, name: str, is_dir: bool, get_stat: Callable[[], os.stat_result]
+    ) -> bool:
+        """Check an entry against every filter.
+
+        Args:
+            name: The name of the entry.
+            is_dir: Whether the entry is a folder.
+            get_stat: Gets the entry's stat, only called when a filter needs it.
+
+        Returns:
+            bool: Whether the entry passes, False if it can't be stat'ed.
+        """
+        try:
+            return all(
+                predicate(name, is_dir, get_stat) for predicate in self.predicates
+            )
+        except OSError:
+            return False
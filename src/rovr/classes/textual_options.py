@@ -19,7 +19,13 @@ class PinnedSidebarOption(Option):
 
 class FileListSelectionWidget(Selection):
     def __init__(
-        self, icon: list, label: str, dir_entry: DirEntry, *args, **kwargs
+        self,
+        icon: list,
+        label: str,
+        dir_entry: DirEntry,
+        *args,
+        depth: int = 0,
+        **kwargs,
     ) -> None:
         """
         Initialise the selection.
@@ -28,20 +34,36 @@ class FileListSelectionWidget(Selection):
             icon (list): The icon list from a utils function.
             label (str): The label for the option.
             dir_entry (DirEntry): The nt.DirEntry class
+            depth (int): How deep the item is nested in tree mode. 0 for the cwd.
             value (SelectionType): The value for the selection.
             initial_state (bool) = False: The initial selected state of the selection.
             id (str or None) = None: The optional ID for the selection.
             disabled (bool) = False: The initial enabled/disabled state. Enabled by default.
         """
+        self.dir_entry = dir_entry
+        self.label = label
+        self.depth = depth
+        self.icon = icon
         super().__init__(
-            prompt=Content.from_markup(
-                f" [{icon[1]}]{icon[0]}[/{icon[1]}] $name", name=label
-            ),
+            prompt=self.make_prompt(icon),
             *args,
             **kwargs,
         )
-        self.dir_entry = dir_entry
-        self.label = label
+
+    def make_prompt(self, icon: list) -> Content:
+        """
+        Build the prompt for this selection with a given icon.
+
+        Args:
+            icon (list): The icon list from a utils function.
+
+        Returns:
+            Content: The indented prompt.
+        """
+        return Content.from_markup(
+            f"{'  ' * self.depth} [{icon[1]}]{icon[0]}[/{icon[1]}] $name",
+            name=self.label,
+        )
 
 
 class ClipboardSelection(Selection):
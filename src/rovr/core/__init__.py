@@ -1,5 +1,15 @@
+from .document_view import DocumentView
 from .file_list import FileList
+from .gallery import Gallery
+from .hex_view import HexView
 from .pinned_sidebar import PinnedSidebar
 from .preview_container import PreviewContainer
 
-__all__ = ["PinnedSidebar", "FileList", "PreviewContainer"]
+__all__ = [
+    "PinnedSidebar",
+    "FileList",
+    "DocumentView",
+    "Gallery",
+    "HexView",
+    "PreviewContainer",
+]
@@ -0,0 +1,376 @@
+from typing import ClassVar, Hashable
+
+from rich.segment import Segment
+from rich.syntax import Syntax
+from rich.text import Text
+from textual import work
+from textual.geometry import Size
+from textual.scroll_view import ScrollView
+from textual.strip import Strip
+from textual.worker import get_current_worker
+
+from rovr.classes import BatRunner, MappedDocument, PreviewCache
+from rovr.functions.highlight import BLOCK_LINES, get_lexer, highlight_lines
+
+
+class DocumentView(ScrollView, can_focus=True):
+    """Read-only view of a file that only ever reads the lines on screen.
+
+    Lines are read and highlighted a block at a time in the background, and
+    the blocks are kept in the preview cache, so scrolling back doesn't read
+    or lex them again. A block is shown plain as soon as it is read, and
+    repainted once it is highlighted.
+    With bat, every block is rendered by its own bat run in the background,
+    and shown highlighted by the lexer until then. A document that isn't
+    fully indexed yet is indexed in the background, and the view grows as
+    more of its lines are counted.
+    """
+
+    COMPONENT_CLASSES: ClassVar[set[str]] = {"document-view--line"}
+
+    def __init__(
+        self,
+        document: MappedDocument,
+        cache: PreviewCache,
+        bat: BatRunner | None = None,
+        *args,
+        **kwargs,
+    ) -> None:
+        """
+        Initialise the view.
+        Args:
+            document(MappedDocument): The file to show, indexed at least in part
+            cache(PreviewCache): Where to keep blocks of highlighted lines
+            bat(BatRunner | None): The runner to render blocks with, if any
+        """
+        super().__init__(*args, **kwargs)
+        self._cache = cache
+        self.set_document(document, bat)
+
+    def set_document(
+        self, document: MappedDocument, bat: BatRunner | None = None
+    ) -> None:
+        """
+        Show another file, from the top.
+        Args:
+            document(MappedDocument): The file to show, indexed at least in part
+            bat(BatRunner | None): The runner to render blocks with, if any
+        """
+        self.workers.cancel_group(self, "bat_blocks")
+        self.workers.cancel_group(self, "document_blocks")
+        self.workers.cancel_group(self, "document_index")
+        self.document = document
+        self._bat = bat
+        # the blocks that bat was asked to render
+        self._bat_blocks: set[int] = set()
+        self._lexer = get_lexer(document.file_path)
+        # the 0-based line to pick out, if any
+        self.highlighted_line: int | None = None
+        # whether to scroll to it once it is indexed
+        self._scroll_pending = False
+        # the blocks that are on screen, by block and whether the theme is dark
+        self._blocks: dict[tuple[int, bool], list[Text]] = {}
+        # the blocks that are being read and highlighted
+        self._loading: set[tuple[int, bool]] = set()
+        # the blocks that are shown for now, but loaded again: plain ones, and
+        # ones that were read before the index grew
+        self._unfinished: set[tuple[int, bool]] = set()
+        self._width = 0
+        self.virtual_size = Size(0, document.line_count)
+        if self.is_mounted:
+            self.scroll_to(0, 0, animate=False, immediate=True)
+            self.refresh()
+        if not document.complete:
+            self._index_document()
+
+    def show_line(self, line: int) -> None:
+        """
+        Pick out a line, and scroll it into view, once it is indexed.
+        Args:
+            line(int): The 0-based line
+        """
+        self.highlighted_line = line
+        self._scroll_pending = (
+            not self.document.complete and line >= self.document.line_count - 1
+        )
+        self.scroll_to(
+            y=max(0, line - self.size.height // 3), animate=False, immediate=True
+        )
+        self.refresh()
+
+    @work(thread=True, exclusive=True, group="document_index")
+    def _index_document(self) -> None:
+        """Count the lines of the rest of the document, a step at a time."""
+        worker = get_current_worker()
+        document = self.document
+
+        def is_cancelled() -> bool:
+            return worker.is_cancelled
+
+        while not is_cancelled():
+            try:
+                complete = document.index_more(is_cancelled)
+            except OSError:
+                # changed or gone, so the lines counted so far are all there is
+                return
+            self.app.call_from_thread(self._index_grew, document)
+            if complete:
+                return
+
+    def _index_grew(self, document: MappedDocument) -> None:
+        """
+        Make room for the lines that were indexed since.
+        Args:
+            document(MappedDocument): The document that was indexed further
+        """
+        if document is not self.document:
+            return
+        self.virtual_size = Size(self.virtual_size.width, document.line_count)
+        # read the block that the index ended in again, with its new lines
+        self._unfinished.update(
+            key for key, lines in self._blocks.items() if len(lines) < BLOCK_LINES
+        )
+        if self._scroll_pending and self.highlighted_line is not None:
+            self.show_line(self.highlighted_line)
+        self.refresh()
+
+    def _get_block(self, block: int) -> list[Text]:
+        """
+        Get a block of lines, as far as it is loaded, and load the rest of it.
+        Args:
+            block(int): The index of the block
+
+        Returns:
+            list[Text]: the lines of the block, or none while it is read
+        """
+        dark = self.app.current_theme.dark
+        key = (block, dark)
+        lines = self._blocks.get(key)
+        if lines is not None and key not in self._unfinished:
+            return lines
+        if self._bat is not None:
+            bat_lines = self._cache.get(self._block_key(block, "bat"))
+            if bat_lines is None and block not in self._bat_blocks:
+                self._bat_blocks.add(block)
+                self._render_bat_block(block)
+            if bat_lines is not None:
+                # rendered by bat, and never replaced
+                self._keep_block(key, bat_lines)
+                return bat_lines
+        if lines is None:
+            lines = self._cache.get(self._block_key(block, "highlight", dark))
+            if lines is not None:
+                self._keep_block(key, lines)
+                return lines
+        if key not in self._loading:
+            self._loading.add(key)
+            self._load_block(block, dark)
+        return lines or []
+
+    def _keep_block(
+        self, key: tuple[int, bool], lines: list[Text], finished: bool = True
+    ) -> None:
+        """
+        Keep a block to show.
+        Args:
+            key(tuple[int, bool]): The index of the block, and whether the theme is dark
+            lines(list[Text]): The lines of the block
+            finished(bool): Whether it shouldn't be loaded again
+        """
+        if len(self._blocks) >= 4 and key not in self._blocks:
+            # only the blocks on screen are needed
+            self._blocks.clear()
+            self._unfinished.clear()
+        self._blocks[key] = lines
+        if finished:
+            self._unfinished.discard(key)
+        else:
+            self._unfinished.add(key)
+
+    @work(thread=True, group="document_blocks")
+    def _load_block(self, block: int, dark: bool) -> None:
+        """
+        Read a block of lines and show it plain, then highlight it and show it
+        again, while it is near the screen.
+        Args:
+            block(int): The index of the block
+            dark(bool): Whether to highlight it for a dark theme
+        """
+        worker = get_current_worker()
+        document, lexer, loading = self.document, self._lexer, self._loading
+        cache_key = self._block_key(block, "highlight", dark)
+
+        def is_cancelled() -> bool:
+            return (
+                worker.is_cancelled
+                or abs(block - self.scroll_offset.y // BLOCK_LINES) > 1
+            )
+
+        if is_cancelled():
+            # scrolled away, so load it when it's back
+            loading.discard((block, dark))
+            return
+        line_count = document.line_count
+        raw_lines = [
+            line.expandtabs(4)
+            for line in document.get_lines(block * BLOCK_LINES, BLOCK_LINES)
+        ]
+        lines = [Text(line) for line in raw_lines]
+        if lexer is not None:
+            if not self.app.call_from_thread(
+                self._show_block, document, block, dark, lines, line_count, False
+            ):
+                return
+            if is_cancelled():
+                loading.discard((block, dark))
+                return
+            theme = Syntax.get_theme("ansi_dark" if dark else "ansi_light")
+            lines = highlight_lines(raw_lines, lexer, theme)
+        if len(lines) == BLOCK_LINES or (
+            document.complete and line_count == document.line_count
+        ):
+            # a block cut short by the end of the index isn't done yet
+            self._cache.put(cache_key, lines)
+        self.app.call_from_thread(
+            self._show_block, document, block, dark, lines, line_count, True
+        )
+
+    def _show_block(
+        self,
+        document: MappedDocument,
+        block: int,
+        dark: bool,
+        lines: list[Text],
+        line_count: int,
+        highlighted: bool,
+    ) -> bool:
+        """
+        Show a block that was read, or highlighted.
+        Args:
+            document(MappedDocument): The file that it is a block of
+            block(int): The index of the block
+            dark(bool): Whether it was highlighted for a dark theme
+            lines(list[Text]): The lines of the block
+            line_count(int): How many lines were indexed when it was read
+            highlighted(bool): Whether it is done, rather than plain for now
+
+        Returns:
+            bool: whether it is still worth highlighting
+        """
+        if document is not self.document:
+            return False
+        key = (block, dark)
+        if (
+            self._bat is not None
+            and self._cache.get(self._block_key(block, "bat")) is not None
+        ):
+            # bat rendered it in the meantime
+            self._loading.discard(key)
+            return False
+        # read before the index grew, so it misses lines
+        short = len(lines) < BLOCK_LINES and line_count != document.line_count
+        if highlighted or short:
+            self._loading.discard(key)
+        self._keep_block(key, lines, highlighted and not short)
+        self.refresh()
+        return not short
+
+    def _block_key(self, block: int, *details: Hashable) -> tuple:
+        """
+        Get the preview cache key of a block of the file.
+        Args:
+            block(int): The index of the block
+            *details(Hashable): What else the block depends on
+
+        Returns:
+            tuple: the key
+        """
+        document = self.document
+        return (document.file_path, document.mtime_ns, document.size, block, *details)
+
+    @work(thread=True, group="bat_blocks")
+    def _render_bat_block(self, block: int) -> None:
+        """
+        Render a block of lines with bat, while it is near the screen.
+        Args:
+            block(int): The index of the block
+        """
+        worker = get_current_worker()
+        document, bat, requested = self.document, self._bat, self._bat_blocks
+        cache_key = self._block_key(block, "bat")
+
+        def is_cancelled() -> bool:
+            return (
+                worker.is_cancelled
+                or abs(block - self.scroll_offset.y // BLOCK_LINES) > 1
+            )
+
+        first_line = block * BLOCK_LINES + 1
+        command = bat.command(
+            document.file_path,
+            line_range=(first_line, first_line + BLOCK_LINES - 1),
+        )
+        try:
+            result = bat.run(command, is_cancelled)
+        except OSError:
+            # keep showing what the lexer made of it
+            return
+        if result is None:
+            # scrolled away, so render it again when it's back
+            requested.discard(block)
+            return
+        if result[0] != 0:
+            return
+        lines = list(
+            Text.from_ansi(result[1].decode("utf-8", errors="ignore")).split("\n")
+        )
+        self._cache.put(cache_key, lines)
+        self.app.call_from_thread(self._show_bat_block, document, block, lines)
+
+    def _show_bat_block(
+        self, document: MappedDocument, block: int, lines: list[Text]
+    ) -> None:
+        """
+        Swap in a block that bat rendered.
+        Args:
+            document(MappedDocument): The file that it is a block of
+            block(int): The index of the block
+            lines(list[Text]): The lines of the block
+        """
+        if document is not self.document:
+            return
+        for dark in (False, True):
+            self._blocks.pop((block, dark), None)
+        self._keep_block((block, self.app.current_theme.dark), lines)
+        self.refresh()
+
+    def render_line(self, y: int) -> Strip:
+        """Render a line in the display.
+
+        Args:
+            y: The line to render.
+
+        Returns:
+            A [`Strip`][textual.strip.Strip] that is the line to render.
+        """
+        scroll_x, scroll_y = self.scroll_offset
+        line_number = scroll_y + y
+        width = self.size.width
+        lines = self._get_block(line_number // BLOCK_LINES)
+        if line_number % BLOCK_LINES >= len(lines):
+            return Strip.blank(width, self.rich_style)
+        style = (
+            self.get_component_rich_style("document-view--line")
+            if line_number == self.highlighted_line
+            else self.rich_style
+        )
+        strip = Strip(
+            Segment.apply_style(
+                lines[line_number % BLOCK_LINES].render(self.app.console), style
+            )
+        )
+        if strip.cell_length > self._width:
+            # only as wide as the widest line that was shown
+            self._width = strip.cell_length
+            self.virtual_size = Size(self._width, self.document.line_count)
+        return strip.crop_extend(scroll_x, scroll_x + width, style)
@@ -1,3 +1,4 @@
+from contextlib import suppress
 from os import getcwd, path
 from os import system as cmd
 from typing import ClassVar
@@ -6,17 +7,20 @@ from rich.segment import Segment
 from rich.style import Style
 from textual import events, on, work
 from textual.binding import Binding, BindingType
+from textual.content import Content
 from textual.css.query import NoMatches
 from textual.strip import Strip
+from textual.style import Style as VisualStyle
 from textual.widgets import Button, Input, OptionList, SelectionList
 from textual.widgets.option_list import Option, OptionDoesNotExist
 from textual.widgets.selection_list import Selection
 
 from rovr.classes import FileListSelectionWidget
+from rovr.classes.fuzzy_filter import match_positions
+from rovr.functions import archive_index, utils
 from rovr.functions import icons as icon_utils
 from rovr.functions import path as path_utils
 from rovr.functions import pins as pin_utils
-from rovr.functions import utils
 from rovr.variables.constants import buttons_that_depend_on_path, config
 from rovr.variables.maps import ARCHIVE_EXTENSIONS
 
@@ -26,6 +30,11 @@ class FileList(SelectionList, inherit_bindings=False):
     OptionList but can multi-select files and folders.
     """
 
+    # how many children of an expanded folder get inserted at once
+    TREE_CHUNK_SIZE: int = 500
+    # how long to wait for more chunks before filtering them, while searching
+    REFILTER_DELAY: float = 0.1
+
     BINDINGS: ClassVar[list[BindingType]] = (
         [
             Binding(bind, "cursor_down", "Down", show=False)
@@ -76,6 +85,14 @@ class FileList(SelectionList, inherit_bindings=False):
         self.dummy = dummy
         self.enter_into = enter_into
         self.select_mode_enabled = select
+        self.tree_mode_enabled = False
+        # the search query whose matched characters are highlighted
+        self.match_query = ""
+        self._match_visuals: dict[Option, Content] = {}
+        # where the highlight was, to tell which way it is moving
+        self._last_highlighted = 0
+        # whether children were inserted while searching, and not filtered yet
+        self._refilter_pending = False
 
     def on_mount(self) -> None:
         if not self.dummy:
@@ -141,10 +158,12 @@ class FileList(SelectionList, inherit_bindings=False):
         except AttributeError:
             self.clear_options()
             return
+        self.tree_mode_enabled = session.treeMode
         # Separate folders and files
         self.list_of_options = []
+        expanded_folders = []
         try:
-            folders, files = path_utils.get_cwd_object(cwd)
+            folders, files = path_utils.get_cached_cwd_object(cwd)
             if folders == [] and files == []:
                 self.list_of_options.append(
                     Selection("   --no-files--", value="", id="", disabled=True)
@@ -164,6 +183,19 @@ class FileList(SelectionList, inherit_bindings=False):
                             id=path_utils.compress(item["name"]),
                         )
                     )
+                if self.tree_mode_enabled:
+                    # re-expand whatever was expanded the last time this
+                    # directory was shown, parents before their children
+                    expanded_folders = sorted(
+                        folder
+                        for folder in session.expandedFolders
+                        if folder.startswith(cwd.rstrip("/") + "/")
+                    )
+                    for option in self.list_of_options[: len(folders)]:
+                        if path_utils.normalise(option.dir_entry.path) in (
+                            session.expandedFolders
+                        ):
+                            self._set_folder_icon(option, expanded=True)
         except PermissionError:
             self.list_of_options.append(
                 Selection(
@@ -180,8 +212,12 @@ class FileList(SelectionList, inherit_bindings=False):
         else:
             for selector in buttons_that_depend_on_path:
                 self.app.query_one(selector).disabled = False
+        self.input.ranked = None
+        self.set_match_query("")
         self.clear_options()
         self.add_options(self.list_of_options)
+        if expanded_folders:
+            self.load_tree_children(cwd, expanded_folders)
         # session handler
         self.app.query_one("#path_switcher").value = cwd + (
             "" if cwd.endswith("/") else "/"
@@ -232,8 +268,6 @@ class FileList(SelectionList, inherit_bindings=False):
         self.app.tabWidget.parent.on_resize()
         with self.input.prevent(self.input.Changed):
             self.input.clear()
-        if not add_to_session:
-            self.input.clear_selected()
         if self.list_of_options[0].disabled:  # special option
             if self.select_mode_enabled:
                 await self.toggle_mode()
@@ -254,7 +288,7 @@ class FileList(SelectionList, inherit_bindings=False):
         self.list_of_options = []
 
         try:
-            folders, files = path_utils.get_cwd_object(cwd)
+            folders, files = path_utils.get_cached_cwd_object(cwd)
             if folders == [] and files == []:
                 self.list_of_options.append(
                     Selection("  --no-files--", value="", id="", disabled=True)
@@ -301,6 +335,12 @@ class FileList(SelectionList, inherit_bindings=False):
             )
         else:
             for file_path in file_list:
+                if file_path == archive_index.MORE:
+                    # the archive was too large to read all of it yet
+                    self.list_of_options.append(
+                        Selection(f"  {file_path}", value="", id="", disabled=True)
+                    )
+                    continue
                 if file_path.endswith("/"):
                     icon = icon_utils.get_icon_for_folder(file_path.strip("/"))
                 else:
@@ -313,11 +353,11 @@ class FileList(SelectionList, inherit_bindings=False):
                         f" [{icon[1]}]{icon[0]}[/{icon[1]}] {file_path}",
                         value=path_utils.compress(file_path),
                         id=path_utils.compress(file_path),
-                        disabled=True,  # Archive contents are not interactive like regular files
                     )
                 )
 
         self.add_options(self.list_of_options)
+        self.action_first()
         self.refresh(repaint=True, layout=True)
 
     async def on_selection_list_selected_changed(
@@ -329,6 +369,10 @@ class FileList(SelectionList, inherit_bindings=False):
         # Get the selected option
         selected_option = self.get_option_at_index(self.highlighted)
         file_name = path_utils.decompress(selected_option.value)
+        if self.id == "archive_preview":
+            # a member of the previewed archive, not a file in the folder
+            self.app.query_one("PreviewContainer").show_member(file_name)
+            return
         self.update_border_subtitle()
         if self.dummy and path.isdir(path.join(self.enter_into, file_name)):
             # if the folder is selected, then cd there,
@@ -339,8 +383,14 @@ class FileList(SelectionList, inherit_bindings=False):
         elif not self.select_mode_enabled:
             # Check if it's a folder or a file
             if path.isdir(path.join(cwd, file_name)):
-                # If it's a folder, navigate into it
-                self.app.cd(path.join(cwd, file_name))
+                if self.tree_mode_enabled and isinstance(
+                    selected_option, FileListSelectionWidget
+                ):
+                    # In tree mode, expand the folder inline instead
+                    self.toggle_folder(selected_option)
+                else:
+                    # If it's a folder, navigate into it
+                    self.app.cd(path.join(cwd, file_name))
             else:
                 path_utils.open_file(path.join(cwd, file_name))
             if self.highlighted is None:
@@ -374,13 +424,426 @@ class FileList(SelectionList, inherit_bindings=False):
             self.highlighted = 0
         # preview
         self.app.query_one("PreviewContainer").show_preview(
-            path_utils.normalise(path.join(getcwd(), file_name))
+            path_utils.normalise(path.join(getcwd(), file_name)),
+            prefetch=self._adjacent_files(config["settings"]["preview_prefetch"]),
         )
         self.app.query_one("MetadataContainer").update_metadata(event.option.dir_entry)
         self.app.query_one("#unzip").disabled = not file_name.endswith(
             tuple(ARCHIVE_EXTENSIONS)
         )
 
+    def _adjacent_files(self, count: int) -> list[str]:
+        """Get the files around the highlighted one, ahead of it first.
+
+        Args:
+            count (int): How many entries to look at on each side.
+
+        Returns:
+            list[str]: The paths of the files, the ones in the direction the
+                highlight last moved in first. Folders are left out.
+        """
+        if self.highlighted is None or count <= 0:
+            return []
+        step = -1 if self.highlighted < self._last_highlighted else 1
+        self._last_highlighted = self.highlighted
+        cwd = getcwd()
+        files = []
+        for direction in (step, -step):
+            for distance in range(1, count + 1):
+                index = self.highlighted + direction * distance
+                if not 0 <= index < self.option_count:
+                    break
+                option = self.get_option_at_index(index)
+                if not isinstance(option, FileListSelectionWidget):
+                    continue
+                with suppress(OSError):
+                    if option.dir_entry.is_dir():
+                        continue
+                files.append(
+                    path_utils.normalise(
+                        path.join(cwd, path_utils.decompress(option.value))
+                    )
+                )
+        return files
+
+    def _set_folder_icon(self, option: FileListSelectionWidget, expanded: bool) -> None:
+        """Swap a folder's icon between its normal and opened icon.
+
+        Args:
+            option (FileListSelectionWidget): The folder option.
+            expanded (bool): Whether the folder is expanded.
+        """
+        option._set_prompt(
+            option.make_prompt(
+                icon_utils.get_icon("folder", "open") if expanded else option.icon
+            )
+        )
+        self._match_visuals.pop(option, None)
+
+    def set_visible_options(self, options: list[Selection]) -> None:
+        """Show only the given options, without clearing and re-adding them.
+
+        The options are swapped in as a view over `list_of_options`, so the
+        selection state (including options that are hidden right now) is left
+        untouched. Rendered options are dropped, because they embed their index.
+
+        Args:
+            options (list[Selection]): The options to show, in order.
+        """
+        highlighted_option = self.highlighted_option
+        # OptionList and SelectionList have no public way to do this, so their
+        # private state is set like `add_options` and `clear_options` set it,
+        # as of textual 6.0 to 6.12, which pyproject.toml is pinned to.
+        # `extend_visible_options`, `insert_visible_options` and
+        # `_get_option_render` rely on it too.
+        self._options = list(options)
+        self._option_to_index = {
+            option: index for index, option in enumerate(self._options)
+        }
+        self._id_to_option = {
+            option.id: option for option in self._options if option.id is not None
+        }
+        self._values = {option.value: index for index, option in enumerate(options)}
+        self._mouse_hovering_over = None
+        self._line_cache.clear()
+        self._option_render_cache.clear()
+        new_index = self._option_to_index.get(highlighted_option)
+        if new_index is None:
+            self.highlighted = None
+        else:
+            # same option, so there's no need to re-preview it
+            self.set_reactive(OptionList.highlighted, new_index)
+        self.refresh(layout=True)
+        self._update_lines()
+        if new_index is not None:
+            self.scroll_to_highlight()
+
+    def extend_visible_options(self, options: list[Selection]) -> None:
+        """Show more options after the visible ones, keeping the scroll position.
+
+        Args:
+            options (list[Selection]): The options to add, in order.
+        """
+        for option in options:
+            index = len(self._options)
+            self._options.append(option)
+            self._option_to_index[option] = index
+            if option.id is not None:
+                self._id_to_option[option.id] = option
+            self._values[option.value] = index
+        self._update_lines()
+        self.refresh()
+        self.update_border_subtitle()
+
+    def insert_visible_options(self, index: int, options: list[Selection]) -> None:
+        """Show more options at a position among the visible ones.
+
+        Unlike `set_visible_options`, only the options from the position on are
+        indexed and measured again, so streaming a big folder in chunks doesn't
+        redo the whole list for every chunk.
+
+        Args:
+            index (int): Where to insert them, among the visible options.
+            options (list[Selection]): The options to insert, in order.
+        """
+        old_count = len(self._options)
+        self._options[index:index] = options
+        for position, option in enumerate(self._options[index:], index):
+            self._option_to_index[option] = position
+            self._values[option.value] = position
+        for option in options:
+            if option.id is not None:
+                self._id_to_option[option.id] = option
+        # drop the lines from the position on, for `_update_lines` to add back
+        line_cache = self._line_cache
+        if (first_line := line_cache.index_to_line.get(index)) is not None:
+            del line_cache.lines[first_line:]
+            for stale in range(index, old_count):
+                line_cache.heights.pop(stale, None)
+                line_cache.index_to_line.pop(stale, None)
+        self._mouse_hovering_over = None
+        self._option_render_cache.clear()
+        if self.highlighted is not None and self.highlighted >= index:
+            # same option, so there's no need to re-preview it
+            self.set_reactive(OptionList.highlighted, self.highlighted + len(options))
+        self._update_lines()
+        self.refresh()
+
+    def set_match_query(self, query: str) -> None:
+        """Set the search query to highlight in the options.
+
+        Args:
+            query (str): The query, or an empty string to stop highlighting.
+        """
+        if query == self.match_query:
+            return
+        self.match_query = query
+        self._match_visuals.clear()
+        self._option_render_cache.clear()
+        self.refresh()
+
+    def _get_option_render(self, option: Option, style: VisualStyle) -> list[Strip]:
+        # highlight the matched characters, but only of the options that are
+        # actually rendered, by swapping the visual in while it is cached.
+        # `Option._visual` is what the render reads, as of textual 6.12
+        if not self.match_query or not isinstance(option, FileListSelectionWidget):
+            return super()._get_option_render(option, style)
+        visual = option._visual
+        if (highlighted := self._match_visuals.get(option)) is None:
+            prompt = option.prompt
+            offset = len(prompt.plain) - len(option.label)
+            highlighted = prompt
+            for position in match_positions(
+                self.match_query.casefold(), option.label.casefold()
+            ):
+                if position < len(option.label):
+                    highlighted = highlighted.stylize(
+                        "bold underline", offset + position, offset + position + 1
+                    )
+            self._match_visuals[option] = highlighted
+        option._visual = highlighted
+        try:
+            return super()._get_option_render(option, style)
+        finally:
+            option._visual = visual
+
+    def watch_scroll_y(self, old_value: float, new_value: float) -> None:
+        super().watch_scroll_y(old_value, new_value)
+        if (
+            not self.dummy
+            and new_value >= self.max_scroll_y - self.scrollable_content_region.height
+        ):
+            # close to the end, so show more ranked matches if there are any
+            self.input.load_more_matches()
+
+    def _rebuild_options(self) -> None:
+        """Show `list_of_options` again after it was changed in place."""
+        if self.input.value:
+            # search is active, so filter the new options too
+            self.input.on_input_changed(Input.Changed(self.input, self.input.value))
+            return
+        self.set_visible_options(self.list_of_options)
+        if self.highlighted is None:
+            # the highlighted option is gone, so let the preview know
+            self.highlighted = 0
+        self.update_border_subtitle()
+
+    def _descendant_slice(self, option: FileListSelectionWidget) -> slice:
+        """Get the slice of `list_of_options` that holds an option's descendants.
+
+        Args:
+            option (FileListSelectionWidget): The folder option.
+
+        Returns:
+            slice: The descendants, which are always right below the folder.
+        """
+        start = self.list_of_options.index(option) + 1
+        end = start
+        while (
+            end < len(self.list_of_options)
+            and getattr(self.list_of_options[end], "depth", 0) > option.depth
+        ):
+            end += 1
+        return slice(start, end)
+
+    def toggle_tree_mode(self) -> None:
+        """Toggle tree mode, where folders can be expanded inline."""
+        session = self.app.tabWidget.active_tab.session
+        self.tree_mode_enabled = session.treeMode = not self.tree_mode_enabled
+        if self.tree_mode_enabled:
+            self.notify("Folders now expand inline.", title="Tree Mode")
+            return
+        # leaving tree mode collapses everything
+        session.expandedFolders.clear()
+        self.list_of_options = [
+            option
+            for option in self.list_of_options
+            if getattr(option, "depth", 0) == 0
+        ]
+        for option in self.list_of_options:
+            if isinstance(option, FileListSelectionWidget):
+                self._set_folder_icon(option, expanded=False)
+        self._rebuild_options()
+
+    def toggle_folder(self, option: FileListSelectionWidget) -> None:
+        """Expand or collapse a folder in tree mode.
+
+        Args:
+            option (FileListSelectionWidget): The folder option.
+        """
+        session = self.app.tabWidget.active_tab.session
+        folder = path_utils.normalise(option.dir_entry.path)
+        if folder in session.expandedFolders:
+            self.collapse_folder(option)
+        else:
+            session.expandedFolders.add(folder)
+            self._set_folder_icon(option, expanded=True)
+            self._clear_caches()
+            self.load_tree_children(path_utils.normalise(getcwd()), [folder])
+
+    def collapse_folder(self, option: FileListSelectionWidget) -> None:
+        """Collapse an expanded folder, dropping everything below it.
+
+        Args:
+            option (FileListSelectionWidget): The folder option.
+        """
+        session = self.app.tabWidget.active_tab.session
+        folder = path_utils.normalise(option.dir_entry.path)
+        # nested folders go along with it, so collapsed subtrees cost nothing
+        session.expandedFolders = {
+            expanded
+            for expanded in session.expandedFolders
+            if expanded != folder and not expanded.startswith(folder + "/")
+        }
+        descendants = self._descendant_slice(option)
+        if self.highlighted_option in self.list_of_options[descendants]:
+            with suppress(OptionDoesNotExist):
+                self.highlighted = self.get_option_index(option.id)
+        for descendant in self.list_of_options[descendants]:
+            self._selected.pop(descendant.value, None)
+        del self.list_of_options[descendants]
+        self._set_folder_icon(option, expanded=False)
+        self._rebuild_options()
+
+    def tree_go_up(self) -> bool:
+        """Collapse the highlighted folder, or move to its parent folder.
+
+        Returns:
+            bool: Whether anything was done. If not, the caller should go up a
+                directory instead.
+        """
+        option = self.highlighted_option
+        if not isinstance(option, FileListSelectionWidget):
+            return False
+        if (
+            path_utils.normalise(option.dir_entry.path)
+            in self.app.tabWidget.active_tab.session.expandedFolders
+        ):
+            self.collapse_folder(option)
+            return True
+        if option.depth == 0:
+            return False
+        for index in range(self.highlighted - 1, -1, -1):
+            if getattr(self.get_option_at_index(index), "depth", 0) < option.depth:
+                self.highlighted = index
+                break
+        return True
+
+    @work(thread=True, group="tree")
+    def load_tree_children(self, cwd: str, folders: list[str]) -> None:
+        """List expanded folders and stream their children into the list.
+
+        Args:
+            cwd (str): The directory the file list was showing.
+            folders (list[str]): The folders to list, parents before children.
+        """
+        session = self.app.tabWidget.active_tab.session
+        for folder in folders:
+            relative_folder = path_utils.normalise(path.relpath(folder, cwd))
+            depth = relative_folder.count("/") + 1
+            try:
+                # expanding a folder again reuses its listing, if it didn't change
+                subfolders, files = path_utils.get_cached_cwd_object(folder)
+            except PermissionError:
+                session.expandedFolders.discard(folder)
+                continue
+            chunk = []
+            # the last child inserted so far, to insert the next chunk after
+            after = None
+            for item in subfolders + files:
+                if folder not in session.expandedFolders:
+                    # collapsed while we were still loading
+                    break
+                compressed = path_utils.compress(f"{relative_folder}/{item['name']}")
+                chunk.append(
+                    FileListSelectionWidget(
+                        icon=item["icon"],
+                        label=item["name"],
+                        dir_entry=item["dir_entry"],
+                        depth=depth,
+                        value=compressed,
+                        id=compressed,
+                    )
+                )
+                if len(chunk) == self.TREE_CHUNK_SIZE:
+                    self.app.call_from_thread(
+                        self._insert_tree_children, cwd, folder, chunk, after
+                    )
+                    after = chunk[-1]
+                    chunk = []
+            if chunk:
+                self.app.call_from_thread(
+                    self._insert_tree_children, cwd, folder, chunk, after
+                )
+
+    def _insert_tree_children(
+        self,
+        cwd: str,
+        folder: str,
+        children: list[FileListSelectionWidget],
+        after: FileListSelectionWidget | None = None,
+    ) -> None:
+        """Insert a chunk of children below their (expanded) folder.
+
+        Args:
+            cwd (str): The directory the children were loaded for.
+            folder (str): The folder the children belong to.
+            children (list[FileListSelectionWidget]): The children.
+            after (FileListSelectionWidget | None): The last child of the chunk
+                before, to find where this one goes without going through the
+                children that are already there.
+        """
+        if (
+            path_utils.normalise(getcwd()) != cwd
+            or folder not in self.app.tabWidget.active_tab.session.expandedFolders
+        ):
+            return
+        parent_id = path_utils.compress(path_utils.normalise(path.relpath(folder, cwd)))
+        searching = bool(self.input.value)
+
+        def position(option: Selection | None) -> int | None:
+            if option is None:
+                return None
+            if not searching:
+                # every option is visible, in the same order
+                return self._option_to_index.get(option)
+            try:
+                return self.list_of_options.index(option)
+            except ValueError:
+                return None
+
+        parent = (
+            next(
+                (option for option in self.list_of_options if option.id == parent_id),
+                None,
+            )
+            if searching
+            else self._id_to_option.get(parent_id)
+        )
+        if (parent_index := position(parent)) is None:
+            return
+        start = position(after)
+        # after the children inserted so far, and whatever is expanded below them
+        insert_at = (parent_index if start is None else start) + 1
+        while (
+            insert_at < len(self.list_of_options)
+            and getattr(self.list_of_options[insert_at], "depth", 0) > parent.depth
+        ):
+            insert_at += 1
+        self.list_of_options[insert_at:insert_at] = children
+        if searching:
+            # filtered again once, after the chunks that come in the meantime
+            if not self._refilter_pending:
+                self._refilter_pending = True
+                self.set_timer(self.REFILTER_DELAY, self._refilter)
+            return
+        self.insert_visible_options(insert_at, children)
+        self.update_border_subtitle()
+
+    def _refilter(self) -> None:
+        self._refilter_pending = False
+        self._rebuild_options()
+
     # Use better versions of the checkbox icons
     def _get_left_gutter_width(
         self,
@@ -705,7 +1168,15 @@ class FileList(SelectionList, inherit_bindings=False):
                     and event.key in config["keybinds"]["up_tree"]
                 ):
                     event.stop()
+                    if self.tree_mode_enabled and self.tree_go_up():
+                        return
                     self.app.query_one("UpButton").on_button_pressed(Button.Pressed)
+                case key if key in config["keybinds"]["toggle_tree"]:
+                    event.stop()
+                    self.toggle_tree_mode()
+                case key if key in config["keybinds"]["toggle_gallery"]:
+                    event.stop()
+                    self.app.query_one("PreviewContainer").toggle_gallery()
                 case key if event.key in config["keybinds"]["copy_path"]:
                     event.stop()
                     await self.app.query_one("PathCopyButton").on_button_pressed(
@@ -752,10 +1223,14 @@ class FileList(SelectionList, inherit_bindings=False):
         if self.dummy:
             return
         elif (not self.select_mode_enabled) or (self.selected is None):
+            total = self.option_count
+            if self.input.ranked is not None:
+                # the rest of the matches are shown when scrolled to
+                total = self.input.ranked.total
             utils.set_scuffed_subtitle(
                 self.parent,
                 "NORMAL",
-                f"{self.highlighted + 1}/{self.option_count}",
+                f"{self.highlighted + 1}/{total}",
             )
             self.app.tabWidget.active_tab.selectedItems = []
         else:
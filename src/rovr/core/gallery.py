@@ -0,0 +1,305 @@
+import os
+from concurrent.futures import Future, ThreadPoolExecutor
+from os import path
+from typing import ClassVar
+
+from PIL import Image, UnidentifiedImageError
+from rich.color import Color
+from rich.segment import Segment
+from rich.style import Style
+from rich.text import Text
+from textual import events
+from textual.geometry import Region, Size
+from textual.message import Message
+from textual.scroll_view import ScrollView
+from textual.strip import Strip
+
+from rovr.functions import thumbnails
+from rovr.variables.constants import config
+
+
+class Gallery(ScrollView, can_focus=True):
+    """Grid of the images in a folder, that only decodes the ones on screen.
+
+    Tiles are loaded by a pool of threads, the ones on screen first and then
+    a few rows around them, and tiles that scroll away before their turn are
+    never loaded. Every tile comes from the normal size thumbnail of its
+    image, and is drawn with coloured half cells, so the grid scrolls like
+    text however many images there are.
+    """
+
+    COMPONENT_CLASSES: ClassVar[set[str]] = {"gallery--highlighted"}
+
+    # the size of a tile, in cells, so twice as many pixels tall
+    TILE_WIDTH: int = 16
+    TILE_HEIGHT: int = 8
+    # the space between tiles, in cells
+    GAP: int = 2
+    # how many rows of tiles above and below the screen are loaded too
+    MARGIN_ROWS: int = 2
+    # how many tiles are kept, the ones furthest from the screen are dropped
+    MAX_TILES: int = 512
+    MAX_WORKERS: int = 4
+
+    class TileLoaded(Message):
+        """Posted from the pool when a tile is ready to be drawn."""
+
+        def __init__(
+            self, generation: int, index: int, rows: list[list[Segment]]
+        ) -> None:
+            super().__init__()
+            self.generation = generation
+            self.index = index
+            self.rows = rows
+
+    def __init__(self, folder: str, images: list[str], *args, **kwargs) -> None:
+        """
+        Initialise the gallery.
+        Args:
+            folder(str): The folder
+            images(list[str]): The images in it, in the order to show them in
+        """
+        super().__init__(*args, **kwargs)
+        self._pool = ThreadPoolExecutor(
+            max_workers=min(self.MAX_WORKERS, os.process_cpu_count() or 1)
+        )
+        # bumped for every folder, so that tiles of the last one are ignored
+        self._generation = 0
+        self._pending: dict[int, Future] = {}
+        self.set_images(folder, images)
+
+    def set_images(self, folder: str, images: list[str]) -> None:
+        """
+        Show another folder, from the top.
+        Args:
+            folder(str): The folder
+            images(list[str]): The images in it, in the order to show them in
+        """
+        self._generation += 1
+        for future in self._pending.values():
+            future.cancel()
+        self._pending = {}
+        self.folder = folder
+        self.images = images
+        self._tiles: dict[int, list[list[Segment]]] = {}
+        self.highlighted = 0
+        self._update_virtual_size()
+        if self.is_mounted:
+            self.scroll_to(0, 0, animate=False, immediate=True)
+            self.refresh()
+
+    @property
+    def columns(self) -> int:
+        """How many tiles fit next to each other."""
+        return max(1, (self.size.width + self.GAP) // (self.TILE_WIDTH + self.GAP))
+
+    @property
+    def row_height(self) -> int:
+        """How many lines a row of tiles takes, with its names and a gap."""
+        return self.TILE_HEIGHT + 2
+
+    def _update_virtual_size(self) -> None:
+        rows = -(-len(self.images) // self.columns)
+        self.virtual_size = Size(
+            self.columns * (self.TILE_WIDTH + self.GAP) - self.GAP,
+            rows * self.row_height,
+        )
+
+    def on_resize(self, event: events.Resize) -> None:
+        self._update_virtual_size()
+        self.refresh()
+
+    def on_unmount(self, event: events.Unmount) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def _wanted_tiles(self) -> list[int]:
+        """
+        Get the tiles that should be loaded, in the order to load them in.
+
+        Returns:
+            list[int]: the tiles on screen, then the ones around them
+        """
+        columns, row_height = self.columns, self.row_height
+        rows = -(-len(self.images) // columns)
+        first_row = self.scroll_offset.y // row_height
+        last_row = min(
+            rows - 1, (self.scroll_offset.y + self.size.height - 1) // row_height
+        )
+        ordered_rows = list(range(first_row, last_row + 1))
+        for margin in range(1, self.MARGIN_ROWS + 1):
+            ordered_rows.extend(
+                row
+                for row in (last_row + margin, first_row - margin)
+                if 0 <= row < rows
+            )
+        return [
+            index
+            for row in ordered_rows
+            for index in range(
+                row * columns, min((row + 1) * columns, len(self.images))
+            )
+        ]
+
+    def _load_tiles(self) -> None:
+        """Queue the tiles that are wanted, and drop the ones that aren't."""
+        wanted = self._wanted_tiles()
+        wanted_set = set(wanted)
+        for index, future in list(self._pending.items()):
+            if index not in wanted_set and future.cancel():
+                del self._pending[index]
+        for index in wanted:
+            if index not in self._tiles and index not in self._pending:
+                self._pending[index] = self._pool.submit(
+                    self._load_tile, self._generation, index, self.images[index]
+                )
+        for index in list(self._tiles):
+            if len(self._tiles) <= self.MAX_TILES:
+                break
+            if index not in wanted_set:
+                del self._tiles[index]
+
+    def _load_tile(self, generation: int, index: int, file_path: str) -> None:
+        """
+        Load a tile and hand it to the ui. This runs in the pool.
+        Args:
+            generation(int): Which folder the tile is of
+            index(int): The index of the image
+            file_path(str): The image
+        """
+        try:
+            image = thumbnails.load_tile(
+                file_path, self.TILE_WIDTH, config["settings"]["thumbnail_cache"]
+            )
+            rows = self._tile_rows(image)
+        except (
+            UnidentifiedImageError,
+            Image.DecompressionBombError,
+            OSError,
+            ValueError,
+        ):
+            # leave the tile empty, instead of trying again
+            rows = []
+        self.post_message(self.TileLoaded(generation, index, rows))
+
+    def _tile_rows(self, image: Image.Image) -> list[list[Segment]]:
+        """
+        Draw a tiny image with half cells, in the middle of a tile.
+        Args:
+            image(Image.Image): The image, no larger than the tile
+
+        Returns:
+            list[list[Segment]]: the segments of every row of the tile
+        """
+        image = image.convert("RGBA")
+        pixels = image.load()
+        left = (self.TILE_WIDTH - image.width) // 2
+        top = (self.TILE_HEIGHT * 2 - image.height) // 2
+
+        def color_at(x: int, y: int) -> Color | None:
+            x, y = x - left, y - top
+            if 0 <= x < image.width and 0 <= y < image.height:
+                red, green, blue, alpha = pixels[x, y]
+                # mostly see through pixels are left to the background
+                if alpha >= 128:
+                    return Color.from_rgb(red, green, blue)
+            return None
+
+        rows = []
+        for row in range(self.TILE_HEIGHT):
+            segments = []
+            for x in range(self.TILE_WIDTH):
+                upper, lower = color_at(x, row * 2), color_at(x, row * 2 + 1)
+                if upper is None and lower is None:
+                    segments.append(Segment(" "))
+                elif lower is None:
+                    segments.append(Segment("▀", Style(color=upper)))
+                elif upper is None:
+                    segments.append(Segment("▄", Style(color=lower)))
+                else:
+                    segments.append(Segment("▀", Style(color=upper, bgcolor=lower)))
+            rows.append(list(Segment.simplify(segments)))
+        return rows
+
+    def on_gallery_tile_loaded(self, event: TileLoaded) -> None:
+        event.stop()
+        if event.generation != self._generation:
+            return
+        self._pending.pop(event.index, None)
+        self._tiles[event.index] = event.rows
+        self.refresh()
+
+    def move_highlight(self, step: int) -> None:
+        """
+        Move the highlight by some tiles, and scroll it into view.
+        Args:
+            step(int): How many tiles to move by, negative to move back
+        """
+        if not self.images:
+            return
+        self.highlighted = max(0, min(len(self.images) - 1, self.highlighted + step))
+        row = self.highlighted // self.columns
+        self.scroll_to_region(
+            Region(0, row * self.row_height, 1, self.row_height),
+            animate=False,
+            immediate=True,
+        )
+        self.refresh()
+
+    def open_highlighted(self) -> None:
+        """Go to the folder, with the highlighted image highlighted."""
+        if self.images:
+            self.app.cd(
+                self.folder, focus_on=path.basename(self.images[self.highlighted])
+            )
+            self.app.query_one("#file_list").focus()
+
+    def on_click(self, event: events.Click) -> None:
+        column = (event.x + self.scroll_offset.x) // (self.TILE_WIDTH + self.GAP)
+        row = (event.y + self.scroll_offset.y) // self.row_height
+        index = row * self.columns + column
+        if column < self.columns and index < len(self.images):
+            if event.chain == 2 and index == self.highlighted:
+                self.open_highlighted()
+                return
+            self.highlighted = index
+            self.refresh()
+
+    def render_lines(self, crop: Region) -> list[Strip]:
+        # once for every repaint, rather than for every line
+        self._load_tiles()
+        return super().render_lines(crop)
+
+    def render_line(self, y: int) -> Strip:
+        """Render a line in the display.
+
+        Args:
+            y: The line to render.
+
+        Returns:
+            A [`Strip`][textual.strip.Strip] that is the line to render.
+        """
+        scroll_x, scroll_y = self.scroll_offset
+        width = self.size.width
+        row, line = divmod(scroll_y + y, self.row_height)
+        columns = self.columns
+        indices = range(row * columns, min((row + 1) * columns, len(self.images)))
+        if not indices or line > self.TILE_HEIGHT:
+            return Strip.blank(width, self.rich_style)
+        segments = []
+        for index in indices:
+            if segments:
+                segments.append(Segment(" " * self.GAP))
+            if line < self.TILE_HEIGHT:
+                rows = self._tiles.get(index)
+                if rows:
+                    segments.extend(rows[line])
+                else:
+                    segments.append(Segment(" " * self.TILE_WIDTH))
+            else:
+                name = Text(path.basename(self.images[index]), no_wrap=True)
+                name.truncate(self.TILE_WIDTH, overflow="ellipsis", pad=True)
+                if index == self.highlighted:
+                    name.stylize(self.get_component_rich_style("gallery--highlighted"))
+                segments.extend(name.render(self.app.console))
+        strip = Strip(Segment.apply_style(segments, self.rich_style))
+        return strip.crop_extend(scroll_x, scroll_x + width, self.rich_style)
@@ -0,0 +1,208 @@
+import mmap
+import os
+from typing import ClassVar
+
+from rich.segment import Segment
+from textual import events
+from textual.geometry import Region, Size
+from textual.scroll_view import ScrollView
+from textual.strip import Strip
+
+
+class HexView(ScrollView, can_focus=True):
+    """Hex and ASCII dump of a file, that only reads the rows on screen.
+
+    Every repaint maps just the part of the file that is on screen and copies
+    its bytes out, so a dump of a file of many GB takes as long and as little
+    memory as one of a few bytes. The file isn't kept open in between, so it
+    can still be renamed or deleted while it is shown.
+    """
+
+    COMPONENT_CLASSES: ClassVar[set[str]] = {"hex-view--offset", "hex-view--line"}
+
+    # how many bytes a row may show, in two groups. The most that fit the
+    # width of the view are used, so that the ascii column isn't cut off
+    ROW_BYTES: tuple[int, ...] = (16, 8, 4)
+
+    def __init__(self, file_path: str, *args, **kwargs) -> None:
+        """
+        Initialise the view.
+        Args:
+            file_path(str): The file to show
+        """
+        super().__init__(*args, **kwargs)
+        self.set_file(file_path)
+
+    def set_file(self, file_path: str) -> None:
+        """
+        Show another file, from the top.
+        Args:
+            file_path(str): The file to show
+        """
+        self.file_path = file_path
+        try:
+            self.file_size = os.stat(file_path).st_size
+        except OSError:
+            self.file_size = 0
+        # the offset of the byte whose row to pick out, if any
+        self.highlighted_offset: int | None = None
+        # enough hex digits for the last offset, and at least 8
+        self._offset_digits = max(8, len(f"{max(0, self.file_size - 1):x}"))
+        self.row_bytes = self._fitting_row_bytes(self.size.width)
+        # the offset and bytes of the rows that were on screen last
+        self._window: tuple[int, bytes] = (0, b"")
+        self.virtual_size = Size(self.row_width, self.row_count)
+        if self.is_mounted:
+            self.scroll_to(0, 0, animate=False, immediate=True)
+            self.refresh()
+
+    @property
+    def row_count(self) -> int:
+        """How many rows the file takes up."""
+        return -(-self.file_size // self.row_bytes)
+
+    @property
+    def row_width(self) -> int:
+        """How many cells a row takes up."""
+        return self._row_width(self.row_bytes)
+
+    def _row_width(self, row_bytes: int) -> int:
+        """
+        Get how many cells a row of some bytes takes up.
+        Args:
+            row_bytes(int): How many bytes the row shows
+
+        Returns:
+            int: the width of the row
+        """
+        # offset, 3 cells a byte with a wider gap between groups, and ascii
+        return self._offset_digits + 2 + row_bytes * 3 + 2 + row_bytes + 2
+
+    def _fitting_row_bytes(self, width: int) -> int:
+        """
+        Get how many bytes a row can show in some width.
+        Args:
+            width(int): The width of the view
+
+        Returns:
+            int: the most bytes that fit, or the fewest there are
+        """
+        for row_bytes in self.ROW_BYTES:
+            if self._row_width(row_bytes) <= width:
+                return row_bytes
+        return self.ROW_BYTES[-1]
+
+    @property
+    def highlighted_row(self) -> int | None:
+        """The row that is picked out, if any."""
+        if self.highlighted_offset is None:
+            return None
+        return self.highlighted_offset // self.row_bytes
+
+    def _read(self, offset: int, count: int) -> bytes:
+        """
+        Read some bytes of the file, through a map of only those bytes.
+        Args:
+            offset(int): Where to start
+            count(int): How many bytes to read, fewer are returned at the end
+
+        Returns:
+            bytes: the bytes, or none if the file can't be read anymore
+        """
+        try:
+            with open(self.file_path, "rb") as file:
+                size = os.fstat(file.fileno()).st_size
+                if offset >= size or count <= 0:
+                    return b""
+                # a map has to start at a multiple of the granularity
+                start = offset - offset % mmap.ALLOCATIONGRANULARITY
+                length = min(size, offset + count) - start
+                with mmap.mmap(
+                    file.fileno(), length, access=mmap.ACCESS_READ, offset=start
+                ) as buffer:
+                    return buffer[offset - start :]
+        except (OSError, ValueError):
+            return b""
+
+    def jump_to(self, offset: int) -> None:
+        """
+        Pick out the row with a byte, and scroll it into view.
+        Args:
+            offset(int): The offset of the byte, from the end if negative
+        """
+        if offset < 0:
+            offset += self.file_size
+        self.highlighted_offset = max(0, min(offset, self.file_size - 1))
+        self.scroll_to(
+            y=max(0, self.highlighted_row - self.size.height // 3),
+            animate=False,
+            immediate=True,
+        )
+        self.refresh()
+
+    def on_resize(self, event: events.Resize) -> None:
+        row_bytes = self._fitting_row_bytes(event.size.width)
+        if row_bytes != self.row_bytes:
+            # keep the same bytes at the top
+            top = self.scroll_offset.y * self.row_bytes
+            self.row_bytes = row_bytes
+            self.virtual_size = Size(self.row_width, self.row_count)
+            self.scroll_to(y=top // row_bytes, animate=False, immediate=True)
+        self.refresh()
+
+    def render_lines(self, crop: Region) -> list[Strip]:
+        # read the rows on screen at once, rather than a row at a time
+        first_row = self.scroll_offset.y + crop.y
+        self._window = (
+            first_row * self.row_bytes,
+            self._read(first_row * self.row_bytes, crop.height * self.row_bytes),
+        )
+        return super().render_lines(crop)
+
+    def render_line(self, y: int) -> Strip:
+        """Render a line in the display.
+
+        Args:
+            y: The line to render.
+
+        Returns:
+            A [`Strip`][textual.strip.Strip] that is the line to render.
+        """
+        scroll_x, scroll_y = self.scroll_offset
+        width = self.size.width
+        row = scroll_y + y
+        offset = row * self.row_bytes
+        window_offset, window = self._window
+        if window_offset <= offset < window_offset + len(window):
+            data = window[
+                offset - window_offset : offset - window_offset + self.row_bytes
+            ]
+        else:
+            data = self._read(offset, self.row_bytes)
+        if not data:
+            return Strip.blank(width, self.rich_style)
+        style = (
+            self.get_component_rich_style("hex-view--line")
+            if row == self.highlighted_row
+            else self.rich_style
+        )
+        half = self.row_bytes // 2
+        hex_bytes = " ".join(
+            f"{data[index]:02x}" if index < len(data) else "  "
+            for index in range(self.row_bytes)
+        )
+        # a wider gap between the two groups
+        hex_bytes = hex_bytes[: half * 3] + " " + hex_bytes[half * 3 :]
+        ascii_bytes = "".join(
+            chr(byte) if 0x20 <= byte < 0x7F else "." for byte in data
+        )
+        segments = [
+            Segment(
+                f"{offset:0{self._offset_digits}x}",
+                self.get_component_rich_style("hex-view--offset", partial=True),
+            ),
+            Segment(f"  {hex_bytes}  "),
+            Segment(f"|{ascii_bytes}|"),
+        ]
+        strip = Strip(Segment.apply_style(segments, style))
+        return strip.crop_extend(scroll_x, scroll_x + width, style)
@@ -1,20 +1,39 @@
 import asyncio
-import asyncio.subprocess
+import os
+import re
 import tarfile
 import zipfile
+from contextlib import suppress
 from os import path
-from typing import ClassVar
+from typing import Callable, ClassVar
 
-import textual_image.widget as timg
+from PIL import Image, UnidentifiedImageError
 from rich.text import Text
 from textual import events, on, work
 from textual.app import ComposeResult
 from textual.binding import Binding, BindingType
 from textual.containers import Container
-from textual.widgets import Static, TextArea
+from textual.css.query import NoMatches
+from textual.types import OptionDoesNotExist
+from textual.widgets import Input, Static, TextArea
+from textual.worker import get_current_worker
 
-from rovr.classes import Archive
-from rovr.core import FileList
+from rovr.classes import (
+    BatRunner,
+    MappedDocument,
+    PreviewCache,
+    cached_image,
+)
+from rovr.classes.mapped_document import INDEX_STEP
+from rovr.core import DocumentView, FileList, Gallery, HexView
+from rovr.functions import archive_index, compressed, thumbnails
+from rovr.functions import path as path_utils
+from rovr.functions.grep import find_line_offsets
+from rovr.functions.highlight import (
+    HIGHLIGHT_LIMIT,
+)
+from rovr.functions.preview import BYTES_PER_LINE, read_lines, read_text
+from rovr.functions.sniff import SNIFF_SIZE, sniff, sniff_bytes
 from rovr.variables.constants import PreviewContainerTitles, config
 from rovr.variables.maps import ARCHIVE_EXTENSIONS, EXT_TO_LANG_MAP, PIL_EXTENSIONS
 
@@ -140,16 +159,51 @@ class CustomTextArea(TextArea, inherit_bindings=False):
 
 
 class PreviewContainer(Container):
+    # how many lines more than fit are read for a clipped text preview
+    WINDOW_MARGIN: int = 16
+    # how many bytes prefetching the files around the highlighted one may read
+    PREFETCH_BUDGET: int = 32 * 1024 * 1024
+
     def __init__(self, *args, **kwargs) -> None:
         super().__init__(*args, **kwargs)
         self._queued_task = None
         self._queued_task_args: str | None = None
-        self._current_content: str | list[str] | None = None
+        # the file that the highlight is on, and the files around it
+        self._prefetch_paths: tuple[str, list[str]] | None = None
+        self._bat = BatRunner(
+            config["plugins"]["bat"]["executable"],
+            config["plugins"]["bat"]["show_line_numbers"],
+            config["plugins"]["bat"]["timeout"],
+        )
+        self._current_content: str | list[str] | MappedDocument | None = None
+        # the decoded image, if it could be decoded ahead of time
+        self._current_image: Image.Image | None = None
+        self._cache = PreviewCache(config["settings"]["preview_cache_mb"] * 1024 * 1024)
+        # the line of the file that a clipped text preview's content starts at
+        self._content_first_line = 1
+        # how many lines the clipped text preview that is shown read
+        self._window_lines = 0
         self._current_file_path = None
         self._is_image = False
         self._is_archive = False
+        # the member of the previewed archive that is shown instead of the
+        # top of it, and its text, or what is in it if it is a folder
+        self._member: tuple[str, str | list[str]] | None = None
+        # whether folders of images are previewed as a grid of them
+        self.gallery_enabled = config["settings"]["gallery"]
         self._initial_height = self.size.height
         self._current_preview_type = "none"
+        # the line (and its byte offset, if known) to scroll to the next
+        # time a file is previewed
+        self._target_line: tuple[str, int, int | None] | None = None
+        self._current_line: int | None = None
+        # (line number, byte offset) of every line that the find bar matched
+        self._find_hits: list[tuple[int, int]] = []
+        self._find_index = -1
+        self._find_is_regex = False
+        self._finding = False
+        # what the find bar held when it was closed, for when it is opened again
+        self._find_query = ""
 
     def compose(self) -> ComposeResult:
         # for some unknown reason, it started causing KeyErrors
@@ -173,14 +227,17 @@ class PreviewContainer(Container):
             self.remove_class("bat", "full", "clip")
 
             try:
-                await self.mount(
-                    timg.__dict__[config["settings"]["image_protocol"] + "Image"](
-                        self._current_file_path,
-                        id="image_preview",
-                        classes="inner_preview",
-                    )
+                image_widget = cached_image.CACHED_IMAGES.get(
+                    config["settings"]["image_protocol"], cached_image.CachedImage
+                )
+                image_preview = image_widget(
+                    self._current_image or self._current_file_path,
+                    id="image_preview",
+                    classes="inner_preview",
                 )
-                self.query_one("#image_preview").can_focus = True
+                image_preview.payload_key = self._image_payload_key()
+                image_preview.can_focus = True
+                await self.mount(image_preview)
             except FileNotFoundError:
                 await self.mount(
                     CustomTextArea(
@@ -196,45 +253,71 @@ class PreviewContainer(Container):
             self._current_preview_type = "image"
         else:
             try:
-                self.query_one("#image_preview").image = self._current_file_path
+                image_preview = self.query_one("#image_preview")
+                image_preview.payload_key = self._image_payload_key()
+                image_preview.image = self._current_image or self._current_file_path
             except Exception:
                 self._current_preview_type = "none"
                 # re-make the widget itself
                 await self._show_image_preview()
         self.border_title = titles.image
 
+    def _image_payload_key(self) -> tuple | None:
+        """
+        Get what identifies the version of the image being shown, so that
+        the image widget can reuse what it encoded for it before.
+
+        Returns:
+            tuple | None: the key, or None if the image can't be stat'ed
+        """
+        return self._cache.key(
+            self._current_file_path,
+            "image",
+            self._current_image.size if self._current_image else None,
+        )
+
+    def _bat_command(self, file_path: str, line: int | None) -> list[str]:
+        """
+        Get the command that renders a preview with bat.
+        Args:
+            file_path(str): The file path
+            line(int | None): The line to highlight and show, if any
+
+        Returns:
+            list[str]: the command
+        """
+        line_range = None
+        if not config["settings"]["preview_full"]:
+            max_lines = self.size.height
+            if max_lines > 0:
+                first_line = 1 if line is None else max(1, line - max_lines // 3)
+                line_range = (first_line, first_line + max_lines - 1)
+        return self._bat.command(file_path, line, line_range)
+
     async def _show_bat_file_preview(self) -> bool:
         """Render file preview using bat, updating in place if possible.
         Returns:
-            bool: whether or not the action was successful"""
-        bat_executable = config["plugins"]["bat"]["executable"]
+            bool: whether or not the action was successful, or was given up
+                because another preview was asked for"""
         preview_full = config["settings"]["preview_full"]
-        command = [
-            bat_executable,
-            "--force-colorization",
-            "--paging=never",
-            "--style=numbers"
-            if config["plugins"]["bat"]["show_line_numbers"]
-            else "--style=plain",
-        ]
-        if not preview_full:
-            max_lines = self.size.height
-            if max_lines > 0:
-                command.append(f"--line-range=:{max_lines}")
-        command.append(self._current_file_path)
+        command = self._bat_command(self._current_file_path, self._current_line)
+        cache_key = self._cache.key(self._current_file_path, "bat", *command)
 
         try:
-            process = await asyncio.create_subprocess_exec(
-                *command,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE,
-            )
-            stdout, stderr = await process.communicate()
-
-            if process.returncode == 0:
-                bat_output = stdout.decode("utf-8", errors="ignore")
-                new_content = Text.from_ansi(bat_output)
+            if (new_content := self._cache.get(cache_key)) is None:
+                result = await asyncio.to_thread(
+                    self._bat.run, command, self._is_superseded
+                )
+                if result is None:
+                    # killed, another preview is on its way
+                    return True
+                returncode, stdout, stderr = result
+                if returncode == 0:
+                    bat_output = stdout.decode("utf-8", errors="ignore")
+                    new_content = Text.from_ansi(bat_output)
+                    self._cache.put(cache_key, new_content)
 
+            if new_content is not None:
                 if self._current_preview_type != "bat":
                     self._current_preview_type = "none"
                     await self.remove_children()
@@ -253,6 +336,12 @@ class PreviewContainer(Container):
                 self.remove_class("full", "clip")
                 if preview_full:
                     self.add_class("full")
+                    if self._current_line is not None:
+                        self.call_after_refresh(
+                            self.scroll_to,
+                            y=max(0, self._current_line - 1 - self.size.height // 3),
+                            animate=False,
+                        )
                 else:
                     self.add_class("clip")
                 return True
@@ -273,13 +362,23 @@ class PreviewContainer(Container):
     async def _show_normal_file_preview(self) -> None:
         """Render file preview using TextArea, updating in place if possible."""
         text_to_display = self._current_content
+        file_name = compressed.inner_name(self._current_file_path)
+        if self._member is not None:
+            file_name, text_to_display = self._member
         preview_full = config["settings"]["preview_full"]
+        # the row of the text area that shows the target line
+        target_row = None if self._current_line is None else self._current_line - 1
         if not preview_full:
             lines = text_to_display.splitlines()
             max_lines = self.size.height
             if max_lines > 0:
-                if len(lines) > max_lines:
-                    lines = lines[:max_lines]
+                first_line = 0
+                if target_row is not None:
+                    # the content is a window that starts further down the file
+                    target_row -= self._content_first_line - 1
+                    first_line = max(0, target_row - max_lines // 3)
+                    target_row -= first_line
+                lines = lines[first_line : first_line + max_lines]
             else:
                 lines = []
             max_width = self.size.width - 5
@@ -293,17 +392,17 @@ class PreviewContainer(Container):
                 lines = processed_lines
             text_to_display = "\n".join(lines)
 
-        is_special_content = self._current_content in (
+        is_special_content = text_to_display in (
             config["interface"]["preview_binary"],
             config["interface"]["preview_error"],
         )
-        language = (
-            "markdown"
-            if is_special_content
-            else EXT_TO_LANG_MAP.get(
-                path.splitext(self._current_file_path)[1], "markdown"
-            )
-        )
+        if is_special_content:
+            language = "markdown"
+        elif len(text_to_display) > HIGHLIGHT_LIMIT:
+            # far too much to parse as a whole, every time it is shown
+            language = None
+        else:
+            language = EXT_TO_LANG_MAP.get(path.splitext(file_name)[1], "markdown")
 
         if self._current_preview_type != "normal_text":
             self._current_preview_type = "none"
@@ -327,8 +426,66 @@ class PreviewContainer(Container):
             text_area.text = text_to_display
             text_area.language = language
 
+        if target_row is not None:
+            text_area = self.query_one("#text_preview", CustomTextArea)
+            if target_row < text_area.document.line_count:
+                text_area.select_line(target_row)
+                self.call_after_refresh(
+                    text_area.scroll_cursor_visible, center=True, animate=False
+                )
         self.border_title = titles.file
 
+    async def _show_document_preview(self) -> None:
+        """Render a full file preview that only reads the lines on screen."""
+        bat = self._bat if config["plugins"]["bat"]["enabled"] else None
+        if self._current_preview_type != "document":
+            self._current_preview_type = "none"
+            await self.remove_children()
+            self.remove_class("bat", "full", "clip")
+
+            await self.mount(
+                DocumentView(
+                    self._current_content,
+                    self._cache,
+                    bat,
+                    id="text_preview",
+                    classes="inner_preview",
+                )
+            )
+            self._current_preview_type = "document"
+        else:
+            self.query_one("#text_preview", DocumentView).set_document(
+                self._current_content, bat
+            )
+
+        if self._current_line is not None:
+            # the view only knows its height once it is laid out
+            self.call_after_refresh(
+                self.query_one("#text_preview", DocumentView).show_line,
+                self._current_line - 1,
+            )
+        self.border_title = titles.file if bat is None else titles.bat
+
+    async def _show_hex_preview(self) -> None:
+        """Render a binary file as a hex dump that only reads the rows on screen."""
+        if self._current_preview_type != "hex":
+            self._current_preview_type = "none"
+            await self.remove_children()
+            self.remove_class("bat", "full", "clip")
+
+            await self.mount(
+                HexView(
+                    self._current_file_path,
+                    id="text_preview",
+                    classes="inner_preview",
+                )
+            )
+            self._current_preview_type = "hex"
+        else:
+            await self.close_offset_bar()
+            self.query_one("#text_preview", HexView).set_file(self._current_file_path)
+        self.border_title = titles.hex
+
     async def _render_preview(self) -> None:
         """Render function dispatcher."""
         if self._current_file_path is None:
@@ -339,12 +496,30 @@ class PreviewContainer(Container):
             return
 
         if self._is_archive:
-            await self._show_archive_preview()
+            if self._member is None or isinstance(self._member[1], list):
+                await self._show_archive_preview()
+            else:
+                await self._show_normal_file_preview()
+                self.border_title = titles.member
+            self.border_subtitle = "" if self._member is None else self._member[0]
             return
 
         if self._current_content is None:
             return
 
+        if isinstance(self._current_content, MappedDocument):
+            await self._show_document_preview()
+            return
+
+        if (
+            self._current_content == config["interface"]["preview_binary"]
+            and config["settings"]["hex_preview"]
+            # a dump would only show the compressed bytes
+            and compressed.compression(self._current_file_path) is None
+        ):
+            await self._show_hex_preview()
+            return
+
         # you wouldn't want to re-render a failed thing, would you?
         is_special_content = self._current_content in (
             config["interface"]["preview_binary"],
@@ -354,6 +529,8 @@ class PreviewContainer(Container):
         if (
             config["plugins"]["bat"]["enabled"]
             and not is_special_content
+            # bat would only see the compressed bytes
+            and compressed.compression(self._current_file_path) is None
             and await self._show_bat_file_preview()
         ):
             self.log("bat success")
@@ -389,6 +566,37 @@ class PreviewContainer(Container):
         )
         self.border_title = titles.folder
 
+    async def _show_gallery_preview(self, folder_path: str, images: list[str]) -> None:
+        """
+        Show the images in a folder as a grid, updating in place if possible.
+        Args:
+            folder_path(str): The folder path
+            images(list[str]): The images in the folder
+        """
+        if self._current_preview_type != "gallery":
+            self._current_preview_type = "none"
+            await self.remove_children()
+            self.remove_class("bat", "full", "clip")
+
+            await self.mount(
+                Gallery(
+                    folder_path,
+                    images,
+                    id="gallery_preview",
+                    classes="inner_preview",
+                )
+            )
+            self._current_preview_type = "gallery"
+        else:
+            self.query_one(Gallery).set_images(folder_path, images)
+        self.border_title = titles.gallery
+
+    def toggle_gallery(self) -> None:
+        """Switch between previewing folders as a list and as a gallery."""
+        self.gallery_enabled = not self.gallery_enabled
+        if self._current_preview_type in ("folder", "gallery"):
+            self.show_preview(self._current_file_path)
+
     async def _show_archive_preview(self) -> None:
         """Render archive preview, updating in place if possible."""
         if self._current_preview_type != "archive":
@@ -407,10 +615,122 @@ class PreviewContainer(Container):
             self._current_preview_type = "archive"
 
         self.query_one("#archive_preview", FileList).create_archive_list(
-            self._current_content
+            self._current_content if self._member is None else self._member[1]
         )
         self.border_title = titles.archive
 
+    def show_member(self, member: str, highlight: str | None = None) -> None:
+        """
+        Preview a member of the previewed archive, in place of the top of it
+        Args:
+            member(str): The name of the member, a folder ending with a `/`
+            highlight(str | None): The member to highlight in a folder
+        """
+        if self._is_archive and self._current_file_path is not None:
+            self._load_member(self._current_file_path, member, highlight)
+
+    @work(thread=True, exclusive=True, group="archive_member")
+    def _load_member(self, file_path: str, member: str, highlight: str | None) -> None:
+        """
+        Read the start of a member of an archive, or list what is in a folder
+        of it, and show it if the archive is still previewed.
+        Args:
+            file_path(str): The archive
+            member(str): The name of the member, a folder ending with a `/`
+            highlight(str | None): The member to highlight in a folder
+        """
+        worker = get_current_worker()
+        content: str | list[str]
+        try:
+            if member.endswith("/"):
+                members, complete = archive_index.scan_members(
+                    file_path, lambda: worker.is_cancelled
+                )
+                content = archive_index.top_level(members, member)
+                if not complete:
+                    content.append(archive_index.MORE)
+            else:
+                head, complete = archive_index.read_member(
+                    file_path, member, lambda: worker.is_cancelled
+                )
+                kind, encoding = sniff_bytes(head[:SNIFF_SIZE])
+                content = (
+                    compressed.decode_head(head, encoding, complete)
+                    if kind == "text"
+                    else config["interface"]["preview_binary"]
+                )
+        except UnicodeDecodeError:
+            content = config["interface"]["preview_binary"]
+        except (zipfile.BadZipFile, tarfile.TarError, KeyError, ValueError, OSError):
+            content = config["interface"]["preview_error"]
+        if not worker.is_cancelled:
+            self.app.call_from_thread(
+                self._show_member, file_path, member, content, highlight
+            )
+
+    async def _show_member(
+        self,
+        file_path: str,
+        member: str,
+        content: str | list[str],
+        highlight: str | None,
+    ) -> None:
+        if file_path != self._current_file_path or not self._is_archive:
+            return
+        self._member = (member, content)
+        await self._render_preview()
+        self._focus_member(highlight)
+
+    def _focus_member(self, highlight: str | None) -> None:
+        """
+        Focus what shows the member, highlighting a member in a listing
+        Args:
+            highlight(str | None): The member to highlight
+        """
+        with suppress(NoMatches):
+            if self._current_preview_type != "archive":
+                self.query_one("#text_preview").focus()
+                return
+            file_list = self.query_one("#archive_preview", FileList)
+            if highlight is not None:
+                with suppress(OptionDoesNotExist):
+                    file_list.highlighted = file_list.get_option_index(
+                        path_utils.compress(highlight)
+                    )
+            file_list.focus()
+
+    async def close_member(self) -> None:
+        """Go back from a member of the previewed archive to the folder it is in."""
+        if self._member is None:
+            return
+        member = self._member[0]
+        folder = member.rstrip("/").rpartition("/")[0]
+        if folder:
+            self.show_member(folder + "/", highlight=member)
+            return
+        self.workers.cancel_group(self, "archive_member")
+        self._member = None
+        await self._render_preview()
+        self._focus_member(member)
+
+    def show_line(self, file_path: str, line: int, offset: int | None = None) -> None:
+        """
+        Scroll to a line the next time a file is previewed
+        Args:
+            file_path(str): The file path
+            line(int): The 1-based line number
+            offset(int | None): The byte offset of the start of the line, if known
+        """
+        self._target_line = (file_path, line, offset)
+
+    def _is_superseded(self) -> bool:
+        """
+        Check whether another preview was asked for while this one loads.
+        Returns:
+            bool: whether the preview that is loading is no longer wanted
+        """
+        return self._queued_task is not None
+
     def any_in_queue(self) -> bool:
         if self._queued_task is not None:
             self._queued_task(self._queued_task_args)
@@ -418,12 +738,18 @@ class PreviewContainer(Container):
             return True
         return False
 
-    def show_preview(self, file_path: str) -> None:
+    def show_preview(self, file_path: str, prefetch: list[str] | None = None) -> None:
         """
         Debounce requests, then show preview
         Args:
             file_path(str): The file path
+            prefetch(list[str] | None): Files to load into the preview cache
+                once this preview is shown, most likely to be next first
         """
+        # the highlight moved, so whatever was being prefetched can wait
+        self.workers.cancel_group(self, "preview_prefetch")
+        if prefetch is not None:
+            self._prefetch_paths = (file_path, prefetch)
         if (
             any(
                 worker.is_running
@@ -444,91 +770,240 @@ class PreviewContainer(Container):
         else:
             self._perform_show_preview(file_path)
 
-    @work(thread=True)
-    def _perform_show_preview(self, file_path: str) -> None:
+    def _load_file(
+        self,
+        file_path: str,
+        window_lines: int,
+        is_cancelled: Callable[[], bool],
+        target: tuple[str, int, int | None] | None = None,
+    ) -> tuple[
+        bool, bool, str | list[str] | MappedDocument | None, int, Image.Image | None
+    ]:
         """
-        Load file content in a worker and then render the preview.
+        Load what is needed to preview a file, through the preview cache.
+        This runs in a worker.
         Args:
             file_path(str): The file path
-        """
-        if self.any_in_queue():
-            return
+            window_lines(int): How many lines a clipped text preview reads
+            is_cancelled(Callable[[], bool]): Checked regularly, to stop early
+            target(tuple | None): The file, line and offset to show, if any
 
-        if path.isdir(file_path):
-            self.app.call_from_thread(self._update_ui, file_path, is_dir=True)
-        else:
-            is_image = any(file_path.endswith(ext) for ext in PIL_EXTENSIONS)
-            is_archive = any(file_path.endswith(ext) for ext in ARCHIVE_EXTENSIONS)
-            content = None
-            if is_archive:
+        Returns:
+            tuple: whether it is an image, whether it is an archive, the text,
+                archive listing or indexed file, the line the text starts at, and the
+                decoded image
+        """
+        is_image = any(file_path.endswith(ext) for ext in PIL_EXTENSIONS)
+        # a single compressed file is decompressed as far as the preview needs
+        compression = compressed.compression(file_path)
+        is_archive = compression is None and any(
+            file_path.endswith(ext) for ext in ARCHIVE_EXTENSIONS
+        )
+        preview_full = config["settings"]["preview_full"]
+        content = None
+        image = None
+        first_line = 1
+        # only complete results are cached, once it's clear they were
+        # read to the end
+        cache_key, result = None, None
+        kind, encoding = None, "utf-8"
+        if not is_image and not is_archive and compression is None:
+            # look at the first few KB before reading any more of it
+            kind, encoding = sniff(file_path)
+            is_image = kind == "image"
+        if compression is not None:
+            cache_key = self._cache.key(file_path, "compressed")
+            content = self._cache.get(cache_key)
+            if content is None:
                 try:
-                    with Archive(file_path, "r") as archive:
-                        if config["settings"]["preview_full"]:
-                            all_files = []
-                            for member in archive.infolist():
-                                filename = getattr(
-                                    member, "filename", getattr(member, "name", "")
-                                )
-                                is_dir_func = getattr(
-                                    member, "is_dir", getattr(member, "isdir", None)
-                                )
-                                is_dir = (
-                                    is_dir_func()
-                                    if is_dir_func
-                                    else filename.replace("\\", "/").endswith("/")
-                                )
-                                if not is_dir:
-                                    all_files.append(filename)
-                        else:
-                            top_level_files = set()
-                            top_level_dirs = set()
-                            for member in archive.infolist():
-                                filename = getattr(
-                                    member, "filename", getattr(member, "name", "")
-                                )
-                                is_dir_func = getattr(
-                                    member, "is_dir", getattr(member, "isdir", None)
-                                )
-                                is_dir = (
-                                    is_dir_func()
-                                    if is_dir_func
-                                    else filename.replace("\\", "/").endswith("/")
-                                )
-
-                                filename = filename.replace("\\", "/")
-                                if not filename:
-                                    continue
-
-                                parts = filename.strip("/").split("/")
-                                if len(parts) == 1 and not is_dir:
-                                    top_level_files.add(parts[0])
-                                elif parts and parts[0]:
-                                    top_level_dirs.add(parts[0])
-
-                            top_level_files -= top_level_dirs
-                            all_files = sorted([
-                                d + "/" for d in top_level_dirs
-                            ]) + sorted(list(top_level_files))
-                    content = all_files
+                    head, complete = compressed.read_head(file_path, is_cancelled)
+                    kind, encoding = sniff_bytes(head[:SNIFF_SIZE])
+                    if kind == "archive":
+                        # a tarball without .tar in its name
+                        is_archive = True
+                    elif kind == "text":
+                        content = compressed.decode_head(head, encoding, complete)
+                    else:
+                        content = config["interface"]["preview_binary"]
+                    result = content
+                except UnicodeDecodeError:
+                    content = result = config["interface"]["preview_binary"]
+                except OSError:
+                    content = config["interface"]["preview_error"]
+        if is_archive:
+            cache_key = self._cache.key(file_path, "archive", preview_full)
+            content = self._cache.get(cache_key)
+            if content is None:
+                try:
+                    members, complete = archive_index.scan_members(
+                        file_path, is_cancelled
+                    )
+                    content = (
+                        archive_index.files(members)
+                        if preview_full
+                        else archive_index.top_level(members)
+                    )
+                    if complete:
+                        result = content
+                    else:
+                        content.append(archive_index.MORE)
                 except (
                     zipfile.BadZipFile,
                     tarfile.TarError,
                     ValueError,
-                    FileNotFoundError,
+                    OSError,
                 ):
                     content = [config["interface"]["preview_error"]]
-            elif not is_image:
+        elif compression is not None:
+            # decompressed above
+            pass
+        elif is_image:
+            # decode it here, so that the ui thread only has to draw it
+            size = thumbnails.size_for(
+                self.size.width,
+                self.size.height,
+                cached_image.cell_pixels(config["settings"]["image_protocol"]),
+            )
+            cache_key = self._cache.key(file_path, "image", size)
+            image = self._cache.get(cache_key)
+            if image is None:
                 try:
-                    with open(file_path, "r", encoding="utf-8") as f:
-                        content = f.read()
-                except UnicodeDecodeError:
-                    content = config["interface"]["preview_binary"]
-                except (FileNotFoundError, PermissionError, OSError, MemoryError):
-                    # not taking my chances with a memory error
+                    image = result = self._load_image(file_path, size)
+                except (
+                    UnidentifiedImageError,
+                    Image.DecompressionBombError,
+                    OSError,
+                    ValueError,
+                ):
+                    # don't let the image widget try to decode it again
+                    is_image = False
                     content = config["interface"]["preview_error"]
+        elif kind != "text":
+            content = config["interface"]["preview_binary"]
+        elif preview_full and encoding not in ("utf-16", "utf-32"):
+            # only index the lines, the view reads the ones it shows. The start
+            # is indexed here, and the view indexes the rest while it is shown
+            cache_key = self._cache.key(file_path, "document", encoding)
+            content = self._cache.get(cache_key)
+            if content is None:
+                document = MappedDocument(file_path, encoding)
+                try:
+                    document.index_more(is_cancelled)
+                    content = document
+                    if not is_cancelled():
+                        # the index is grown in place, so it is cached at once
+                        self._cache.put(cache_key, document, document.index_size)
+                except OSError:
+                    content = config["interface"]["preview_error"]
+        else:
+            hint = None
+            if preview_full:
+                cache_key = self._cache.key(file_path, "full")
+            else:
+                # only read the lines that fit, around the line to show
+                if target is not None and target[0] == file_path:
+                    first_line = max(
+                        1, target[1] - (window_lines - self.WINDOW_MARGIN) // 3
+                    )
+                    if target[2] is not None:
+                        hint = (target[1], target[2])
+                cache_key = self._cache.key(file_path, "clip", first_line, window_lines)
+            try:
+                if (cached := self._cache.get(cache_key)) is not None:
+                    first_line, content = cached
+                else:
+                    if preview_full:
+                        content = read_text(file_path, encoding, is_cancelled)
+                    else:
+                        first_line, content = read_lines(
+                            file_path,
+                            first_line,
+                            window_lines,
+                            hint,
+                            encoding,
+                            is_cancelled,
+                        )
+                    result = (first_line, content)
+            except UnicodeDecodeError:
+                content = config["interface"]["preview_binary"]
+            except (FileNotFoundError, PermissionError, OSError, MemoryError):
+                # not taking my chances with a memory error
+                content = config["interface"]["preview_error"]
+
+        if result is not None and not is_cancelled():
+            self._cache.put(cache_key, result)
+        return is_image, is_archive, content, first_line, image
+
+    def _load_image(self, file_path: str, size: str) -> Image.Image:
+        """
+        Load an image, from its thumbnail if it has an up to date one.
+        This runs in a worker.
+        Args:
+            file_path(str): The file path
+            size(str): The size of thumbnail that fills the preview
+
+        Returns:
+            Image.Image: the image, scaled down to the size of thumbnail
+        """
+        use_thumbnails = config["settings"]["thumbnail_cache"]
+        if use_thumbnails and (image := thumbnails.load(file_path, size)):
+            return image
+        image, original_size = thumbnails.decode(file_path, thumbnails.SIZES[size])
+        if use_thumbnails and image.size != original_size:
+            self.app.call_from_thread(
+                self._save_thumbnail, file_path, image, size, original_size
+            )
+        return image
 
+    @work(thread=True, group="thumbnails")
+    def _save_thumbnail(
+        self,
+        file_path: str,
+        image: Image.Image,
+        size: str,
+        original_size: tuple[int, int],
+    ) -> None:
+        """
+        Write the thumbnail of an image to the shared thumbnail directory.
+        Args:
+            file_path(str): The file path
+            image(Image.Image): The image, scaled down to the size
+            size(str): The size of thumbnail
+            original_size(tuple[int, int]): The size of the image itself
+        """
+        with suppress(OSError, ValueError):
+            thumbnails.save(file_path, image, size, original_size)
+
+    @work(thread=True)
+    def _perform_show_preview(self, file_path: str) -> None:
+        """
+        Load file content in a worker and then render the preview.
+        Args:
+            file_path(str): The file path
+        """
+        if self.any_in_queue():
+            return
+
+        if path.isdir(file_path):
+            self.app.call_from_thread(
+                self._update_ui,
+                file_path,
+                is_dir=True,
+                content=thumbnails.list_images(file_path)
+                if self.gallery_enabled
+                else None,
+            )
+        else:
+            # worked out here, as the ui thread may change it in the meantime
+            window_lines = max(self.size.height, 1) + self.WINDOW_MARGIN
+            is_image, is_archive, content, first_line, image = self._load_file(
+                file_path, window_lines, self._is_superseded, self._target_line
+            )
             if self.any_in_queue():
                 return
+            if is_archive and content and content[-1] == archive_index.MORE:
+                # read the rest without a budget, for the next time
+                self.app.call_from_thread(self._index_archive, file_path)
 
             self.app.call_from_thread(
                 self._update_ui,
@@ -537,12 +1012,104 @@ class PreviewContainer(Container):
                 is_image=is_image,
                 is_archive=is_archive,
                 content=content,
+                first_line=first_line,
+                image=image,
+                window_lines=window_lines,
             )
 
         if self.any_in_queue():
             return
         else:
             self._queued_task = None
+            if (
+                self._prefetch_paths is not None
+                and self._prefetch_paths[0] == file_path
+            ):
+                self.app.call_from_thread(
+                    self._prefetch,
+                    self._prefetch_paths[1],
+                    max(self.size.height, 1) + self.WINDOW_MARGIN,
+                )
+
+    @work(thread=True, exclusive=True, group="archive_index")
+    def _index_archive(self, file_path: str) -> None:
+        """
+        Read every member of an archive into its index on disk, and show them
+        all if the archive is still previewed.
+        Args:
+            file_path(str): The archive
+        """
+        worker = get_current_worker()
+        try:
+            _, complete = archive_index.scan_members(
+                file_path, lambda: worker.is_cancelled, budget=False
+            )
+        except (zipfile.BadZipFile, tarfile.TarError, ValueError, OSError):
+            return
+        if complete and self._current_file_path == file_path:
+            self.app.call_from_thread(self.show_preview, file_path)
+
+    @work(thread=True, exclusive=True, group="preview_prefetch")
+    def _prefetch(self, file_paths: list[str], window_lines: int) -> None:
+        """
+        Load previews of files into the preview cache, until the highlight moves.
+        Args:
+            file_paths(list[str]): The files, in the order to load them in
+            window_lines(int): How many lines a clipped text preview reads
+        """
+        worker = get_current_worker()
+
+        def is_cancelled() -> bool:
+            return worker.is_cancelled
+
+        budget = self.PREFETCH_BUDGET
+        for file_path in file_paths:
+            if budget <= 0 or is_cancelled():
+                return
+            try:
+                size = os.stat(file_path).st_size
+            except OSError:
+                continue
+            _, _, content, _, _ = self._load_file(file_path, window_lines, is_cancelled)
+            if isinstance(content, str) and not config["settings"]["preview_full"]:
+                # only the lines that fit were read
+                size = min(size, window_lines * BYTES_PER_LINE)
+            elif isinstance(content, MappedDocument):
+                # only the start was indexed
+                size = min(size, INDEX_STEP)
+            budget -= size
+            if (
+                config["plugins"]["bat"]["enabled"]
+                and not config["settings"]["preview_full"]
+                and isinstance(content, str)
+                and compressed.compression(file_path) is None
+                and content
+                not in (
+                    config["interface"]["preview_binary"],
+                    config["interface"]["preview_error"],
+                )
+            ):
+                self._prefetch_bat(file_path, is_cancelled)
+
+    def _prefetch_bat(self, file_path: str, is_cancelled: Callable[[], bool]) -> None:
+        """
+        Render a preview with bat into the preview cache. This runs in a worker.
+        Args:
+            file_path(str): The file path
+            is_cancelled(Callable[[], bool]): Checked regularly, to kill bat early
+        """
+        command = self._bat_command(file_path, None)
+        cache_key = self._cache.key(file_path, "bat", *command)
+        if self._cache.get(cache_key) is not None:
+            return
+        try:
+            result = self._bat.run(command, is_cancelled)
+        except OSError:
+            return
+        if result is not None and result[0] == 0:
+            self._cache.put(
+                cache_key, Text.from_ansi(result[1].decode("utf-8", errors="ignore"))
+            )
 
     async def _update_ui(
         self,
@@ -550,24 +1117,53 @@ class PreviewContainer(Container):
         is_dir: bool,
         is_image: bool = False,
         is_archive: bool = False,
-        content: str | list[str] | None = None,
+        content: str | list[str] | MappedDocument | None = None,
+        first_line: int = 1,
+        image: Image.Image | None = None,
+        window_lines: int = 0,
     ) -> None:
         """
         Update the preview UI. This runs on the main thread.
         """
+        if file_path != self._current_file_path:
+            await self.close_find_bar()
+            self.workers.cancel_group(self, "archive_member")
+            self._member = None
         self._current_file_path = file_path
         if is_dir:
             self._is_image = False
             self._current_content = None
-            await self._show_folder_preview(file_path)
+            if content:
+                await self._show_gallery_preview(file_path, content)
+            else:
+                await self._show_folder_preview(file_path)
         else:
             self._is_image = is_image
             self._is_archive = is_archive
             self._current_content = content
+            self._current_image = image
+            self._content_first_line = first_line
+            self._window_lines = window_lines
+            if self._target_line is not None and self._target_line[0] == file_path:
+                self._current_line = self._target_line[1]
+                self._target_line = None
+            else:
+                self._current_line = None
             await self._render_preview()
 
     async def on_resize(self, event: events.Resize) -> None:
         """Re-render the preview on resize if it's was rendered by batcat and height changed."""
+        if (
+            self._current_preview_type == "normal_text"
+            and not config["settings"]["preview_full"]
+            and event.size.height > self._window_lines
+        ):
+            # taller than the lines that were read, so read more
+            if self._current_line is not None:
+                self.show_line(self._current_file_path, self._current_line)
+            self.show_preview(self._current_file_path)
+            self._initial_height = event.size.height
+            return
         if (
             self._current_preview_type == "bat"
             and "clip" in self.classes
@@ -576,12 +1172,326 @@ class PreviewContainer(Container):
             await self._render_preview()
             self._initial_height = event.size.height
 
+    async def open_find_bar(self) -> None:
+        """Show the find bar for the previewed text file, and focus it."""
+        if self._current_preview_type not in (
+            "normal_text",
+            "document",
+            "bat",
+        ) or compressed.compression(self._current_file_path):
+            # a compressed file is searched as it is on disk, which finds nothing
+            return
+        try:
+            find_bar = self.query_one("#preview_find", Input)
+        except NoMatches:
+            find_bar = Input(
+                self._find_query, id="preview_find", placeholder="Find in file"
+            )
+            await self.mount(find_bar)
+        find_bar.focus()
+
+    async def close_find_bar(self, forget: bool = True) -> None:
+        """Remove the find bar.
+
+        Args:
+            forget (bool): Whether to forget the hits too, instead of keeping
+                them to jump between with the preview focused.
+        """
+        if forget:
+            self.workers.cancel_group(self, "preview_find")
+            self._find_hits = []
+            self._find_index = -1
+            self._finding = False
+            self._find_query = ""
+            self.border_subtitle = ""
+        with suppress(NoMatches):
+            find_bar = self.query_one("#preview_find", Input)
+            if not forget:
+                self._find_query = find_bar.value
+            if find_bar.has_focus:
+                with suppress(NoMatches):
+                    self.query_one("#text_preview").focus()
+            await find_bar.remove()
+
+    async def open_offset_bar(self) -> None:
+        """Show a bar to jump to an offset of the previewed hex dump, and focus it."""
+        if self._current_preview_type != "hex":
+            return
+        try:
+            offset_bar = self.query_one("#preview_offset", Input)
+        except NoMatches:
+            offset_bar = Input(
+                id="preview_offset",
+                placeholder="Go to offset (0x for hex, negative from the end)",
+            )
+            await self.mount(offset_bar)
+        offset_bar.focus()
+
+    async def close_offset_bar(self) -> None:
+        """Remove the offset bar."""
+        with suppress(NoMatches):
+            offset_bar = self.query_one("#preview_offset", Input)
+            if offset_bar.has_focus:
+                with suppress(NoMatches):
+                    self.query_one("#text_preview").focus()
+            await offset_bar.remove()
+
+    def update_find_subtitle(self) -> None:
+        """Show which hit is shown, and how many there are."""
+        mode = "regex" if self._find_is_regex else "literal"
+        progress = "..." if self._finding else ""
+        self.border_subtitle = (
+            f"{self._find_index + 1}/{len(self._find_hits)}{progress} ({mode})"
+        )
+
+    def on_input_changed(self, event: Input.Changed) -> None:
+        if event.input.id != "preview_find":
+            return
+        event.stop()
+        self.find_in_file(event.value)
+
+    async def on_input_submitted(self, event: Input.Submitted) -> None:
+        if event.input.id == "preview_offset":
+            event.stop()
+            text = event.value.strip().replace("_", "")
+            try:
+                offset = int(
+                    text, 16 if text.lower().lstrip("-").startswith("0x") else 10
+                )
+            except ValueError:
+                self.notify(
+                    f"{event.value!r} isn't an offset",
+                    title="Go to offset",
+                    severity="warning",
+                )
+                return
+            self.query_one("#text_preview", HexView).jump_to(offset)
+            await self.close_offset_bar()
+            return
+        if event.input.id != "preview_find":
+            return
+        event.stop()
+        await self.jump_to_hit(1)
+
+    @work(thread=True, exclusive=True, group="preview_find")
+    def find_in_file(self, query: str) -> None:
+        """Search the previewed file, streaming the hits in.
+
+        Args:
+            query (str): The text or regex to search for.
+        """
+        worker = get_current_worker()
+        file_path = self._current_file_path
+        self.app.call_from_thread(self._clear_find_hits, bool(query))
+        if not query or file_path is None:
+            return
+        try:
+            for hits in find_line_offsets(
+                file_path,
+                query,
+                is_regex=self._find_is_regex,
+                # smart case, like the find in files dialog
+                ignore_case=query == query.lower(),
+                is_cancelled=lambda: worker.is_cancelled,
+            ):
+                if worker.is_cancelled:
+                    return
+                self.app.call_from_thread(self._add_find_hits, hits)
+        except re.error as exc:
+            self.app.call_from_thread(
+                self.notify, str(exc), title="Invalid regex", severity="warning"
+            )
+        except (OSError, ValueError):
+            pass
+        if not worker.is_cancelled:
+            self.app.call_from_thread(self._finish_find)
+
+    def _clear_find_hits(self, finding: bool) -> None:
+        self._find_hits = []
+        self._find_index = -1
+        self._finding = finding
+        self.update_find_subtitle()
+
+    async def _add_find_hits(self, hits: list[tuple[int, int]]) -> None:
+        first = not self._find_hits
+        self._find_hits.extend(hits)
+        if first:
+            # show the first hit straight away
+            await self.jump_to_hit(1)
+        else:
+            self.update_find_subtitle()
+
+    def _finish_find(self) -> None:
+        self._finding = False
+        self.update_find_subtitle()
+
+    async def jump_to_hit(self, step: int) -> None:
+        """Scroll the preview to another hit of the find bar.
+
+        Args:
+            step (int): 1 for the next hit, -1 for the previous one.
+        """
+        if not self._find_hits:
+            return
+        self._find_index = (self._find_index + step) % len(self._find_hits)
+        line, offset = self._find_hits[self._find_index]
+        self._current_line = line
+        self.update_find_subtitle()
+        if (
+            self._current_preview_type == "normal_text"
+            and not config["settings"]["preview_full"]
+        ):
+            # only the lines around the last hit were read, so read again
+            self.show_line(self._current_file_path, line, offset)
+            self.show_preview(self._current_file_path)
+            return
+        if self._current_preview_type == "document":
+            self.query_one("#text_preview", DocumentView).show_line(line - 1)
+            return
+        if (
+            self._current_preview_type == "normal_text"
+            and config["settings"]["preview_full"]
+        ):
+            # the whole file is loaded already, so just move there
+            text_area = self.query_one("#text_preview", CustomTextArea)
+            if self._current_line - 1 < text_area.document.line_count:
+                text_area.select_line(self._current_line - 1)
+                text_area.scroll_cursor_visible(center=True, animate=False)
+            return
+        await self._render_preview()
+
     async def on_key(self, event: events.Key) -> None:
         """Check for vim keybinds."""
-        if self.border_title == titles.bat or self.border_title == titles.archive:
-            widget = (
-                self if self.border_title == titles.bat else self.query_one(FileList)
-            )
+        if (
+            isinstance(self.app.focused, Input)
+            and self.app.focused.id == "preview_find"
+        ):
+            match event.key:
+                case "escape":
+                    event.stop()
+                    await self.close_find_bar(forget=False)
+                case "down":
+                    event.stop()
+                    await self.jump_to_hit(1)
+                case "up":
+                    event.stop()
+                    await self.jump_to_hit(-1)
+                case "ctrl+r":
+                    event.stop()
+                    self._find_is_regex = not self._find_is_regex
+                    self.find_in_file(self.app.focused.value)
+            return
+        if (
+            isinstance(self.app.focused, Input)
+            and self.app.focused.id == "preview_offset"
+        ):
+            if event.key == "escape":
+                event.stop()
+                await self.close_offset_bar()
+            return
+        if (
+            event.key in config["keybinds"]["preview_go_to_offset"]
+            and self._current_preview_type == "hex"
+        ):
+            event.stop()
+            await self.open_offset_bar()
+            return
+        if (
+            self._member is not None
+            and event.key in config["keybinds"]["hist_previous"]
+        ):
+            event.stop()
+            await self.close_member()
+            return
+        if (
+            event.key in config["keybinds"]["preview_find"]
+            and self._current_preview_type in ("normal_text", "document", "bat")
+            # the archive would be searched instead of the member
+            and self._member is None
+        ):
+            event.stop()
+            await self.open_find_bar()
+            return
+        if self._find_hits:
+            if event.key in config["keybinds"]["preview_find_next"]:
+                event.stop()
+                await self.jump_to_hit(1)
+                return
+            if event.key in config["keybinds"]["preview_find_previous"]:
+                event.stop()
+                await self.jump_to_hit(-1)
+                return
+        if self._current_preview_type == "gallery":
+            gallery = self.query_one(Gallery)
+            # a screen of rows of tiles, at least one
+            page = max(1, gallery.size.height // gallery.row_height) * gallery.columns
+            match event.key:
+                case key if key in config["keybinds"]["up"]:
+                    event.stop()
+                    gallery.move_highlight(-gallery.columns)
+                case key if key in config["keybinds"]["down"]:
+                    event.stop()
+                    gallery.move_highlight(gallery.columns)
+                case key if key in config["keybinds"]["preview_scroll_left"]:
+                    event.stop()
+                    gallery.move_highlight(-1)
+                case key if key in config["keybinds"]["preview_scroll_right"]:
+                    event.stop()
+                    gallery.move_highlight(1)
+                case key if key in config["keybinds"]["page_up"]:
+                    event.stop()
+                    gallery.move_highlight(-page)
+                case key if key in config["keybinds"]["page_down"]:
+                    event.stop()
+                    gallery.move_highlight(page)
+                case key if key in config["keybinds"]["home"]:
+                    event.stop()
+                    gallery.move_highlight(-len(gallery.images))
+                case key if key in config["keybinds"]["end"]:
+                    event.stop()
+                    gallery.move_highlight(len(gallery.images))
+                case key if key in config["keybinds"]["down_tree"]:
+                    event.stop()
+                    gallery.open_highlighted()
+            return
+        if self._current_preview_type == "document":
+            widget = self.query_one(DocumentView)
+        elif self._current_preview_type == "hex":
+            widget = self.query_one(HexView)
+        elif self.border_title == titles.bat:
+            widget = self
+        elif self.border_title == titles.archive:
+            file_list = self.query_one(FileList)
+            # members are entered from the cursor, so it moves instead
+            match event.key:
+                case key if key in config["keybinds"]["up"]:
+                    event.stop()
+                    file_list.action_cursor_up()
+                case key if key in config["keybinds"]["down"]:
+                    event.stop()
+                    file_list.action_cursor_down()
+                case key if key in config["keybinds"]["page_up"]:
+                    event.stop()
+                    file_list.action_page_up()
+                case key if key in config["keybinds"]["page_down"]:
+                    event.stop()
+                    file_list.action_page_down()
+                case key if key in config["keybinds"]["home"]:
+                    event.stop()
+                    file_list.action_first()
+                case key if key in config["keybinds"]["end"]:
+                    event.stop()
+                    file_list.action_last()
+                case key if key in config["keybinds"]["down_tree"]:
+                    event.stop()
+                    file_list.action_select()
+                case key if key in config["keybinds"]["up_tree"]:
+                    event.stop()
+                    await self.close_member()
+            return
+        else:
+            widget = None
+        if widget is not None:
             match event.key:
                 case key if key in config["keybinds"]["up"]:
                     event.stop()
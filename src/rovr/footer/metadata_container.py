@@ -11,6 +11,7 @@ from textual.widgets import Static
 from textual.worker import WorkerState
 
 from rovr.functions import utils
+from rovr.functions.sniff import sniff
 from rovr.variables.constants import config
 from rovr.variables.maps import SPINNER
 
@@ -120,7 +121,13 @@ class MetadataContainer(VerticalScroll):
         for field in config["metadata"]["fields"]:
             match field:
                 case "type":
-                    values_list.append(Static(type_str))
+                    values_list.append(
+                        Static(
+                            f"{type_str} ({sniff(dir_entry.path)[0]})"
+                            if type_str == "File"
+                            else type_str
+                        )
+                    )
                 case "permissions":
                     values_list.append(Static(file_info))
                 case "size":
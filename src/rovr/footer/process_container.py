@@ -295,6 +295,10 @@ class ProcessContainer(VerticalScroll):
             except FileNotFoundError:
                 # ig it got removed?
                 pass
+        self.app.call_from_thread(
+            self.app.refresh_file_index,
+            [path_utils.decompress(file) if compressed else file for file in files],
+        )
         if has_perm_error:
             bar.panic(
                 notify={
@@ -408,6 +412,7 @@ class ProcessContainer(VerticalScroll):
             )
             return
 
+        self.app.call_from_thread(self.app.refresh_file_index, [archive_name])
         self.app.call_from_thread(
             bar.update_icon,
             bar.icon_label.content + " " + icon_utils.get_icon("general", "check")[0],
@@ -562,6 +567,7 @@ class ProcessContainer(VerticalScroll):
             )
             return
 
+        self.app.call_from_thread(self.app.refresh_file_index, [destination_path])
         self.app.call_from_thread(
             bar.update_icon,
             icon_utils.get_icon("general", "check")[0],
@@ -882,6 +888,10 @@ class ProcessContainer(VerticalScroll):
             except FileNotFoundError:
                 # ig it got removed?
                 continue
+        self.app.call_from_thread(
+            self.app.refresh_file_index,
+            [path.join(dest, path.basename(item)) for item in copied + cutted] + cutted,
+        )
         if has_perm_error:
             bar.panic(
                 notify={
@@ -0,0 +1,316 @@
+import base64
+import hashlib
+import json
+import os
+import tarfile
+import tempfile
+import time
+import zlib
+from contextlib import suppress
+from os import path
+from typing import Callable
+
+from platformdirs import user_cache_dir
+
+from rovr.classes import Archive
+from rovr.classes.seekable_stream import Checkpoint
+from rovr.functions.compressed import HEAD_SIZE
+from rovr.functions.preview import READ_CHUNK_SIZE
+
+INDEX_DIR = path.join(user_cache_dir("rovr", appauthor=False), "archives")
+"""Where the member lists of archives that were read to the end are kept."""
+INDEX_VERSION = 2
+"""Bumped whenever the format of an index changes, to ignore older ones."""
+SCAN_SECONDS = 0.25
+"""How long reading the members of an archive for a preview may take."""
+SCAN_MEMBERS = 10_000
+"""How many members of an archive are read for a preview."""
+MORE = "…and more"
+"""Ends a listing that was cut short by the budget."""
+
+
+def index_path(file_path: str) -> str:
+    """Get where the member list of an archive is kept.
+
+    Args:
+        file_path (str): The archive.
+
+    Returns:
+        str: The path of its index.
+    """
+    name = hashlib.md5(path.abspath(file_path).encode()).hexdigest() + ".json"
+    return path.join(INDEX_DIR, name)
+
+
+def _read_index(file_path: str) -> dict | None:
+    try:
+        file_stat = os.stat(file_path)
+        with open(index_path(file_path), encoding="utf-8") as file:
+            index = json.load(file)
+        if (
+            index["version"] != INDEX_VERSION
+            or index["path"] != path.abspath(file_path)
+            or index["mtime_ns"] != file_stat.st_mtime_ns
+            or index["size"] != file_stat.st_size
+        ):
+            return None
+        return index
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+def load_index(file_path: str) -> list[str] | None:
+    """Load the member list of an archive, if it is of its current version.
+
+    Args:
+        file_path (str): The archive.
+
+    Returns:
+        list[str] | None: The members, folders ending with a `/`, or None if
+            there is no index, it is out of date, or it can't be read.
+    """
+    index = _read_index(file_path)
+    return None if index is None else index["members"]
+
+
+def _dump_checkpoint(checkpoint: Checkpoint) -> list:
+    # the output before a gzip restart point, which is mostly text
+    window = (
+        base64.b64encode(zlib.compress(checkpoint.window)).decode("ascii")
+        if checkpoint.window
+        else ""
+    )
+    return [
+        checkpoint.position,
+        checkpoint.compressed_position,
+        checkpoint.shift,
+        window,
+    ]
+
+
+def _load_checkpoint(point: list) -> Checkpoint:
+    position, compressed_position, shift, window = point
+    return Checkpoint(
+        position,
+        compressed_position,
+        b"",
+        None,
+        shift,
+        zlib.decompress(base64.b64decode(window)) if window else b"",
+    )
+
+
+def open_archive(file_path: str) -> Archive:
+    """Get an archive to read, that finds members through its index if it has one.
+
+    The index of a TAR archive notes where every member starts, and for a
+    compressed one, the points that decompressing can start from, so a
+    member is read by decompressing from the closest point before it.
+
+    Args:
+        file_path (str): The archive.
+
+    Returns:
+        Archive: The archive, to open with `with`.
+    """
+    index = _read_index(file_path)
+    if index is None or index.get("offsets") is None:
+        return Archive(file_path, "r")
+    try:
+        checkpoints = [_load_checkpoint(point) for point in index["checkpoints"]]
+    except (ValueError, TypeError, zlib.error):
+        checkpoints = []
+    return Archive(
+        file_path,
+        "r",
+        member_offsets=dict(zip(index["members"], index["offsets"])),
+        checkpoints=checkpoints,
+    )
+
+
+def save_index(
+    file_path: str,
+    file_stat: os.stat_result,
+    members: list[str],
+    offsets: list[int] | None = None,
+    checkpoints: list[Checkpoint] | None = None,
+) -> None:
+    """Write the member list of an archive. Writing may raise `OSError`.
+
+    It is written to a temporary file first and then moved into place, so
+    that no other rovr ever reads half an index.
+
+    Args:
+        file_path (str): The archive.
+        file_stat (os.stat_result): The stat of the archive from before its
+            members were read, so that an archive that changed meanwhile is
+            read again next time.
+        members (list[str]): The members, folders ending with a `/`.
+        offsets (list[int] | None): Where the header of each member starts in
+            the uncompressed archive, for a TAR archive.
+        checkpoints (list[Checkpoint] | None): The points of a compressed TAR
+            archive that decompressing can start from.
+    """
+    os.makedirs(INDEX_DIR, exist_ok=True)
+    handle, temporary = tempfile.mkstemp(suffix=".json", dir=INDEX_DIR)
+    try:
+        with os.fdopen(handle, "w", encoding="utf-8") as file:
+            json.dump(
+                {
+                    "version": INDEX_VERSION,
+                    "path": path.abspath(file_path),
+                    "mtime_ns": file_stat.st_mtime_ns,
+                    "size": file_stat.st_size,
+                    "members": members,
+                    "offsets": offsets,
+                    "checkpoints": [
+                        _dump_checkpoint(checkpoint) for checkpoint in checkpoints or []
+                    ],
+                },
+                file,
+            )
+        os.replace(temporary, index_path(file_path))
+    finally:
+        if path.exists(temporary):
+            os.remove(temporary)
+
+
+def member_name(member: object) -> str:
+    """Get the name of a member of any kind of archive.
+
+    Args:
+        member (object): The member, a ZipInfo, TarInfo or RarInfo.
+
+    Returns:
+        str: Its name with forward slashes, ending with a `/` for a folder.
+    """
+    name = getattr(member, "filename", getattr(member, "name", ""))
+    name = name.replace("\\", "/")
+    is_dir_func = getattr(member, "is_dir", getattr(member, "isdir", None))
+    is_dir = is_dir_func() if is_dir_func else name.endswith("/")
+    if is_dir and not name.endswith("/"):
+        name += "/"
+    return name
+
+
+def scan_members(
+    file_path: str,
+    is_cancelled: Callable[[], bool] = lambda: False,
+    budget: bool = True,
+) -> tuple[list[str], bool]:
+    """List the members of an archive, from its index if it has one.
+
+    An archive that is read to the end gets an index, so it is never read
+    again until it changes. Without a budget, a gzip TAR archive is also
+    searched for points to start decompressing from, for `open_archive`.
+    Opening or reading the archive raises whatever `Archive` raises.
+
+    Args:
+        file_path (str): The archive.
+        is_cancelled (Callable[[], bool]): Checked between members, to stop early.
+        budget (bool): Whether to stop after `SCAN_SECONDS` or `SCAN_MEMBERS`.
+
+    Returns:
+        tuple[list[str], bool]: The members, folders ending with a `/`, and
+            whether that is all of them.
+    """
+    if (members := load_index(file_path)) is not None:
+        return members, True
+    file_stat = os.stat(file_path)
+    deadline = time.monotonic() + SCAN_SECONDS
+    members = []
+    # only a tar archive has to be read through to find a member
+    offsets: list[int] | None = []
+    with Archive(file_path, "r", find_restarts=not budget) as archive:
+        for member in archive.iter_members():
+            if is_cancelled() or (
+                budget and (len(members) >= SCAN_MEMBERS or time.monotonic() > deadline)
+            ):
+                return members, False
+            members.append(member_name(member))
+            if offsets is not None:
+                if isinstance(member, tarfile.TarInfo):
+                    offsets.append(member.offset)
+                else:
+                    offsets = None
+        checkpoints = archive.saveable_checkpoints()
+    with suppress(OSError):
+        save_index(file_path, file_stat, members, offsets, checkpoints)
+    return members, True
+
+
+def read_member(
+    file_path: str, name: str, is_cancelled: Callable[[], bool] = lambda: False
+) -> tuple[bytes, bool]:
+    """Read the start of a member of an archive, for a preview.
+
+    It goes through `open_archive`, so a member of a large tarball with an
+    index is read without decompressing everything before it. Opening or
+    reading the archive raises whatever `Archive` raises.
+
+    Args:
+        file_path (str): The archive.
+        name (str): The member.
+        is_cancelled (Callable[[], bool]): Checked between chunks, to stop early
+            with whatever was read so far.
+
+    Returns:
+        tuple[bytes, bool]: Up to `HEAD_SIZE` bytes of the start, and whether
+            that is all of it. A member that isn't a file is empty.
+    """
+    parts = []
+    size = 0
+    with open_archive(file_path) as archive:
+        member = archive.open(name)
+        if member is None:
+            return b"", True
+        with member:
+            while size <= HEAD_SIZE and not is_cancelled():
+                chunk = member.read(READ_CHUNK_SIZE)
+                if not chunk:
+                    return b"".join(parts), True
+                parts.append(chunk)
+                size += len(chunk)
+    return b"".join(parts)[:HEAD_SIZE], False
+
+
+def top_level(members: list[str], folder: str = "") -> list[str]:
+    """Get what is at the top of an archive, or of a folder in it.
+
+    Args:
+        members (list[str]): The members, folders ending with a `/`.
+        folder (str): The folder, ending with a `/`, or empty for the top of
+            the archive.
+
+    Returns:
+        list[str]: The folders, ending with a `/`, and then the files, both
+            sorted, each with the folder before its name.
+    """
+    top_level_files = set()
+    top_level_dirs = set()
+    for name in members:
+        if not name.startswith(folder):
+            continue
+        parts = name[len(folder) :].strip("/").split("/")
+        if not parts[0]:
+            continue
+        if len(parts) == 1 and not name.endswith("/"):
+            top_level_files.add(parts[0])
+        else:
+            top_level_dirs.add(parts[0])
+    top_level_files -= top_level_dirs
+    return sorted(folder + d + "/" for d in top_level_dirs) + sorted(
+        folder + f for f in top_level_files
+    )
+
+
+def files(members: list[str]) -> list[str]:
+    """Get every file in an archive, leaving out the folders.
+
+    Args:
+        members (list[str]): The members, folders ending with a `/`.
+
+    Returns:
+        list[str]: The files, in the order they are stored in.
+    """
+    return [name for name in members if name and not name.endswith("/")]
@@ -0,0 +1,126 @@
+import bz2
+import codecs
+import gzip
+import io
+import lzma
+from os import path
+from typing import IO, Callable
+
+from rovr.functions.preview import READ_CHUNK_SIZE
+
+try:
+    from compression import zstd
+except ImportError:
+    # only in the standard library from python 3.14
+    zstd = None
+
+HEAD_SIZE = 256 * 1024
+"""How much of a compressed file is decompressed for a preview, in bytes."""
+OPENERS: dict[str, Callable[[str, str], IO[bytes]]] = {
+    ".gz": gzip.open,
+    ".bz2": bz2.open,
+    ".xz": lzma.open,
+    ".lzma": lzma.open,
+}
+"""How to open a single compressed file, by its extension."""
+if zstd is not None:
+    OPENERS[".zst"] = zstd.open
+# what is raised for data that isn't what its extension says, besides OSError
+DECOMPRESS_ERRORS: tuple[type[Exception], ...] = (lzma.LZMAError,) + (
+    (zstd.ZstdError,) if zstd is not None else ()
+)
+
+
+def compression(file_path: str) -> str | None:
+    """Get how a single file was compressed, from its name.
+
+    A compressed tarball is an archive instead, so it has none.
+
+    Args:
+        file_path (str): The file.
+
+    Returns:
+        str | None: The extension of the compression, a key of `OPENERS`, or
+            None if the file isn't a single compressed file.
+    """
+    root, extension = path.splitext(file_path)
+    extension = extension.lower()
+    if extension not in OPENERS or root.lower().endswith(".tar"):
+        return None
+    return extension
+
+
+def inner_name(file_path: str) -> str:
+    """Get the name of a compressed file once it is decompressed.
+
+    Args:
+        file_path (str): The file.
+
+    Returns:
+        str: The name without the compression extension, like `app.log` for
+            `app.log.gz`, or the name as it is if it isn't compressed.
+    """
+    if compression(file_path) is None:
+        return file_path
+    return path.splitext(file_path)[0]
+
+
+def read_head(
+    file_path: str, is_cancelled: Callable[[], bool] = lambda: False
+) -> tuple[bytes, bool]:
+    """Decompress the start of a single compressed file, and none of the rest.
+
+    A file that is cut off ends where it is cut off. Data that doesn't match
+    the compression raises `OSError`.
+
+    Args:
+        file_path (str): The file, with an extension that `compression` knows.
+        is_cancelled (Callable[[], bool]): Checked between chunks, to stop early
+            with whatever was decompressed so far.
+
+    Returns:
+        tuple[bytes, bool]: Up to `HEAD_SIZE` bytes of the start, and whether
+            that is all of it.
+
+    Raises:
+        OSError: If the data isn't compressed like its extension says.
+    """
+    opener = OPENERS[path.splitext(file_path)[1].lower()]
+    parts = []
+    size = 0
+    try:
+        with opener(file_path, "rb") as file:
+            while size <= HEAD_SIZE and not is_cancelled():
+                chunk = file.read(READ_CHUNK_SIZE)
+                if not chunk:
+                    return b"".join(parts), True
+                parts.append(chunk)
+                size += len(chunk)
+    except EOFError:
+        return b"".join(parts), True
+    except DECOMPRESS_ERRORS as exc:
+        raise OSError(f"Invalid compressed data: {exc}") from exc
+    return b"".join(parts)[:HEAD_SIZE], False
+
+
+def decode_head(head: bytes, encoding: str, complete: bool) -> str:
+    """Decode the start of a file, like `read_text` decodes a whole one.
+
+    Text that isn't valid in the encoding raises `UnicodeDecodeError`.
+
+    Args:
+        head (bytes): The start of the file.
+        encoding (str): The encoding of the file.
+        complete (bool): Whether that is all of the file. If not, the last
+            line is left out, as it may be cut off.
+
+    Returns:
+        str: The text.
+    """
+    decoder = io.IncrementalNewlineDecoder(
+        codecs.getincrementaldecoder(encoding)(), translate=True
+    )
+    text = decoder.decode(head, final=complete)
+    if not complete and "\n" in text:
+        text = text[: text.rindex("\n") + 1]
+    return text
@@ -0,0 +1,343 @@
+import mmap
+import os
+import re
+import sys
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import redirect_stderr
+from functools import lru_cache
+from multiprocessing import get_context, resource_tracker
+from typing import Callable, Iterator
+
+from rovr.functions.walker import walk_parallel
+
+SNIFF_SIZE = 8192
+"""How much of a file is read to decide whether it is binary."""
+MMAP_THRESHOLD = 1024 * 1024
+"""Files larger than this are searched through mmap instead of being read."""
+BATCH_SIZE = 64
+"""How many files are sent to a search process at once."""
+MAX_LINE_BYTES = 400
+"""How much of a matching line is kept for display."""
+WINDOW_SIZE = 8 * 1024 * 1024
+"""How much of a file is searched between cancellation checks."""
+COUNT_CHUNK_SIZE = 1024 * 1024
+"""How much of a buffer is copied at a time while counting lines."""
+
+_pool: ProcessPoolExecutor | None = None
+
+
+def get_pool() -> ProcessPoolExecutor:
+    """Get the process pool used for searching, starting it on first use.
+
+    Returns:
+        ProcessPoolExecutor: The shared pool.
+    """
+    global _pool
+    if _pool is None:
+        # the resource tracker passes stderr on to its own process, but textual
+        # replaces it with something that has no file descriptor
+        with redirect_stderr(sys.__stderr__):
+            resource_tracker.ensure_running()
+        # spawn, because forking a process with the UI threads running is unsafe
+        _pool = ProcessPoolExecutor(
+            max_workers=os.process_cpu_count() or 1,
+            mp_context=get_context("spawn"),
+        )
+    return _pool
+
+
+def shutdown_pool() -> None:
+    """Stop the search processes, dropping the searches that haven't started,
+    so that they don't outlive the app."""
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+@lru_cache(maxsize=8)
+def compile_query(query: str, is_regex: bool, ignore_case: bool) -> re.Pattern[bytes]:
+    """Compile a search query into a bytes pattern, raising `re.error` for
+    an invalid regex.
+
+    Args:
+        query (str): The text or regex to search for.
+        is_regex (bool): Whether the query is a regex, or literal text.
+        ignore_case (bool): Whether to match regardless of case.
+
+    Returns:
+        re.Pattern[bytes]: The compiled pattern.
+    """
+    pattern = query.encode("utf-8")
+    if not is_regex:
+        pattern = re.escape(pattern)
+    return re.compile(pattern, re.MULTILINE | (re.IGNORECASE if ignore_case else 0))
+
+
+def count_lines(buffer: bytes | mmap.mmap, start: int, end: int) -> int:
+    """Count the newlines in part of a buffer, without copying all of it at once.
+
+    Args:
+        buffer (bytes | mmap.mmap): The buffer.
+        start (int): Where to start counting.
+        end (int): Where to stop counting.
+
+    Returns:
+        int: The number of newlines between start and end.
+    """
+    return sum(
+        buffer[chunk : min(chunk + COUNT_CHUNK_SIZE, end)].count(b"\n")
+        for chunk in range(start, end, COUNT_CHUNK_SIZE)
+    )
+
+
+def find_lines(
+    buffer: bytes | mmap.mmap, pattern: re.Pattern[bytes], max_hits: int
+) -> list[tuple[int, str]]:
+    """Find the lines of a buffer that match a pattern.
+
+    Args:
+        buffer (bytes | mmap.mmap): The contents to search.
+        pattern (re.Pattern[bytes]): The pattern to look for.
+        max_hits (int): Stop after this many matching lines.
+
+    Returns:
+        list[tuple[int, str]]: The 1-based line number and text of each matching line.
+    """
+    hits = []
+    line_number = 1
+    counted_to = 0
+    position = 0
+    while len(hits) < max_hits:
+        match = pattern.search(buffer, position)
+        if match is None:
+            break
+        start = match.start()
+        line_number += count_lines(buffer, counted_to, start)
+        counted_to = start
+        line_start = buffer.rfind(b"\n", 0, start) + 1
+        line_end = buffer.find(b"\n", start)
+        if line_end == -1:
+            line_end = len(buffer)
+        hits.append((
+            line_number,
+            buffer[line_start : min(line_end, line_start + MAX_LINE_BYTES)]
+            .decode("utf-8", errors="replace")
+            .strip(),
+        ))
+        # one hit per line is enough
+        position = line_end + 1
+    return hits
+
+
+def search_file(
+    file_path: str, pattern: re.Pattern[bytes], max_hits: int
+) -> list[tuple[int, str]]:
+    """Search a single file, skipping it if it looks binary.
+
+    Args:
+        file_path (str): The file to search.
+        pattern (re.Pattern[bytes]): The pattern to look for.
+        max_hits (int): Stop after this many matching lines.
+
+    Returns:
+        list[tuple[int, str]]: The 1-based line number and text of each matching line.
+    """
+    try:
+        with open(file_path, "rb") as file:
+            head = file.read(SNIFF_SIZE)
+            if b"\0" in head:
+                return []
+            size = os.fstat(file.fileno()).st_size
+            if size <= len(head):
+                return find_lines(head, pattern, max_hits)
+            if size < MMAP_THRESHOLD:
+                return find_lines(head + file.read(), pattern, max_hits)
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                return find_lines(buffer, pattern, max_hits)
+    except (OSError, ValueError):
+        return []
+
+
+def search_files(
+    root: str,
+    relative_paths: list[str],
+    query: str,
+    is_regex: bool,
+    ignore_case: bool,
+    max_hits: int,
+) -> list[tuple[str, int, str]]:
+    """Search a batch of files. This runs in a search process.
+
+    Args:
+        root (str): The directory the paths are relative to.
+        relative_paths (list[str]): The files to search.
+        query (str): The text or regex to search for.
+        is_regex (bool): Whether the query is a regex, or literal text.
+        ignore_case (bool): Whether to match regardless of case.
+        max_hits (int): The most matching lines to return per file.
+
+    Returns:
+        list[tuple[str, int, str]]: The relative path, line number and line text
+            of every hit.
+    """
+    pattern = compile_query(query, is_regex, ignore_case)
+    return [
+        (relative_path, line_number, line)
+        for relative_path in relative_paths
+        for line_number, line in search_file(
+            os.path.join(root, relative_path), pattern, max_hits
+        )
+    ]
+
+
+def grep_parallel(
+    root: str,
+    query: str,
+    is_regex: bool = False,
+    ignore_case: bool = False,
+    ignore: list[str] | None = None,
+    max_depth: int = 0,
+    max_workers: int = 8,
+    max_hits: int = 20,
+    is_cancelled: Callable[[], bool] = lambda: False,
+) -> Iterator[list[tuple[str, int, str]]]:
+    """Search the contents of every file under a directory, in a process pool.
+
+    Files are found with `walk_parallel`, and are sent to the pool in batches
+    while the walk is still going. An invalid regex raises `re.error` before
+    anything is searched.
+
+    Args:
+        root (str): The directory to search.
+        query (str): The text or regex to search for.
+        is_regex (bool): Whether the query is a regex, or literal text.
+        ignore_case (bool): Whether to match regardless of case.
+        ignore (list[str] | None): Glob patterns of names to skip entirely.
+        max_depth (int): How many folders deep to go, 0 for no limit.
+        max_workers (int): How many directories are listed at the same time.
+        max_hits (int): The most matching lines to report per file.
+        is_cancelled (Callable[[], bool]): Checked regularly, to stop early.
+
+    Yields:
+        list[tuple[str, int, str]]: Batches of hits, as the relative path,
+            line number and line text.
+    """
+    # fail here, instead of in every search process
+    compile_query(query, is_regex, ignore_case)
+    pool = get_pool()
+    pending: set[Future] = set()
+    batch: list[str] = []
+
+    def submit(paths: list[str]) -> None:
+        pending.add(
+            pool.submit(
+                search_files, root, paths, query, is_regex, ignore_case, max_hits
+            )
+        )
+
+    def collect(timeout: float | None) -> list[tuple[str, int, str]]:
+        global _pool
+        done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+        pending.difference_update(done)
+        try:
+            return [hit for future in done for hit in future.result()]
+        except BrokenProcessPool:
+            # a search process died, start a fresh pool next time
+            _pool = None
+            raise
+
+    try:
+        for found in walk_parallel(root, ignore, max_depth, max_workers, is_cancelled):
+            batch.extend(item for item in found if not item.endswith("/"))
+            while len(batch) >= BATCH_SIZE:
+                submit(batch[:BATCH_SIZE])
+                batch = batch[BATCH_SIZE:]
+            # don't queue up the whole tree if the walk outruns the search
+            if len(pending) > (os.process_cpu_count() or 1) * 4:
+                hits = collect(None)
+            else:
+                hits = collect(0)
+            if hits:
+                yield hits
+        if batch:
+            submit(batch)
+        while pending and not is_cancelled():
+            hits = collect(0.1)
+            if hits:
+                yield hits
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+def find_line_offsets(
+    file_path: str,
+    query: str,
+    is_regex: bool = False,
+    ignore_case: bool = False,
+    max_hits: int = 100_000,
+    is_cancelled: Callable[[], bool] = lambda: False,
+) -> Iterator[list[tuple[int, int]]]:
+    """Find the lines of a file that match a query, through mmap.
+
+    The file is never read into memory as a whole. It is searched a window at
+    a time, with every window ending at a line break. A regex can still match
+    a line break, with a whitespace class for one, so a match that runs past
+    the end of its line is tried again within just that line, and matches
+    never span lines. An invalid regex raises `re.error` before anything is searched.
+
+    Args:
+        file_path (str): The file to search.
+        query (str): The text or regex to search for.
+        is_regex (bool): Whether the query is a regex, or literal text.
+        ignore_case (bool): Whether to match regardless of case.
+        max_hits (int): Stop after this many matching lines.
+        is_cancelled (Callable[[], bool]): Checked between windows, to stop early.
+
+    Yields:
+        list[tuple[int, int]]: Batches of hits, as the 1-based line number and
+            the byte offset of the start of the line.
+    """
+    pattern = compile_query(query, is_regex, ignore_case)
+    with open(file_path, "rb") as file:
+        size = os.fstat(file.fileno()).st_size
+        if size == 0:
+            return
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            found = 0
+            line_number = 1
+            counted_to = 0
+            window_start = 0
+            while window_start < size and found < max_hits:
+                if is_cancelled():
+                    return
+                window_end = buffer.find(b"\n", window_start + WINDOW_SIZE) + 1 or size
+                hits = []
+                position = window_start
+                while found + len(hits) < max_hits:
+                    match = pattern.search(buffer, position, window_end)
+                    if match is None:
+                        break
+                    line_start = buffer.rfind(b"\n", 0, match.start()) + 1
+                    line_end = buffer.find(b"\n", match.start(), window_end)
+                    if line_end != -1 and match.end() > line_end:
+                        # no line before it matched, but this one might on its own
+                        match = pattern.search(buffer, line_start, line_end)
+                        if match is None:
+                            position = line_end + 1
+                            if position >= window_end:
+                                break
+                            continue
+                    line_number += count_lines(buffer, counted_to, line_start)
+                    counted_to = line_start
+                    hits.append((line_number, line_start))
+                    # one hit per line is enough
+                    position = buffer.find(b"\n", match.start()) + 1 or window_end
+                    if position >= window_end:
+                        break
+                found += len(hits)
+                if hits:
+                    yield hits
+                window_start = window_end
@@ -0,0 +1,80 @@
+from pygments.lexer import Lexer, RegexLexer
+from pygments.lexers import get_lexer_for_filename
+from pygments.token import Comment, Number, String, Token
+from pygments.util import ClassNotFound
+from rich.syntax import SyntaxTheme
+from rich.text import Text
+
+BLOCK_LINES = 128
+"""How many lines are highlighted together, and cached together."""
+HIGHLIGHT_LIMIT = 1024 * 1024
+"""How many characters of text the text area may parse as a whole."""
+BLOCK_HIGHLIGHT_LIMIT = 32 * 1024
+"""How many characters a block may have to be lexed for its type of file."""
+
+
+class SimpleLexer(RegexLexer):
+    """Colours only the comments, strings and numbers of any type of file.
+
+    Lexers for real languages try many rules at every character, which takes
+    seconds for a block of long lines. This one gets through plain runs of
+    text with a single match, so it is used for blocks past
+    `BLOCK_HIGHLIGHT_LIMIT` instead.
+    """
+
+    name = "Simple"
+    tokens = {
+        "root": [
+            (r"^[ \t]*(#|//|--|;).*", Comment.Single),
+            (r'"(\\.|[^"\\\n])*"', String.Double),
+            (r"\b\d+(\.\d+)?\b", Number),
+            (r'[^"\d\n]+', Token.Text),
+            (r".|\n", Token.Text),
+        ]
+    }
+
+
+def get_lexer(file_path: str) -> Lexer | None:
+    """Get a lexer for a file from its name.
+
+    Args:
+        file_path (str): The file.
+
+    Returns:
+        Lexer | None: The lexer, or None if the type of file isn't known.
+    """
+    try:
+        return get_lexer_for_filename(file_path, stripnl=False, ensurenl=False)
+    except ClassNotFound:
+        return None
+
+
+def highlight_lines(lines: list[str], lexer: Lexer, theme: SyntaxTheme) -> list[Text]:
+    """Highlight a block of lines, without the rest of the file.
+
+    A token that starts before the block, like a long string or comment, is
+    lexed as if it didn't, so it may be coloured wrongly until it ends. That
+    is the price of never looking at more than the block. Blocks longer than
+    `BLOCK_HIGHLIGHT_LIMIT` are lexed by `SimpleLexer` instead.
+
+    Args:
+        lines (list[str]): The lines, without line breaks.
+        lexer (Lexer): The lexer for the type of file.
+        theme (SyntaxTheme): The theme to colour the tokens with.
+
+    Returns:
+        list[Text]: A highlighted text for every line.
+    """
+    text = "\n".join(lines)
+    if len(text) > BLOCK_HIGHLIGHT_LIMIT:
+        lexer = SimpleLexer(stripnl=False, ensurenl=False)
+    highlighted = [Text()]
+    for token_type, value in lexer.get_tokens(text):
+        style = theme.get_style_for_token(token_type)
+        first, *rest = value.split("\n")
+        highlighted[-1].append(first, style)
+        for part in rest:
+            highlighted.append(Text().append(part, style))
+    # in case the lexer dropped a trailing empty line
+    highlighted.extend(Text(line) for line in lines[len(highlighted) :])
+    return highlighted[: len(lines)]
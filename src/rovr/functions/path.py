@@ -2,7 +2,10 @@ import os
 import platform
 import stat
 import subprocess
+import time
+from collections import OrderedDict
 from os import path
+from threading import Lock
 
 import psutil
 from lzstring import LZString
@@ -17,6 +20,91 @@ pprint = Console().print
 config = {}
 pins = {}
 
+LISTING_CACHE_SIZE = 64
+"""How many folder listings `get_cached_cwd_object` remembers."""
+LISTING_SETTLE_NS = 2_000_000_000
+"""How long ago a folder must have changed for its listing to be remembered, as
+some file systems only keep modification times to the second or two."""
+
+# the types that `ListedEntry` answers from: is_dir, is_dir without following
+# symlinks, is_file, is_file without following symlinks, is_symlink, is_junction
+_EntryTypes = tuple[bool, bool, bool, bool, bool, bool]
+_listings: OrderedDict[
+    tuple[str, int],
+    tuple[list[tuple[str, list, str, _EntryTypes]], ...],
+] = OrderedDict()
+_listings_lock = Lock()
+
+
+class ListedEntry:
+    """A file or folder from `get_cached_cwd_object`, that acts like the
+    `os.DirEntry` it was listed from.
+
+    Its type is shared between listings, as an entry can only be replaced by
+    changing its folder. Its stat isn't: every listing gets entries of its
+    own, that stat the file the first time they are asked, like a fresh
+    `os.DirEntry` does.
+    """
+
+    __slots__ = ("name", "path", "_types", "_stat", "_lstat")
+
+    def __init__(self, name: str, entry_path: str, types: _EntryTypes) -> None:
+        self.name = name
+        self.path = entry_path
+        self._types = types
+        self._stat: os.stat_result | None = None
+        self._lstat: os.stat_result | None = None
+
+    @staticmethod
+    def types_of(entry: os.DirEntry) -> _EntryTypes:
+        """Get the types of an entry that was just listed.
+
+        Args:
+            entry (os.DirEntry): The entry.
+
+        Returns:
+            tuple[bool, ...]: What `ListedEntry` answers its type from.
+        """
+        is_dir, is_file = entry.is_dir(), entry.is_file()
+        if not entry.is_symlink():
+            return (is_dir, is_dir, is_file, is_file, False, entry.is_junction())
+        return (
+            is_dir,
+            entry.is_dir(follow_symlinks=False),
+            is_file,
+            entry.is_file(follow_symlinks=False),
+            True,
+            entry.is_junction(),
+        )
+
+    def __fspath__(self) -> str:
+        return self.path
+
+    def __repr__(self) -> str:
+        return f"<ListedEntry {self.name!r}>"
+
+    def is_dir(self, *, follow_symlinks: bool = True) -> bool:
+        return self._types[0 if follow_symlinks else 1]
+
+    def is_file(self, *, follow_symlinks: bool = True) -> bool:
+        return self._types[2 if follow_symlinks else 3]
+
+    def is_symlink(self) -> bool:
+        return self._types[4]
+
+    def is_junction(self) -> bool:
+        return self._types[5]
+
+    def stat(self, *, follow_symlinks: bool = True) -> os.stat_result:
+        if not follow_symlinks or not self._types[4]:
+            if self._lstat is None:
+                self._lstat = os.lstat(self.path)
+            if not follow_symlinks:
+                return self._lstat
+        if self._stat is None:
+            self._stat = self._lstat if not self._types[4] else os.stat(self.path)
+        return self._stat
+
 
 def normalise(location: str | bytes) -> str | bytes:
     """'Normalise' the path
@@ -104,6 +192,63 @@ def get_cwd_object(cwd: str | bytes) -> tuple[list[dict], list[dict]]:
     return folders, files
 
 
+def get_cached_cwd_object(cwd: str) -> tuple[list[dict], list[dict]]:
+    """
+    Get the objects in a directory like `get_cwd_object`, reusing the last
+    listing of it while it is unchanged. A folder's modification time changes
+    whenever an entry is added, removed or renamed in it, so that is all that
+    is checked. Only the names, icons and types are reused, the entries are
+    `ListedEntry`s that stat their files again.
+    Args:
+        cwd(str): The working directory to check
+
+    Returns:
+        folders(list[dict]): The folders, like `get_cwd_object` returns them
+        files(list[dict]): The files, like `get_cwd_object` returns them
+
+    Raises:
+        PermissionError: When access to the directory is denied
+    """
+    try:
+        key = (cwd, os.stat(cwd).st_mtime_ns)
+    except OSError:
+        raise PermissionError(f"PermissionError: Unable to access {cwd}")
+    with _listings_lock:
+        if (listing := _listings.get(key)) is not None:
+            _listings.move_to_end(key)
+    if listing is None:
+        listing = tuple(
+            [
+                (
+                    item["name"],
+                    item["icon"],
+                    item["dir_entry"].path,
+                    ListedEntry.types_of(item["dir_entry"]),
+                )
+                for item in items
+            ]
+            for items in get_cwd_object(cwd)
+        )
+        # a change in the same tick as the last one wouldn't change the time
+        if time.time_ns() - key[1] > LISTING_SETTLE_NS:
+            with _listings_lock:
+                _listings[key] = listing
+                if len(_listings) > LISTING_CACHE_SIZE:
+                    _listings.popitem(last=False)
+    folders, files = (
+        [
+            {
+                "name": name,
+                "icon": icon,
+                "dir_entry": ListedEntry(name, entry_path, types),
+            }
+            for name, icon, entry_path, types in items
+        ]
+        for items in listing
+    )
+    return folders, files
+
+
 def file_is_type(file_path: str) -> str:
     """Get a given path's type
     Args:
@@ -0,0 +1,160 @@
+import codecs
+import io
+from typing import BinaryIO, Callable
+
+READ_CHUNK_SIZE = 64 * 1024
+"""How much of a file is read at a time."""
+BYTES_PER_LINE = 1024
+"""How many bytes each wanted line may cost, before reading gives up."""
+
+
+def _skip_lines(
+    file: BinaryIO, count: int, is_cancelled: Callable[[], bool] = lambda: False
+) -> int:
+    """Move a file to the start of a later line.
+
+    Args:
+        file (BinaryIO): The file, at the start of a line.
+        count (int): How many lines to skip.
+        is_cancelled (Callable[[], bool]): Checked between chunks, to stop early.
+
+    Returns:
+        int: How many lines were actually skipped, fewer at the end of the file.
+    """
+    skipped = 0
+    position = file.tell()
+    while skipped < count and not is_cancelled():
+        chunk = file.read(READ_CHUNK_SIZE * 16)
+        if not chunk:
+            break
+        newlines = chunk.count(b"\n")
+        if skipped + newlines < count:
+            skipped += newlines
+            position += len(chunk)
+            continue
+        index = -1
+        for _ in range(count - skipped):
+            index = chunk.index(b"\n", index + 1)
+        file.seek(position + index + 1)
+        return count
+    return skipped
+
+
+def _back_up_lines(file: BinaryIO, offset: int, count: int) -> tuple[int, int]:
+    """Find the start of an earlier line, without reading from the start.
+
+    Args:
+        file (BinaryIO): The file.
+        offset (int): The byte offset of the start of a line.
+        count (int): How many lines to go back.
+
+    Returns:
+        tuple[int, int]: The offset of the line that was found, and how many
+            lines back it is. That is fewer than `count` if the lines before
+            are too long, or the start of the file is reached.
+    """
+    start = max(0, offset - count * BYTES_PER_LINE)
+    file.seek(start)
+    chunk = file.read(offset - start)
+    if not chunk:
+        return offset, 0
+    # the byte before the offset ends the previous line
+    index = len(chunk) - 1
+    for backed_up in range(count):
+        previous = chunk.rfind(b"\n", 0, index)
+        if previous == -1:
+            if start == 0:
+                return 0, backed_up + 1
+            return start + index + 1, backed_up
+        index = previous
+    return start + index + 1, count
+
+
+def read_lines(
+    file_path: str,
+    first_line: int,
+    line_count: int,
+    hint: tuple[int, int] | None = None,
+    encoding: str = "utf-8",
+    is_cancelled: Callable[[], bool] = lambda: False,
+) -> tuple[int, str]:
+    """Read some lines of a text file, without reading the rest of it.
+
+    The lines are decoded incrementally, and reading stops once there are
+    enough of them, or `BYTES_PER_LINE` for every wanted line has been read,
+    so a huge file (or one without line breaks) costs as much as a small one.
+    Text that isn't valid in the encoding raises `UnicodeDecodeError`.
+
+    Args:
+        file_path (str): The file to read.
+        first_line (int): The 1-based line to start at.
+        line_count (int): How many lines to read.
+        hint (tuple[int, int] | None): A known line number and the byte offset
+            where it starts, to seek to instead of counting every line before.
+        encoding (str): The encoding of the file. For UTF-16 and UTF-32, where
+            a line break isn't a single byte, reading always starts at the top.
+        is_cancelled (Callable[[], bool]): Checked between chunks, to stop early
+            with whatever was read so far.
+
+    Returns:
+        tuple[int, str]: The line that was actually started at, and the text.
+    """
+    decoder = codecs.getincrementaldecoder(encoding)()
+    skip = 0
+    with open(file_path, "rb") as file:
+        if encoding in ("utf-16", "utf-32"):
+            skip, first_line = first_line - 1, 1
+            line_count += skip
+        elif hint is not None and hint[0] >= first_line:
+            offset, backed_up = _back_up_lines(file, hint[1], hint[0] - first_line)
+            first_line = hint[0] - backed_up
+            file.seek(offset)
+        else:
+            first_line = 1 + _skip_lines(file, first_line - 1, is_cancelled)
+        budget = line_count * BYTES_PER_LINE
+        parts = []
+        newlines = 0
+        while newlines < line_count and budget > 0 and not is_cancelled():
+            chunk = file.read(min(READ_CHUNK_SIZE, budget))
+            if not chunk:
+                # a character cut off by the end of the file is an error
+                parts.append(decoder.decode(b"", final=True))
+                break
+            budget -= len(chunk)
+            newlines += chunk.count(b"\n")
+            parts.append(decoder.decode(chunk))
+    lines = "".join(parts).splitlines()[:line_count]
+    return first_line + min(skip, len(lines)), "\n".join(lines[skip:])
+
+
+def read_text(
+    file_path: str,
+    encoding: str = "utf-8",
+    is_cancelled: Callable[[], bool] = lambda: False,
+) -> str:
+    """Read a whole text file, a chunk at a time.
+
+    Line breaks are translated like in a file opened in text mode. Text that
+    isn't valid in the encoding raises `UnicodeDecodeError`.
+
+    Args:
+        file_path (str): The file to read.
+        encoding (str): The encoding of the file.
+        is_cancelled (Callable[[], bool]): Checked between chunks, to stop early
+            with whatever was read so far.
+
+    Returns:
+        str: The text.
+    """
+    decoder = io.IncrementalNewlineDecoder(
+        codecs.getincrementaldecoder(encoding)(), translate=True
+    )
+    parts = []
+    with open(file_path, "rb") as file:
+        while not is_cancelled():
+            chunk = file.read(READ_CHUNK_SIZE * 16)
+            if not chunk:
+                parts.append(decoder.decode(b"", final=True))
+                break
+            parts.append(decoder.decode(chunk))
+    return "".join(parts)
@@ -0,0 +1,113 @@
+import codecs
+import os
+from collections import OrderedDict
+from threading import Lock
+
+SNIFF_SIZE = 4096
+"""How much of the start of a file is looked at to classify it."""
+CACHE_SIZE = 4096
+"""How many classified files are remembered."""
+
+# (offset, magic number, kind), checked in order
+MAGIC_NUMBERS: list[tuple[int, bytes, str]] = [
+    (0, b"\x89PNG\r\n\x1a\n", "image"),
+    (0, b"\xff\xd8\xff", "image"),
+    (0, b"GIF87a", "image"),
+    (0, b"GIF89a", "image"),
+    (0, b"II*\x00", "image"),
+    (0, b"MM\x00*", "image"),
+    (0, b"\x00\x00\x01\x00", "image"),
+    (0, b"qoif", "image"),
+    (8, b"WEBP", "image"),
+    (0, b"PK\x03\x04", "archive"),
+    (0, b"PK\x05\x06", "archive"),
+    (0, b"\x1f\x8b", "archive"),
+    (0, b"BZh", "archive"),
+    (0, b"\xfd7zXZ\x00", "archive"),
+    (0, b"(\xb5/\xfd", "archive"),
+    (0, b"7z\xbc\xaf\x27\x1c", "archive"),
+    (0, b"Rar!\x1a\x07", "archive"),
+    (257, b"ustar", "archive"),
+    (0, b"\x7fELF", "binary"),
+    (0, b"\xcf\xfa\xed\xfe", "binary"),
+    (0, b"\xca\xfe\xba\xbe", "binary"),
+    (0, b"%PDF-", "binary"),
+    (0, b"SQLite format 3\x00", "binary"),
+]
+# too short to trust in a file that might be text
+WEAK_MAGIC_NUMBERS: list[tuple[int, bytes, str]] = [
+    (0, b"BM", "image"),
+    (0, b"MZ", "binary"),
+]
+# longest first, so that utf-32 isn't mistaken for utf-16
+BYTE_ORDER_MARKS: list[tuple[bytes, str]] = [
+    (codecs.BOM_UTF32_LE, "utf-32"),
+    (codecs.BOM_UTF32_BE, "utf-32"),
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+]
+
+_cache: OrderedDict[tuple[str, int, int], tuple[str, str | None]] = OrderedDict()
+_cache_lock = Lock()
+
+
+def sniff_bytes(head: bytes) -> tuple[str, str | None]:
+    """Classify a file from the first few KB of it.
+
+    Args:
+        head (bytes): The start of the file.
+
+    Returns:
+        tuple[str, str | None]: The kind of file (`text`, `binary`, `image` or
+            `archive`), and the encoding to read it with if it is text.
+    """
+    for mark, encoding in BYTE_ORDER_MARKS:
+        if head.startswith(mark):
+            return "text", encoding
+    for offset, magic, kind in MAGIC_NUMBERS:
+        if head.startswith(magic, offset):
+            return kind, None
+    if b"\x00" in head:
+        for offset, magic, kind in WEAK_MAGIC_NUMBERS:
+            if head.startswith(magic, offset):
+                return kind, None
+        return "binary", None
+    try:
+        # not final, the last character may have been cut off
+        codecs.getincrementaldecoder("utf-8")().decode(head)
+    except UnicodeDecodeError:
+        return "binary", None
+    return "text", "utf-8"
+
+
+def sniff(file_path: str) -> tuple[str, str | None]:
+    """Classify a file without reading more than its first few KB.
+
+    The result is remembered by path, modification time and size, so asking
+    again about a file that didn't change costs only a stat.
+
+    Args:
+        file_path (str): The file to classify.
+
+    Returns:
+        tuple[str, str | None]: The kind of file (`text`, `binary`, `image` or
+            `archive`), and the encoding to read it with if it is text. A file
+            that can't be read is `binary`.
+    """
+    try:
+        file_stat = os.stat(file_path)
+        key = (file_path, file_stat.st_mtime_ns, file_stat.st_size)
+        with _cache_lock:
+            if (result := _cache.get(key)) is not None:
+                _cache.move_to_end(key)
+                return result
+        with open(file_path, "rb") as file:
+            result = sniff_bytes(file.read(SNIFF_SIZE))
+    except OSError:
+        return "binary", None
+    with _cache_lock:
+        _cache[key] = result
+        if len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return result
@@ -0,0 +1,229 @@
+import hashlib
+import os
+import tempfile
+from contextlib import suppress
+from os import path
+from urllib.parse import quote
+
+from PIL import Image, PngImagePlugin, UnidentifiedImageError
+from platformdirs import user_cache_dir
+
+from rovr.variables.maps import PIL_EXTENSIONS
+
+THUMBNAIL_DIR = path.join(user_cache_dir(), "thumbnails")
+"""The shared thumbnail directory, from the freedesktop thumbnail spec."""
+SIZES = {"normal": 128, "large": 256, "x-large": 512, "xx-large": 1024}
+"""The longest side of each size of thumbnail, in pixels, from small to large."""
+CELL_PIXELS = (10, 20)
+"""The usual size of a terminal cell, in pixels, when the real one isn't known."""
+MAX_DECODE_PIXELS = 64 * 1024 * 1024
+"""The most pixels an image may still have once it is decoded at a smaller scale."""
+# characters that are left as they are in a file uri, like glib does
+URI_SAFE = "/!~*'():@&=+$,;"
+
+
+def file_uri(file_path: str) -> str:
+    """Get the uri of a file, escaped the way other thumbnailers escape it.
+
+    Args:
+        file_path (str): The file.
+
+    Returns:
+        str: The uri.
+    """
+    absolute = path.abspath(file_path).replace("\\", "/")
+    if not absolute.startswith("/"):
+        # a windows drive
+        absolute = "/" + absolute
+    return "file://" + quote(absolute, safe=URI_SAFE)
+
+
+def thumbnail_path(file_path: str, size: str) -> str:
+    """Get where the thumbnail of a file is kept.
+
+    Args:
+        file_path (str): The file.
+        size (str): The size of thumbnail, a key of `SIZES`.
+
+    Returns:
+        str: The path of the thumbnail.
+    """
+    name = hashlib.md5(file_uri(file_path).encode()).hexdigest() + ".png"
+    return path.join(THUMBNAIL_DIR, size, name)
+
+
+def size_for(
+    width: int, height: int, cell_pixels: tuple[int, int] = CELL_PIXELS
+) -> str:
+    """Pick the smallest size of thumbnail that still fills a preview.
+
+    Args:
+        width (int): The width of the preview, in cells.
+        height (int): The height of the preview, in cells.
+        cell_pixels (tuple[int, int]): How many pixels of the image a cell
+            shows, which is far fewer when it is drawn with characters.
+
+    Returns:
+        str: The size of thumbnail, a key of `SIZES`.
+    """
+    longest = max(width * cell_pixels[0], height * cell_pixels[1])
+    for size, pixels in SIZES.items():
+        if pixels >= longest:
+            return size
+    return "xx-large"
+
+
+def decode(file_path: str, longest: int) -> tuple[Image.Image, tuple[int, int]]:
+    """Decode an image at about the size it is shown at, instead of in full.
+
+    A JPEG is decoded at a smaller scale to begin with, through `draft`, and
+    any other image is reduced by a whole factor before it is resampled, so a
+    camera photo takes a fraction of the time and memory. A corrupt or cut off
+    image raises `OSError`.
+
+    Args:
+        file_path (str): The image.
+        longest (int): The longest side to scale it down to, in pixels.
+
+    Returns:
+        tuple[Image.Image, tuple[int, int]]: The decoded image, and its size
+            in full.
+
+    Raises:
+        ValueError: If the image would still be huge once decoded, which is
+            checked before it is decoded.
+    """
+    image = Image.open(file_path)
+    try:
+        original_size = image.size
+        # only changes anything for a jpeg, and only before it is loaded
+        image.draft(None, (longest, longest))
+        if image.width * image.height > MAX_DECODE_PIXELS:
+            raise ValueError(
+                f"{original_size[0]}x{original_size[1]} is too large to decode"
+            )
+        # reduces by a whole factor first, and loads the image
+        image.thumbnail((longest, longest))
+    except BaseException:
+        # don't leave the file open for a corrupt or huge image
+        image.close()
+        raise
+    return image, original_size
+
+
+def load(file_path: str, size: str) -> Image.Image | None:
+    """Load the thumbnail of a file, if there is one for its current version.
+
+    A thumbnail is only used if the uri and modification time written into it
+    match the file, and the size too if it was written.
+
+    Args:
+        file_path (str): The file.
+        size (str): The size of thumbnail, a key of `SIZES`.
+
+    Returns:
+        Image.Image | None: The loaded thumbnail, or None if there is none, it
+            is out of date, or it can't be read.
+    """
+    try:
+        file_stat = os.stat(file_path)
+        thumbnail = Image.open(thumbnail_path(file_path, size))
+        info = getattr(thumbnail, "text", {})
+        if (
+            info.get("Thumb::URI") != file_uri(file_path)
+            or info.get("Thumb::MTime") != str(int(file_stat.st_mtime))
+            or info.get("Thumb::Size", str(file_stat.st_size)) != str(file_stat.st_size)
+        ):
+            thumbnail.close()
+            return None
+        thumbnail.load()
+        return thumbnail
+    except (OSError, UnidentifiedImageError, ValueError):
+        return None
+
+
+def save(
+    file_path: str, thumbnail: Image.Image, size: str, original_size: tuple[int, int]
+) -> None:
+    """Write the thumbnail of a file, for other programs to use too.
+
+    It is written to a temporary file first and then moved into place, so
+    that no program ever reads half a thumbnail. A file inside the thumbnail
+    directory is never given a thumbnail. Writing may raise `OSError`.
+
+    Args:
+        file_path (str): The file.
+        thumbnail (Image.Image): The image, scaled down to fit the size.
+        size (str): The size of thumbnail, a key of `SIZES`.
+        original_size (tuple[int, int]): The width and height of the image.
+    """
+    absolute = path.abspath(file_path)
+    if absolute.startswith(path.abspath(THUMBNAIL_DIR) + os.sep):
+        return
+    file_stat = os.stat(absolute)
+    info = PngImagePlugin.PngInfo()
+    info.add_text("Thumb::URI", file_uri(absolute))
+    info.add_text("Thumb::MTime", str(int(file_stat.st_mtime)))
+    info.add_text("Thumb::Size", str(file_stat.st_size))
+    info.add_text("Thumb::Image::Width", str(original_size[0]))
+    info.add_text("Thumb::Image::Height", str(original_size[1]))
+    info.add_text("Software", "rovr")
+    if thumbnail.mode not in ("1", "L", "LA", "P", "RGB", "RGBA"):
+        thumbnail = thumbnail.convert("RGBA")
+    target = thumbnail_path(absolute, size)
+    os.makedirs(path.dirname(target), mode=0o700, exist_ok=True)
+    handle, temporary = tempfile.mkstemp(suffix=".png", dir=path.dirname(target))
+    try:
+        with os.fdopen(handle, "wb") as file:
+            thumbnail.save(file, "PNG", pnginfo=info)
+        os.replace(temporary, target)
+    finally:
+        if path.exists(temporary):
+            os.remove(temporary)
+
+
+def list_images(folder: str) -> list[str]:
+    """List the images in a folder, by name.
+
+    Args:
+        folder (str): The folder.
+
+    Returns:
+        list[str]: The paths of the images, sorted regardless of case. A folder
+            that can't be read has none.
+    """
+    images = []
+    try:
+        with os.scandir(folder) as entries:
+            for entry in entries:
+                if entry.name.lower().endswith(tuple(PIL_EXTENSIONS)):
+                    with suppress(OSError):
+                        if entry.is_file():
+                            images.append(entry.path)
+    except OSError:
+        return []
+    return sorted(images, key=lambda image: path.basename(image).lower())
+
+
+def load_tile(file_path: str, longest: int, save_thumbnail: bool) -> Image.Image:
+    """Load a tiny version of an image, through its normal size thumbnail.
+
+    An image without an up to date thumbnail is decoded like `decode` does,
+    so it raises the same errors, and its thumbnail is saved if asked to.
+
+    Args:
+        file_path (str): The image.
+        longest (int): The longest side of the tiny version, in pixels.
+        save_thumbnail (bool): Whether to save a missing thumbnail.
+
+    Returns:
+        Image.Image: The tiny version of the image.
+    """
+    image = load(file_path, "normal")
+    if image is None:
+        image, original_size = decode(file_path, SIZES["normal"])
+        if save_thumbnail and image.size != original_size:
+            with suppress(OSError, ValueError):
+                save(file_path, image, "normal", original_size)
+    image.thumbnail((longest, longest))
+    return image
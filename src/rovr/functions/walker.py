@@ -0,0 +1,89 @@
+import os
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from fnmatch import fnmatch
+from typing import Callable, Iterator
+
+
+def _scan_directory(
+    directory: str, relative_directory: str, ignore: list[str]
+) -> tuple[list[str], list[tuple[str, str]]]:
+    """List a single directory for the parallel walker.
+
+    Args:
+        directory (str): The directory to list.
+        relative_directory (str): The directory relative to the root of the walk.
+        ignore (list[str]): Glob patterns of names to skip.
+
+    Returns:
+        list[str]: The relative paths of every item found, folders end with a `/`
+        list[tuple[str, str]]: The (path, relative path) of every folder found
+    """
+    found, folders = [], []
+    try:
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if any(fnmatch(entry.name, pattern) for pattern in ignore):
+                    continue
+                relative_path = (
+                    f"{relative_directory}/{entry.name}"
+                    if relative_directory
+                    else entry.name
+                )
+                try:
+                    # symlinks are listed, but never followed
+                    is_dir = entry.is_dir(follow_symlinks=False)
+                except OSError:
+                    is_dir = False
+                if is_dir:
+                    found.append(relative_path + "/")
+                    folders.append((entry.path, relative_path))
+                else:
+                    found.append(relative_path)
+    except OSError:
+        # permission errors, or it disappeared halfway through
+        pass
+    return found, folders
+
+
+def walk_parallel(
+    root: str,
+    ignore: list[str] | None = None,
+    max_depth: int = 0,
+    max_workers: int = 8,
+    is_cancelled: Callable[[], bool] = lambda: False,
+) -> Iterator[list[str]]:
+    """Walk a directory tree with a pool of `os.scandir` workers.
+
+    Args:
+        root (str): The directory to walk.
+        ignore (list[str] | None): Glob patterns of names to skip entirely.
+        max_depth (int): How many folders deep to go, 0 for no limit.
+        max_workers (int): How many directories are listed at the same time.
+        is_cancelled (Callable[[], bool]): Checked between directories, to stop early.
+
+    Yields:
+        list[str]: Batches of paths relative to `root`, one batch per directory.
+            Folders end with a `/`.
+    """
+    ignore = ignore or []
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    pending: dict[Future, int] = {executor.submit(_scan_directory, root, "", ignore): 1}
+    try:
+        while pending:
+            if is_cancelled():
+                return
+            done, _ = wait(pending, timeout=0.1, return_when=FIRST_COMPLETED)
+            for future in done:
+                depth = pending.pop(future)
+                found, folders = future.result()
+                if max_depth == 0 or depth < max_depth:
+                    for folder, relative_folder in folders:
+                        pending[
+                            executor.submit(
+                                _scan_directory, folder, relative_folder, ignore
+                            )
+                        ] = depth + 1
+                if found:
+                    yield found
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
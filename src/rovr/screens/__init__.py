@@ -3,7 +3,10 @@ from textual.screen import Screen
 from .common_file_name_do_what import CommonFileNameDoWhat
 from .delete_files import DeleteFiles
 from .dismissable import Dismissable
+from .find_files import FindFiles
+from .find_in_files import FindInFiles
 from .give_permission import GiveMePermission
+from .go_to_file import GoToFile
 from .input import ModalInput
 from .way_too_small import TerminalTooSmall
 from .yes_or_no import YesOrNo
@@ -19,10 +22,13 @@ __all__ = [
     "Dismissable",
     "CommonFileNameDoWhat",
     "DeleteFiles",
+    "FindFiles",
+    "FindInFiles",
     "ModalInput",
     "YesOrNo",
     "ZDToDirectory",
     "GiveMePermission",
+    "GoToFile",
     "DummyScreen",
     "TerminalTooSmall",
 ]
@@ -0,0 +1,226 @@
+import heapq
+import os
+from time import monotonic
+
+from textual import events, work
+from textual.app import ComposeResult
+from textual.containers import VerticalGroup
+from textual.content import Content
+from textual.screen import ModalScreen
+from textual.widgets import Input, OptionList
+from textual.widgets.option_list import Option
+from textual.worker import get_current_worker
+
+from rovr.classes.fuzzy_filter import FuzzyFilter, fuzzy_score
+from rovr.classes.structured_query import StructuredQuery
+from rovr.functions import path as path_utils
+from rovr.functions.walker import walk_parallel
+from rovr.screens.zd_to_directory import ZoxideOptionList
+from rovr.variables.constants import config
+
+
+class FindFiles(ModalScreen):
+    """Screen with a dialog to find files and folders by name, recursively"""
+
+    RANK_INTERVAL: float = 0.25
+    """How often, in seconds, results are re-ranked while the walk is still going."""
+
+    def __init__(self, root: str, **kwargs) -> None:
+        """Initialise the screen.
+
+        Args:
+            root (str): The directory to search from.
+        """
+        super().__init__(**kwargs)
+        self.root = root
+        # paths relative to root, in the same order as the filter's keys
+        self.paths: list[str] = []
+        self.fuzzy_filter = FuzzyFilter([])
+        # stats of the paths that a filter needed, by index
+        self._stats: dict[int, os.stat_result] = {}
+        self.walking = True
+        self._last_rank = 0.0
+        # the text that was ranked last, and the scores of its matches so far,
+        # so that a rank while walking only scores what was found since
+        self._scores: tuple[str, dict[int, float]] = ("", {})
+
+    def compose(self) -> ComposeResult:
+        with VerticalGroup(id="find_group"):
+            yield Input(
+                id="find_input",
+                placeholder="Enter file or folder name",
+            )
+            yield ZoxideOptionList(
+                Option("  Searching...", disabled=True),
+                id="find_options",
+            )
+
+    def on_mount(self) -> None:
+        find_input = self.query_one("#find_input", Input)
+        find_input.border_title = "Find"
+        find_input.focus()
+        find_options = self.query_one("#find_options", ZoxideOptionList)
+        find_options.border_title = "Files"
+        find_options.can_focus = False
+        self.walk()
+
+    @work(thread=True, group="walk")
+    def walk(self) -> None:
+        """Walk the directory tree, ranking the results as they come in"""
+        worker = get_current_worker()
+        for batch in walk_parallel(
+            self.root,
+            config["search"]["ignore"],
+            config["search"]["max_depth"],
+            config["search"]["max_workers"],
+            is_cancelled=lambda: worker.is_cancelled,
+        ):
+            # paths first, so that the filter never has a key without a path
+            self.paths.extend(batch)
+            self.fuzzy_filter.extend(batch)
+            if monotonic() - self._last_rank > self.RANK_INTERVAL:
+                self._last_rank = monotonic()
+                self.app.call_from_thread(self.request_rank)
+        if worker.is_cancelled:
+            return
+        self.walking = False
+        self.app.call_from_thread(self.request_rank)
+
+    def request_rank(self) -> None:
+        """Rank the results against the current query"""
+        self.rank(self.query_one("#find_input", Input).value)
+
+    def on_input_changed(self, event: Input.Changed) -> None:
+        event.stop()
+        self._last_rank = monotonic()
+        self.rank(event.value)
+
+    @work(thread=True, exclusive=True, group="rank")
+    def rank(self, query: str) -> None:
+        """Filter and rank everything found so far.
+
+        Args:
+            query (str): The query to rank against.
+        """
+        worker = get_current_worker()
+        stop = len(self.fuzzy_filter)
+        limit = config["search"]["max_results"]
+        structured = StructuredQuery(query)
+        if not structured.text and not structured.predicates:
+            self.app.call_from_thread(
+                self.show_results, query, list(range(min(stop, limit))), stop
+            )
+            return
+        text_matches = self.fuzzy_filter.filter(
+            structured.text, lambda: worker.is_cancelled, stop=stop
+        )
+        if text_matches is None:
+            return
+        # filters can loosen as they are typed, so only the text is narrowed
+        self.fuzzy_filter.remember(structured.text, text_matches, stop)
+        matches = text_matches
+        if structured.predicates:
+            matches = []
+            for index in text_matches:
+                if worker.is_cancelled:
+                    return
+                relative_path = self.paths[index]
+                if structured.matches(
+                    os.path.basename(relative_path.rstrip("/")),
+                    relative_path.endswith("/"),
+                    lambda index=index: self._get_stat(index),
+                ):
+                    matches.append(index)
+        total = len(matches)
+        if structured.text:
+            key = structured.text.casefold()
+            keys = self.fuzzy_filter.keys
+            scored_text, scores = self._scores
+            if scored_text != key:
+                scores = {}
+                self._scores = (key, scores)
+            for index in matches:
+                if index not in scores:
+                    if worker.is_cancelled:
+                        return
+                    scores[index] = fuzzy_score(key, keys[index])
+            # only the results that are shown are kept, best first
+            matches = heapq.nlargest(limit, matches, key=scores.__getitem__)
+        if worker.is_cancelled:
+            return
+        self.app.call_from_thread(self.show_results, query, matches[:limit], total)
+
+    def _get_stat(self, index: int) -> os.stat_result:
+        if (stat := self._stats.get(index)) is None:
+            stat = self._stats[index] = os.stat(
+                os.path.join(self.root, self.paths[index])
+            )
+        return stat
+
+    def show_results(self, query: str, indexes: list[int], total: int) -> None:
+        """Show the ranked results.
+
+        Args:
+            query (str): The query the results were ranked against.
+            indexes (list[int]): The indexes of the paths to show, best first.
+            total (int): How many paths matched in total.
+        """
+        if query != self.query_one("#find_input", Input).value:
+            return
+        find_options = self.query_one("#find_options", ZoxideOptionList)
+        find_options.set_options(
+            [
+                Option(
+                    Content(f" {self.paths[index]}"),
+                    id=path_utils.compress(self.paths[index]),
+                )
+                for index in indexes
+            ]
+            or [Option("  --No matches found--", disabled=True)]
+        )
+        if indexes:
+            find_options.highlighted = 0
+        find_options.border_subtitle = (
+            f"{len(indexes)}/{total}{'...' if self.walking else ''}"
+        )
+
+    def on_input_submitted(self, event: Input.Submitted) -> None:
+        event.stop()
+        find_options = self.query_one("#find_options", ZoxideOptionList)
+        if find_options.highlighted is None:
+            find_options.highlighted = 0
+        find_options.action_select()
+
+    def on_option_list_option_selected(self, event: OptionList.OptionSelected) -> None:
+        """Handle option selection."""
+        event.stop()
+        if event.option.id is None:
+            return
+        self.workers.cancel_group(self, "walk")
+        self.workers.cancel_group(self, "rank")
+        self.dismiss(path_utils.decompress(event.option.id).rstrip("/"))
+
+    def on_key(self, event: events.Key) -> None:
+        """Handle key presses."""
+        match event.key:
+            case "escape":
+                event.stop()
+                self.workers.cancel_group(self, "walk")
+                self.workers.cancel_group(self, "rank")
+                self.dismiss(None)
+            case "down":
+                event.stop()
+                find_options = self.query_one("#find_options", ZoxideOptionList)
+                if find_options.options:
+                    find_options.action_cursor_down()
+            case "up":
+                event.stop()
+                find_options = self.query_one("#find_options", ZoxideOptionList)
+                if find_options.options:
+                    find_options.action_cursor_up()
+            case "tab":
+                event.stop()
+                self.focus_next()
+            case "shift+tab":
+                event.stop()
+                self.focus_previous()
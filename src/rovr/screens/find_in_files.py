@@ -0,0 +1,220 @@
+import re
+from concurrent.futures.process import BrokenProcessPool
+from time import sleep
+
+from textual import events, work
+from textual.app import ComposeResult
+from textual.containers import VerticalGroup
+from textual.content import Content
+from textual.screen import ModalScreen
+from textual.widgets import Input, OptionList
+from textual.widgets.option_list import Option
+from textual.worker import get_current_worker
+
+from rovr.functions.grep import grep_parallel
+from rovr.screens.zd_to_directory import ZoxideOptionList
+from rovr.variables.constants import config
+
+
+class FindInFiles(ModalScreen):
+    """Screen with a dialog to search the contents of files, recursively"""
+
+    DEBOUNCE: float = 0.2
+    """How long, in seconds, to wait for more typing before searching."""
+
+    def __init__(self, root: str, **kwargs) -> None:
+        """Initialise the screen.
+
+        Args:
+            root (str): The directory to search from.
+        """
+        super().__init__(**kwargs)
+        self.root = root
+        self.is_regex = False
+        # (relative path, line number) of every option, in order
+        self.hits: list[tuple[str, int]] = []
+        self.searching = False
+
+    def compose(self) -> ComposeResult:
+        with VerticalGroup(id="grep_group"):
+            yield Input(
+                id="grep_input",
+                placeholder="Enter text to search for",
+            )
+            yield ZoxideOptionList(
+                Option("  No input provided", disabled=True),
+                id="grep_options",
+            )
+
+    def on_mount(self) -> None:
+        grep_input = self.query_one("#grep_input", Input)
+        grep_input.focus()
+        grep_options = self.query_one("#grep_options", ZoxideOptionList)
+        grep_options.border_title = "Hits"
+        grep_options.can_focus = False
+        self.update_titles()
+
+    def update_titles(self) -> None:
+        """Show the search mode and progress"""
+        mode = "regex" if self.is_regex else "literal"
+        self.query_one("#grep_input", Input).border_title = f"Find in files ({mode})"
+        progress = "..." if self.searching else ""
+        grep_options = self.query_one("#grep_options", ZoxideOptionList)
+        grep_options.border_subtitle = f"{len(self.hits)}{progress}"
+
+    def on_input_changed(self, event: Input.Changed) -> None:
+        event.stop()
+        self.search(event.value)
+
+    @work(thread=True, exclusive=True, group="grep")
+    def search(self, query: str) -> None:
+        """Search file contents, streaming the hits into the list.
+
+        Args:
+            query (str): The text or regex to search for.
+        """
+        worker = get_current_worker()
+        sleep(self.DEBOUNCE)
+        if worker.is_cancelled:
+            return
+        self.app.call_from_thread(self.clear_hits, bool(query))
+        if not query:
+            return
+        max_results = config["search"]["max_results"]
+        found = 0
+        try:
+            for hits in grep_parallel(
+                self.root,
+                query,
+                is_regex=self.is_regex,
+                # smart case, like most grep tools
+                ignore_case=query == query.lower(),
+                ignore=config["search"]["ignore"],
+                max_depth=config["search"]["max_depth"],
+                max_workers=config["search"]["max_workers"],
+                max_hits=config["search"]["max_hits_per_file"],
+                is_cancelled=lambda: worker.is_cancelled,
+            ):
+                if worker.is_cancelled:
+                    return
+                hits = hits[: max_results - found]
+                found += len(hits)
+                self.app.call_from_thread(self.add_hits, hits)
+                if found >= max_results:
+                    break
+        except re.error as exc:
+            self.app.call_from_thread(self.show_message, f"Invalid regex: {exc}")
+            return
+        except BrokenProcessPool:
+            self.app.call_from_thread(self.show_message, "The search was interrupted")
+            return
+        if not worker.is_cancelled:
+            self.app.call_from_thread(self.finish_search)
+
+    def clear_hits(self, searching: bool) -> None:
+        """Empty the list, before a new search.
+
+        Args:
+            searching (bool): Whether a search is about to start.
+        """
+        self.hits = []
+        self.searching = searching
+        self.query_one("#grep_options", ZoxideOptionList).set_options([
+            Option(
+                "  Searching..." if searching else "  No input provided",
+                disabled=True,
+            )
+        ])
+        self.update_titles()
+
+    def add_hits(self, hits: list[tuple[str, int, str]]) -> None:
+        """Add a batch of hits to the list.
+
+        Args:
+            hits (list[tuple[str, int, str]]): The relative path, line number
+                and line text of each hit.
+        """
+        grep_options = self.query_one("#grep_options", ZoxideOptionList)
+        if not self.hits:
+            grep_options.clear_options()
+        grep_options.add_options([
+            Option(
+                Content.from_markup(
+                    " [$accent]$location[/] $line",
+                    location=f"{relative_path}:{line_number}",
+                    line=line,
+                )
+            )
+            for relative_path, line_number, line in hits
+        ])
+        if not self.hits:
+            grep_options.highlighted = 0
+        self.hits.extend(
+            (relative_path, line_number) for relative_path, line_number, _ in hits
+        )
+        self.update_titles()
+
+    def finish_search(self) -> None:
+        """Mark the search as done"""
+        self.searching = False
+        if not self.hits:
+            self.query_one("#grep_options", ZoxideOptionList).set_options([
+                Option("  --No matches found--", disabled=True)
+            ])
+        self.update_titles()
+
+    def show_message(self, message: str) -> None:
+        """Replace the list with a message.
+
+        Args:
+            message (str): The message to show.
+        """
+        self.searching = False
+        self.query_one("#grep_options", ZoxideOptionList).set_options([
+            Option(Content(f"  {message}"), disabled=True)
+        ])
+        self.update_titles()
+
+    def on_input_submitted(self, event: Input.Submitted) -> None:
+        event.stop()
+        grep_options = self.query_one("#grep_options", ZoxideOptionList)
+        if grep_options.highlighted is None:
+            grep_options.highlighted = 0
+        grep_options.action_select()
+
+    def on_option_list_option_selected(self, event: OptionList.OptionSelected) -> None:
+        """Handle option selection."""
+        event.stop()
+        if event.option_index >= len(self.hits):
+            return
+        self.workers.cancel_group(self, "grep")
+        self.dismiss(self.hits[event.option_index])
+
+    def on_key(self, event: events.Key) -> None:
+        """Handle key presses."""
+        match event.key:
+            case "escape":
+                event.stop()
+                self.workers.cancel_group(self, "grep")
+                self.dismiss(None)
+            case "ctrl+r":
+                event.stop()
+                self.is_regex = not self.is_regex
+                self.update_titles()
+                self.search(self.query_one("#grep_input", Input).value)
+            case "down":
+                event.stop()
+                grep_options = self.query_one("#grep_options", ZoxideOptionList)
+                if grep_options.options:
+                    grep_options.action_cursor_down()
+            case "up":
+                event.stop()
+                grep_options = self.query_one("#grep_options", ZoxideOptionList)
+                if grep_options.options:
+                    grep_options.action_cursor_up()
+            case "tab":
+                event.stop()
+                self.focus_next()
+            case "shift+tab":
+                event.stop()
+                self.focus_previous()
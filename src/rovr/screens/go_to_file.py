@@ -0,0 +1,88 @@
+import os
+from os import path
+
+from textual import work
+from textual.widgets import Input, OptionList
+from textual.worker import get_current_worker
+
+from rovr.classes.file_index import FileIndex
+from rovr.classes.structured_query import StructuredQuery
+from rovr.functions import path as path_utils
+from rovr.screens.find_files import FindFiles
+from rovr.screens.zd_to_directory import ZoxideOptionList
+from rovr.variables.constants import config
+
+
+class GoToFile(FindFiles):
+    """Screen with a dialog to jump to any file or folder in the file index"""
+
+    def __init__(self, file_index: FileIndex, **kwargs) -> None:
+        """Initialise the screen.
+
+        Args:
+            file_index (FileIndex): The index to look names up in.
+        """
+        super().__init__("", **kwargs)
+        self.file_index = file_index
+
+    def on_mount(self) -> None:
+        find_input = self.query_one("#find_input", Input)
+        find_input.border_title = "Go to"
+        find_input.placeholder = "Enter part of a file or folder name"
+        find_input.focus()
+        find_options = self.query_one("#find_options", ZoxideOptionList)
+        find_options.border_title = "Indexed files"
+        find_options.can_focus = False
+        self.request_rank()
+
+    @work(thread=True, exclusive=True, group="rank")
+    def rank(self, query: str) -> None:
+        """Look the query up in the file index.
+
+        Args:
+            query (str): The words to look for.
+        """
+        worker = get_current_worker()
+        structured = StructuredQuery(query)
+
+        def keep(location: str) -> bool:
+            return structured.matches(
+                path.basename(location.rstrip("/")),
+                location.endswith("/"),
+                lambda: os.stat(location),
+            )
+
+        if structured.predicates and not structured.text:
+            # nothing to look up by name, so the filters are the query
+            found = self.file_index.filter(
+                keep, config["search"]["max_results"], lambda: worker.is_cancelled
+            )
+        else:
+            found = self.file_index.search(
+                structured.text, config["search"]["max_results"]
+            )
+            if structured.predicates:
+                found = [location for location in found if keep(location)]
+        if worker.is_cancelled:
+            return
+        self.walking = self.file_index.reindexing
+        self.paths = found
+        self.app.call_from_thread(
+            self.show_results, query, list(range(len(found))), len(found)
+        )
+
+    def on_option_list_option_selected(self, event: OptionList.OptionSelected) -> None:
+        """Handle option selection."""
+        event.stop()
+        if event.option.id is None:
+            return
+        selected = path_utils.decompress(event.option.id).rstrip("/")
+        if not path.lexists(selected):
+            self.notify(
+                f"{selected} no longer exists", title="Go to", severity="warning"
+            )
+            self.app.refresh_file_index([selected])
+            self.request_rank()
+            return
+        self.workers.cancel_group(self, "rank")
+        self.dismiss(selected)
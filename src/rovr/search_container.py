@@ -2,21 +2,30 @@ import contextlib
 
 from textual import events, work
 from textual.css.query import NoMatches
-from textual.fuzzy import Matcher
 from textual.types import OptionDoesNotExist
 from textual.widgets import Input, OptionList, SelectionList
 from textual.widgets.option_list import Option
-from textual.widgets.selection_list import Selection, SelectionError
+from textual.widgets.selection_list import Selection
+from textual.worker import get_current_worker
 
+from rovr.classes import FuzzyFilter, RankedMatches, StructuredQuery
 from rovr.functions.utils import set_scuffed_subtitle
 
 
 class SearchInput(Input):
+    # how many labels are checked before looking for a newer query
+    FILTER_BATCH_SIZE: int = 2000
+    # how many ranked matches are shown at once, more are loaded on scroll
+    RESULT_PAGE_SIZE: int = 200
+
     def __init__(self, *args, **kwargs) -> None:
         super().__init__(
             *args, password=False, compact=True, select_on_focus=False, **kwargs
         )
-        self.selected = set()
+        self._fuzzy_filter: FuzzyFilter | None = None
+        self._fuzzy_filter_source: list | None = None
+        # the matches of the current query that were not shown yet
+        self.ranked: RankedMatches | None = None
 
     def on_mount(self) -> None:
         self.items_list = self.parent.query_one(OptionList)
@@ -29,74 +38,178 @@ class SearchInput(Input):
                 f"type {type(self.items_list).__name__} was matched but expected either OptionList or SelectionList"
             )
 
-    # exclusive when too many options, and not enough time to mount
-    @work(exclusive=True)
-    async def on_input_changed(self, event: Input.Changed) -> None:
+    def on_input_changed(self, event: Input.Changed) -> None:
+        self.app.tabWidget.active_tab.session.search = event.value
+        if event.value == "":
+            self.workers.cancel_group(self, "search")
+            self.show_all_options()
+            return
+        self.filter_options(event.value)
+
+    def _get_fuzzy_filter(self) -> FuzzyFilter:
+        """Get the filter for the current options, making a new one when the
+        options changed since the last query.
+
+        Returns:
+            FuzzyFilter: The filter for `list_of_options`.
+        """
+        assert hasattr(self.items_list, "list_of_options")
+        options = self.items_list.list_of_options
+        if (
+            self._fuzzy_filter is None
+            or self._fuzzy_filter_source is not options
+            or len(self._fuzzy_filter) != len(options)
+        ):
+            self._fuzzy_filter = FuzzyFilter(
+                None if option.disabled else option.label for option in options
+            )
+            self._fuzzy_filter_source = options
+        return self._fuzzy_filter
+
+    @work(thread=True, exclusive=True, group="search")
+    def filter_options(self, query: str) -> None:
+        """Score the options in a thread, then show the matches.
+
+        Args:
+            query (str): The search query.
+        """
+        worker = get_current_worker()
+        structured = StructuredQuery(query)
+        fuzzy_filter = self._get_fuzzy_filter()
+        text_matches = fuzzy_filter.filter(
+            structured.text,
+            is_cancelled=lambda: worker.is_cancelled,
+            batch_size=self.FILTER_BATCH_SIZE,
+        )
+        if text_matches is None or worker.is_cancelled:
+            return
+        matches = text_matches
+        if structured.predicates and self.item_list_type == "Selection":
+            # entries cache their stat, so this only hits the disk once each
+            options = self.items_list.list_of_options
+            matches = []
+            for index in text_matches:
+                entry = getattr(options[index], "dir_entry", None)
+                if entry is not None and structured.matches(
+                    entry.name, entry.is_dir(), entry.stat
+                ):
+                    matches.append(index)
+                if worker.is_cancelled:
+                    return
+        ranked = None
+        if (
+            self.item_list_type == "Selection"
+            and not self.items_list.tree_mode_enabled
+            and structured.text
+        ):
+            # tree mode keeps its order, so that children stay under parents
+            ranked = RankedMatches(structured.text, fuzzy_filter.keys, matches)
+            if worker.is_cancelled:
+                return
+        self.app.call_from_thread(
+            self.show_matches,
+            query,
+            fuzzy_filter,
+            matches,
+            ranked,
+            (structured.text, text_matches),
+        )
+
+    def show_all_options(self) -> None:
+        """Show every option again, like before searching."""
+        if self._fuzzy_filter is not None:
+            self._fuzzy_filter.reset()
+        self.ranked = None
         if self.item_list_type == "Selection":
-            assert isinstance(self.items_list, SelectionList)
-            self.selected.update({*self.items_list.selected})
-        else:
-            assert isinstance(self.items_list, OptionList)
+            self.items_list.set_match_query("")
+            # the selection list keeps its selection while filtered
+            self.items_list.set_visible_options(self.items_list.list_of_options)
+            if self.items_list.highlighted is None:
+                self.items_list.highlighted = 0
+            self.items_list.update_border_subtitle()
+            return
         try:
             highlighted = self.items_list.highlighted_option.id
         except AttributeError:
             highlighted = None
-        self.app.tabWidget.active_tab.session.search = event.value
-        if event.value == "":
-            self.items_list.clear_options()
-            self.items_list.add_options(self.items_list.list_of_options)
-            if highlighted is not None:
-                with contextlib.suppress(OptionDoesNotExist, SelectionError):
-                    self.items_list.highlighted = self.items_list.get_option_index(
-                        highlighted
-                    )
-            else:
-                self.items_list.highlighted = 0
-            if self.item_list_type == "Selection":
-                for option_id in self.selected:
-                    with contextlib.suppress(OptionDoesNotExist):
-                        if not self.items_list.select_mode_enabled:
-                            with self.items_list.prevent(
-                                self.items_list.SelectedChanged
-                            ):
-                                self.items_list.select(
-                                    self.items_list.get_option(option_id)
-                                )
-                        else:
-                            self.items_list.select(
-                                self.items_list.get_option(option_id)
-                            )
-            return
         self.items_list.clear_options()
-        matches = []
-        matcher = Matcher(
-            event.value,
-        )
-        assert hasattr(self.items_list, "list_of_options")
-        for option in self.items_list.list_of_options:
-            assert isinstance(option, Option)
-            if option.disabled:
-                matches.append(option)
-                continue
-            score = matcher.match(option.label)
-            if score > 0:
-                matches.append(option)
-        if matches:
-            self.items_list.add_options(matches)
-        else:
-            if self.item_list_type == "Option":
-                self.items_list.add_option(
-                    Option("   --no-matches--", id="", disabled=True)
+        self.items_list.add_options(self.items_list.list_of_options)
+        if highlighted is not None:
+            with contextlib.suppress(OptionDoesNotExist):
+                self.items_list.highlighted = self.items_list.get_option_index(
+                    highlighted
                 )
+        else:
+            self.items_list.highlighted = 0
+
+    def show_matches(
+        self,
+        query: str,
+        fuzzy_filter: FuzzyFilter,
+        matches: list[int],
+        ranked: RankedMatches | None = None,
+        applied: tuple[str, list[int]] | None = None,
+    ) -> None:
+        """Show the options that matched a query.
+
+        Args:
+            query (str): The query that was matched.
+            fuzzy_filter (FuzzyFilter): The filter that did the matching.
+            matches (list[int]): The indexes of the matching options.
+            ranked (RankedMatches | None): The matches ranked by score, to show
+                the first page of instead of every match in the original order.
+            applied (tuple[str, list[int]] | None): The fuzzy text of the query
+                and the options it matched before any filters, to narrow the
+                next query from. Defaults to the query and the matches.
+        """
+        if query != self.value or fuzzy_filter is not self._fuzzy_filter:
+            # superseded by a newer query, or the options changed
+            return
+        text, text_matches = (query, matches) if applied is None else applied
+        # filters can loosen as they are typed, so only the text is narrowed
+        fuzzy_filter.remember(text, text_matches)
+        options = self.items_list.list_of_options
+        if self.item_list_type == "Selection":
+            self.ranked = ranked
+            self.items_list.set_match_query(text)
+            self.items_list.set_visible_options(
+                [
+                    options[index]
+                    for index in (
+                        matches
+                        if ranked is None
+                        else ranked.take(self.RESULT_PAGE_SIZE)
+                    )
+                ]
+                if matches
+                else [Selection("   --no-matches--", value="", id="", disabled=True)]
+            )
+            if ranked is not None and matches:
+                # the best match is at the top now
+                self.items_list.highlighted = 0
+                self.items_list.scroll_to(y=0, animate=False)
+            elif self.items_list.highlighted is None:
+                self.items_list.action_first()
+            if matches:
+                self.items_list.update_border_subtitle()
             else:
-                self.items_list.add_option(
-                    Selection("   --no-matches--", value="", id="", disabled=True)
-                )
                 set_scuffed_subtitle(
                     self.items_list.parent,
                     "SELECT" if self.items_list.select_mode_enabled else "NORMAL",
                     "0/0",
                 )
+            return
+        try:
+            highlighted = self.items_list.highlighted_option.id
+        except AttributeError:
+            highlighted = None
+        self.items_list.clear_options()
+        if matches:
+            self.items_list.add_options([options[index] for index in matches])
+        else:
+            self.items_list.add_option(
+                Option("   --no-matches--", id="", disabled=True)
+            )
         if self.items_list.highlighted is None:
             if highlighted is not None:
                 try:
@@ -107,16 +220,15 @@ class SearchInput(Input):
                     self.items_list.action_cursor_down()
             else:
                 self.items_list.action_cursor_down()
-        if self.item_list_type == "Selection":
-            for option_id in self.selected:
-                with contextlib.suppress(OptionDoesNotExist):
-                    if not self.items_list.select_mode_enabled:
-                        with self.items_list.prevent(self.items_list.SelectedChanged):
-                            self.items_list.select(
-                                self.items_list.get_option(option_id)
-                            )
-                    else:
-                        self.items_list.select(self.items_list.get_option(option_id))
+
+    def load_more_matches(self) -> None:
+        """Show the next page of ranked matches, if there are any left."""
+        if not self.ranked:
+            return
+        options = self.items_list.list_of_options
+        self.items_list.extend_visible_options([
+            options[index] for index in self.ranked.take(self.RESULT_PAGE_SIZE)
+        ])
 
     def on_input_submitted(self, event: Input.Submitted) -> None:
         self.items_list.focus()
@@ -125,6 +237,3 @@ class SearchInput(Input):
         if event.key == "escape":
             self.items_list.focus()
             event.stop()
-
-    def clear_selected(self) -> None:
-        self.selected = set()
@@ -15,7 +15,10 @@ class PreviewContainerTitles:
     bat = "File Preview (bat)"
     file = "File Preview"
     folder = "Folder Preview"
+    gallery = "Gallery Preview"
+    hex = "Hex Preview"
     archive = "Archive Preview"
+    member = "Archive Member Preview"
 
 
 buttons_that_depend_on_path = [